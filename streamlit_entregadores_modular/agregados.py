@@ -0,0 +1,64 @@
+import pandas as pd
+from indices import IndiceDatas, IndiceNomes
+from instrumentacao import medido
+from utils import concatenar
+
+# Grão do cubo: uma linha por (entregador, dia, turno, praça, subpraça).
+# nome normalizado, mes e ano dependem só das chaves; entram no grão para os relatórios filtrarem direto.
+GRAO = ["pessoa_entregadora", "pessoa_entregadora_normalizado", "data", "mes", "ano",
+        "periodo", "praca", "sub_praca"]
+
+SOMAS = [
+    "numero_de_corridas_ofertadas",
+    "numero_de_corridas_aceitas",
+    "numero_de_corridas_rejeitadas",
+    "numero_de_corridas_completadas",
+    "segundos_abs",
+]
+
+def e_cubo(df: pd.DataFrame) -> bool:
+    return "turnos" in df.columns
+
+@medido()
+def construir_cubo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega as linhas de turno no grão GRAO, uma vez por versão dos dados.
+    Mantém os nomes das colunas de contagem do bundle; 'turnos' é a quantidade de linhas somadas e
+    a média de 'tempo_disponivel_escalado' fica como soma + contagem para poder ser reagregada.
+    """
+    chaves = [c for c in GRAO if c in df.columns]
+    aggs = {c: (c, "sum") for c in SOMAS if c in df.columns}
+    aggs["turnos"] = (chaves[0], "size")
+    if "tempo_disponivel_escalado" in df.columns:
+        aggs["soma_tempo_disponivel_escalado"] = ("tempo_disponivel_escalado", "sum")
+        aggs["n_tempo_disponivel_escalado"] = ("tempo_disponivel_escalado", "count")
+
+    cubo = df.groupby(chaves, dropna=False, sort=False, observed=True).agg(**aggs).reset_index()
+    if "n_tempo_disponivel_escalado" in cubo.columns:
+        n = cubo["n_tempo_disponivel_escalado"]
+        cubo["tempo_disponivel_escalado"] = (cubo["soma_tempo_disponivel_escalado"] / n).where(n > 0)
+    if "versao" in df.attrs:
+        cubo.attrs["versao"] = df.attrs["versao"]  # o groupby não propaga attrs
+    return cubo
+
+@medido()
+def atualizar_cubo(anterior: pd.DataFrame, df: pd.DataFrame, corte) -> pd.DataFrame:
+    """
+    Cubo de 'df' reaproveitando o cubo 'anterior' nos dias antes de 'corte': só as linhas de 'df' a partir
+    do corte (e as sem data) são agregadas. Vale quando o histórico de 'df' é o mesmo da base que gerou
+    'anterior' (data_loader: attrs['incremental']); como o dia faz parte do grão, nenhuma linha do cubo
+    mistura dias dos dois lados do corte.
+    """
+    corte = pd.Timestamp(corte)
+    prefixo = anterior[anterior["data"] < corte]
+    novo = construir_cubo(df[~(df["data"] < corte)])
+    cubo = concatenar(prefixo, novo[prefixo.columns])
+    if "versao" in df.attrs:
+        cubo.attrs["versao"] = df.attrs["versao"]
+    return cubo
+
+def como_cubo(df) -> pd.DataFrame:
+    """Aceita o cubo pronto, um índice sobre ele (indices.IndiceDatas/IndiceNomes) ou um recorte cru do bundle."""
+    if isinstance(df, (IndiceDatas, IndiceNomes)):
+        return df.cubo
+    return df if e_cubo(df) else construir_cubo(df)
@@ -0,0 +1,198 @@
+"""
+Versão atual dos dados, servida a todas as sessões, e a thread que monta a próxima (stale-while-revalidate).
+
+    atualizador = Atualizador(construir=lambda anterior: montar_versao(anterior=anterior),
+                              buscar=baixar_planilhas,
+                              assinatura=lambda: assinatura_arquivos(DESTINO, PROMOCOES_DESTINO))
+    atualizador.iniciar()           # a cada 'intervalo_s' (ou em solicitar()): buscar, comparar, montar
+    dados = atualizador.atual()     # nunca espera uma montagem, exceto a primeira do processo
+
+A versão nova (carga + cubo + índices + tabelas) é montada inteira fora das requisições e entra com
+uma única atribuição: quem já pegou a anterior termina o rerun com ela, sem misturar versões.
+Quando a carga só acrescentou dias à base da versão atual, o cubo e as tabelas de indicadores dela são
+reaproveitados até o corte; índices e seletores são refeitos sobre o cubo novo (passadas vetorizadas).
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from agregados import atualizar_cubo, construir_cubo
+from data_loader import DESTINO, carregar_base, baixar_planilha
+from indices import IndiceDatas, IndiceNomes
+from instrumentacao import medido
+from nomes import nomes_de_exibicao
+from promocoes_loader import carregar_promocoes, baixar_promocoes, estruturar_promocoes
+from relatorios import tabela_indicadores
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_PADRAO_S = 30 * 60
+
+@dataclass(slots=True, frozen=True)
+class DadosVersao:
+    """
+    Tudo o que o app lê de uma versão dos dados; somente leitura, compartilhado entre sessões.
+    A base linha a linha não fica aqui: depois do cubo, dela só interessam os números da carga.
+    """
+    cubo: pd.DataFrame
+    indice_datas: IndiceDatas
+    indice_nomes: IndiceNomes
+    indicadores: dict
+    opcoes: dict
+    carga: dict   # attrs da base (duracoes_invalidas, memoria_bytes_linha, leitura) + linhas e memoria_mb
+    promocoes: list | None
+    promocoes_erro: str | None
+    versao: str
+    gerada_em: datetime
+
+def opcoes_seletores(cubo: pd.DataFrame) -> dict:
+    """Listas dos seletores (entregadores, anos, subpraças, turnos, datas); o cubo tem os mesmos valores da base."""
+    datas = cubo["data"].dropna()
+    return {
+        # uma entrada por entregador (variantes de grafia juntas), na grafia mais frequente
+        "entregadores": sorted(nomes_de_exibicao(cubo).dropna().unique()),
+        "anos": sorted(cubo["ano"].dropna().unique().tolist(), reverse=True),
+        "subpracas": sorted(cubo["sub_praca"].dropna().unique()),
+        "turnos": sorted(cubo["periodo"].dropna().unique()),
+        "dias": sorted(datas.unique()),
+        "data_min": datas.min().date(),
+        "data_max": datas.max().date(),
+    }
+
+def resumo_carga(df: pd.DataFrame) -> dict:
+    """O que o painel do admin mostra da base: attrs da carga, linhas e memória."""
+    return {**df.attrs, "linhas": len(df), "memoria_mb": df.memory_usage(deep=True).sum() / 2**20}
+
+@medido()
+def montar_versao(destino: Path = DESTINO, file_id: str | None = None, promocoes_file_id: str | None = None,
+                  anterior: DadosVersao | None = None) -> DadosVersao:
+    """
+    Carga (cache Parquet/incremental) e tudo o que deriva dela. Levanta ErroCarregamento sem planilha.
+    Com 'anterior' (a versão atual), o que ela já tem antes do corte da ingestão incremental não é refeito.
+    """
+    df = carregar_base(destino, file_id)
+    corte = _corte_incremental(df, anterior)
+    cubo = construir_cubo(df) if corte is None else atualizar_cubo(anterior.cubo, df, corte)
+    carga, versao = resumo_carga(df), df.attrs.get("versao", "")
+    del df  # daqui em diante só o cubo: a base é liberada antes dos índices e tabelas
+    indice_datas = IndiceDatas(cubo)
+    indicadores = (tabela_indicadores(indice_datas) if corte is None
+                   else tabela_indicadores(indice_datas, anterior.indicadores, corte))
+    try:
+        promocoes, erro = estruturar_promocoes(*carregar_promocoes(file_id=promocoes_file_id)), None
+    except Exception as e:
+        # sem promoções os demais modos seguem; o modo Promoções mostra o erro
+        logger.warning("Promoções indisponíveis nesta versão: %s", e)
+        promocoes, erro = None, str(e)
+    return DadosVersao(cubo=cubo, indice_datas=indice_datas, indice_nomes=IndiceNomes(cubo),
+                       indicadores=indicadores, opcoes=opcoes_seletores(cubo), carga=carga,
+                       promocoes=promocoes, promocoes_erro=erro, versao=versao, gerada_em=datetime.now())
+
+def _corte_incremental(df: pd.DataFrame, anterior: DadosVersao | None) -> pd.Timestamp | None:
+    """Corte da ingestão incremental se 'df' estendeu a base da versão 'anterior' (attrs['incremental']); senão None."""
+    incremental = df.attrs.get("incremental")
+    if anterior is None or not incremental or incremental.get("base") != anterior.versao:
+        return None
+    return pd.Timestamp(incremental["corte"])
+
+def baixar_planilhas(file_id: str | None = None, promocoes_file_id: str | None = None) -> None:
+    """Atualiza as duas planilhas do Drive (sem baixar o que não mudou; ver download.py)."""
+    if not baixar_planilha(file_id=file_id):
+        logger.warning("Planilha principal não atualizada; segue a versão atual.")
+    if not baixar_promocoes(file_id=promocoes_file_id):
+        logger.warning("Planilha de promoções não atualizada; segue a versão atual.")
+
+def assinatura_arquivos(*paths) -> tuple:
+    """(tamanho, mtime) de cada arquivo: muda quando um download troca o conteúdo, não quando só confere."""
+    assinatura = []
+    for path in map(Path, paths):
+        try:
+            info = path.stat()
+            assinatura.append((info.st_size, info.st_mtime_ns))
+        except FileNotFoundError:
+            assinatura.append(None)
+    return tuple(assinatura)
+
+class Atualizador:
+    """
+    Guarda a versão atual e a substitui quando a fonte muda.
+    construir(anterior) monta uma versão a partir da atual (None na primeira); buscar() atualiza a fonte
+    (download); assinatura() é um valor barato que muda junto com a fonte. Uma montagem por vez; falhas mantêm a versão atual.
+    """
+
+    def __init__(self, construir, buscar=None, assinatura=None, intervalo_s: float = INTERVALO_PADRAO_S):
+        self.intervalo_s = intervalo_s
+        self._construir = construir
+        self._buscar = buscar
+        self._assinatura = assinatura or (lambda: None)
+        self._atual = None
+        self._assinatura_atual = None
+        self._montando = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._estado = {"ultima_verificacao": None, "erro": None, "ocupado": False}
+
+    def atual(self):
+        """Versão atual; só a primeira chamada do processo espera a montagem (não há o que servir antes)."""
+        if self._atual is None:
+            with self._montando:
+                if self._atual is None:
+                    versao = self._construir(None)
+                    # depois da montagem: a primeira carga pode ter baixado a planilha que faltava
+                    self._publicar(self._assinatura(), versao)
+        return self._atual
+
+    def iniciar(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco, name="atualizador-dados", daemon=True)
+            self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+
+    def solicitar(self) -> None:
+        """Antecipa a próxima verificação (botão do admin); volta na hora, sem esperar a montagem."""
+        self._acordar.set()
+
+    def estado(self) -> dict:
+        atual = self._atual
+        return {**self._estado, "versao": getattr(atual, "versao", None), "gerada_em": getattr(atual, "gerada_em", None)}
+
+    def verificar(self) -> bool:
+        """Busca a fonte e, se a assinatura mudou, monta e publica a versão nova. True se publicou."""
+        with self._montando:
+            self._estado["ocupado"] = True
+            try:
+                if self._buscar is not None:
+                    self._buscar()
+                assinatura = self._assinatura()
+                if self._atual is not None and assinatura == self._assinatura_atual:
+                    return False
+                self._publicar(assinatura, self._construir(self._atual))
+                logger.info("Nova versão dos dados publicada: %s", getattr(self._atual, "versao", ""))
+                return True
+            except Exception as e:
+                logger.warning("Atualização em segundo plano falhou; segue a versão atual: %s", e)
+                self._estado["erro"] = f"{type(e).__name__}: {e}"
+                return False
+            finally:
+                self._estado["ocupado"] = False
+                self._estado["ultima_verificacao"] = datetime.now()
+
+    def _publicar(self, assinatura, versao) -> None:
+        self._atual, self._assinatura_atual = versao, assinatura
+        self._estado["erro"] = None
+
+    def _laco(self) -> None:
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo_s)
+            self._acordar.clear()
+            if not self._parar.is_set():
+                self.verificar()
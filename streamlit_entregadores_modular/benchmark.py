@@ -0,0 +1,188 @@
+"""
+Tempos e pico de memória do carregamento e dos relatórios com dados sintéticos (sinteticos.py).
+
+    python -m benchmark                                  # 10k e 100k linhas
+    python -m benchmark --linhas 10000 100000 1000000    # 1M só quando pedido (derivação, sem .xlsx)
+    python -m benchmark --linhas 1000000 --planilha-ate 1000000   # inclui o .xlsx de 1M (demorado)
+
+Cada execução entra no histórico JSON (commit, versões, tempo e pico por função) e é comparada
+com a última execução do mesmo tamanho, para regressões aparecerem entre versões.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agregados import construir_cubo
+from data_loader import caminhos_cache, carregar_base, derivar_bundle, ler_planilha
+from download import escrever_atomico
+from indices import IndiceDatas
+import instrumentacao
+from lote import gerar_lote
+from relatorios import (
+    gerar_dados,
+    gerar_simplicado,
+    detectar_ausencias,
+    classificar_entregadores,
+    classificar_por_mes,
+    utr_por_entregador_turno,
+    utr_pivot_por_entregador,
+    gerar_por_praca_data_turno,
+    tabela_indicadores,
+)
+from sinteticos import gerar_bundle, gravar
+
+HISTORICO = Path("benchmark.json")
+TAMANHOS = (10_000, 100_000)
+# gravar e ler .xlsx domina o tempo acima disso: tamanhos maiores medem só a partir da derivação
+PLANILHA_ATE = 100_000
+# piora acima disso em relação à execução anterior do mesmo tamanho é destacada
+LIMIAR_REGRESSAO = 0.20
+
+def medir(func, repeticoes: int = 3) -> dict:
+    """Pico de memória (tracemalloc) numa primeira chamada e, sem ele, o melhor/mediana de 'repeticoes'."""
+    tracemalloc.start()
+    try:
+        func()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - t0)
+    return {"s": round(min(tempos), 6), "mediana_s": round(statistics.median(tempos), 6),
+            "pico_mb": round(pico / 2**20, 2)}
+
+def _casos_carregamento(planilha: Path) -> dict:
+    def sem_cache():
+        for arquivo in caminhos_cache(planilha):
+            arquivo.unlink(missing_ok=True)
+        return carregar_base(planilha)
+    return {
+        "carregar_base (planilha)": sem_cache,
+        "carregar_base (cache parquet)": lambda: carregar_base(planilha),
+        "ler_planilha (streaming)": lambda: ler_planilha(planilha, "streaming"),
+        "ler_planilha (pd.read_excel)": lambda: ler_planilha(planilha, "pandas"),
+    }
+
+def _casos_relatorios(df: pd.DataFrame) -> dict:
+    cubo = construir_cubo(df)
+    indice = IndiceDatas(cubo)
+    ultimo = df["data"].max()
+    mes, ano = int(ultimo.month), int(ultimo.year)
+    nome = df["pessoa_entregadora"].iloc[len(df) // 2]
+    return {
+        "construir_cubo": lambda: construir_cubo(df),
+        "IndiceDatas": lambda: IndiceDatas(cubo),
+        "gerar_dados": lambda: gerar_dados(nome, mes, ano, indice),
+        "gerar_simplicado": lambda: gerar_simplicado(nome, mes, ano, indice),
+        "classificar_entregadores (mês)": lambda: classificar_entregadores(indice, mes, ano),
+        "classificar_entregadores (histórico)": lambda: classificar_entregadores(indice),
+        "classificar_por_mes": lambda: classificar_por_mes(indice),
+        "utr_por_entregador_turno (mês)": lambda: utr_por_entregador_turno(indice, mes, ano),
+        "utr_por_entregador_turno (histórico)": lambda: utr_por_entregador_turno(indice),
+        "utr_pivot_por_entregador (mês)": lambda: utr_pivot_por_entregador(indice, mes, ano),
+        "detectar_ausencias": lambda: detectar_ausencias(indice, hoje=ultimo.date()),
+        "gerar_por_praca_data_turno (mês)": lambda: gerar_por_praca_data_turno(
+            None, data_inicio=ultimo.replace(day=1), data_fim=ultimo, indice=indice),
+        "tabela_indicadores": lambda: tabela_indicadores(indice),
+        "gerar_lote (mês)": lambda: gerar_lote(indice, [(mes, ano)]),
+    }
+
+def rodar(linhas: int, repeticoes: int, pasta: Path, com_planilha: bool) -> dict:
+    bruto = gerar_bundle(linhas=linhas)
+    resultados = {}
+    if com_planilha:
+        planilha = gravar(bruto, pasta / f"sintetico_{linhas}.xlsx")
+        for nome, func in _casos_carregamento(planilha).items():
+            resultados[nome] = medir(func, repeticoes)
+            _mostrar(nome, resultados[nome])
+        df = carregar_base(planilha)
+    else:
+        # mesmo caminho de derivação do data_loader, sem passar pelo .xlsx
+        df = derivar_bundle(bruto)
+
+    for nome, func in _casos_relatorios(df).items():
+        resultados[nome] = medir(func, repeticoes)
+        _mostrar(nome, resultados[nome])
+    return {"linhas": len(df), "entregadores": int(df["pessoa_entregadora_normalizado"].nunique()),
+            "memoria_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2), "resultados": resultados}
+
+def _mostrar(nome: str, r: dict, anterior: dict | None = None) -> None:
+    linha = f"  {nome:<40} {r['s'] * 1000:>10.1f} ms {r['pico_mb']:>9.1f} MB"
+    if anterior:
+        variacao = r["s"] / anterior["s"] - 1 if anterior["s"] else 0.0
+        linha += f"  {variacao:+.0%}" + ("  ⚠️ regressão" if variacao > LIMIAR_REGRESSAO else "")
+    print(linha, file=sys.stderr)
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def ler_historico(path: Path) -> list[dict]:
+    try:
+        return json.loads(Path(path).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+def comparar(historico: list[dict], execucao: dict) -> None:
+    """Compara cada tamanho da execução com a última execução anterior do mesmo tamanho."""
+    for tamanho in execucao["tamanhos"]:
+        anterior = next((t for e in reversed(historico) for t in e["tamanhos"]
+                         if t["linhas"] == tamanho["linhas"]), None)
+        if anterior is None:
+            continue
+        print(f"\n{tamanho['linhas']:,} linhas vs. execução anterior:".replace(",", "."), file=sys.stderr)
+        for nome, r in tamanho["resultados"].items():
+            _mostrar(nome, r, anterior["resultados"].get(nome))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(TAMANHOS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--planilha-ate", type=int, default=PLANILHA_ATE,
+                        help="mede o carregamento do .xlsx só até esse tamanho (padrão: %(default)s)")
+    parser.add_argument("--historico", default=str(HISTORICO), help="JSON acumulado (padrão: %(default)s)")
+    parser.add_argument("--dir", help="pasta para as planilhas sintéticas (padrão: temporária)")
+    args = parser.parse_args(argv)
+    instrumentacao.configurar("0")  # mede as funções sem o custo (nem o log) dos spans
+
+    execucao = {
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeticoes": args.repeticoes,
+        "tamanhos": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(args.dir or tmp)
+        pasta.mkdir(parents=True, exist_ok=True)
+        for linhas in args.linhas:
+            print(f"\n{linhas:,} linhas".replace(",", "."), file=sys.stderr)
+            execucao["tamanhos"].append(rodar(linhas, args.repeticoes, pasta, linhas <= args.planilha_ate))
+
+    historico = ler_historico(args.historico)
+    comparar(historico, execucao)
+    escrever_atomico(Path(args.historico), json.dumps(historico + [execucao], ensure_ascii=False,
+                                                       indent=1).encode("utf-8"))
+    print(f"\nhistórico -> {args.historico}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Cache de resultados dos relatórios por (versão dos dados, função, parâmetros).
+LRU com teto de memória; trocar a versão dos dados (planilha nova) descarta o que era da versão anterior.
+Sem dependência do Streamlit: o app guarda uma instância em st.cache_resource.
+"""
+import json
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from indices import IndiceDatas, IndiceNomes
+
+logger = logging.getLogger(__name__)
+
+def versao_dos_dados(dados) -> str | None:
+    """Versão gravada pelo data_loader em attrs['versao'] (base, cubo ou índice sobre eles)."""
+    if isinstance(dados, (IndiceDatas, IndiceNomes)):
+        dados = dados.cubo
+    attrs = getattr(dados, "attrs", None) or {}
+    return attrs.get("versao")
+
+def tamanho_bytes(obj) -> int:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(uso, pd.Series) else uso)
+    if isinstance(obj, dict):
+        return sum(tamanho_bytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(tamanho_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+def _chave_parametro(valor):
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        return json.dumps(valor, sort_keys=True, default=str)
+
+def _entregar(resultado):
+    # cópia rasa: quem chama pode acrescentar colunas (tempo_hms...) sem mexer no que está guardado
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return resultado.copy(deep=False)
+    if isinstance(resultado, dict):
+        return {k: _entregar(v) for k, v in resultado.items()}
+    return resultado
+
+class CacheResultados:
+    """LRU thread-safe (o Streamlit atende sessões em threads) limitado por bytes e por quantidade."""
+
+    def __init__(self, max_mb: float = 256, max_itens: int = 256):
+        self.max_bytes = int(max_mb * 2**20)
+        self.max_itens = max_itens
+        self._itens = OrderedDict()  # chave -> (resultado, bytes)
+        self._bytes = 0
+        self._versao = None
+        self._lock = threading.Lock()
+        self.acertos = self.faltas = 0
+
+    def chamar(self, func, dados, *args, **kwargs):
+        """func(dados, *args, **kwargs), reaproveitando o resultado se a versão e os parâmetros forem os mesmos."""
+        versao = versao_dos_dados(dados)
+        if versao is None:
+            # dados sem versão (recorte feito na hora): não dá para saber se mudaram
+            return func(dados, *args, **kwargs)
+
+        chave = (versao, func.__module__, func.__qualname__,
+                 tuple(_chave_parametro(a) for a in args),
+                 tuple(sorted((k, _chave_parametro(v)) for k, v in kwargs.items())))
+        with self._lock:
+            if versao != self._versao:
+                self._limpar()
+                self._versao = versao
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return _entregar(self._itens[chave][0])
+            self.faltas += 1
+
+        resultado = func(dados, *args, **kwargs)
+        tamanho = tamanho_bytes(resultado)
+        with self._lock:
+            if chave in self._itens:
+                # outra thread calculou a mesma chave ao mesmo tempo: fica a que já está (e a conta de bytes)
+                self._itens.move_to_end(chave)
+                return _entregar(self._itens[chave][0])
+            if versao == self._versao and tamanho <= self.max_bytes:
+                self._itens[chave] = (resultado, tamanho)
+                self._bytes += tamanho
+                self._despejar()
+        return _entregar(resultado)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._limpar()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"itens": len(self._itens), "mb": round(self._bytes / 2**20, 2),
+                    "acertos": self.acertos, "faltas": self.faltas, "versao": self._versao}
+
+    def _limpar(self) -> None:
+        self._itens.clear()
+        self._bytes = 0
+
+    def _despejar(self) -> None:
+        while self._itens and (self._bytes > self.max_bytes or len(self._itens) > self.max_itens):
+            chave, (_, tamanho) = self._itens.popitem(last=False)
+            self._bytes -= tamanho
+            logger.debug("cache de resultados: removido %s (%d bytes)", chave[2], tamanho)
@@ -1,54 +1,306 @@
 # data_loader.py
+import json
+import os
+import logging
+import sys
+from datetime import time
+import numpy as np
 import pandas as pd
-import streamlit as st
-import gdown
 from pathlib import Path
-from utils import normalizar
+from download import baixar_drive, escrever_atomico, hash_arquivo
+from nomes import chaves_entregadores
+from instrumentacao import medido, medir
+from leitor_xlsx import COLUNAS, DURACAO_INVALIDA, DURACAO_SAIDA, ler_bundle
+from utils import concatenar, duracoes_para_segundos
+
+logger = logging.getLogger(__name__)
 
 SHEET = "bundle"
+DESTINO = Path("Tricolor.xlsx")
+BACKUP = Path("/mnt/data/Tricolor.xlsx")
+FILE_ID_PADRAO = os.environ.get("CALENDARIO_FILE_ID", "1t5t1oZYJdMSmZJDUpkFtOPtn5MVN9chN")
+# "streaming" (leitor_xlsx: colunas tipadas durante a leitura) ou "pandas" (pd.read_excel, referência)
+LEITOR_XLSX = os.environ.get("LEITOR_XLSX", "streaming")
+
+# Cache colunar ao lado da planilha (Tricolor.xlsx -> Tricolor.parquet + Tricolor.cache.json).
+# Suba CACHE_VERSAO sempre que mudar as colunas derivadas em derivar_bundle.
+CACHE_VERSAO = 9
+DERIVADAS = ("data", "mes", "ano", "mes_ano", "pessoa_entregadora_normalizado", "segundos_abs")
+# colunas cruas substituídas por derivadas compactas (tempo_disponivel_absoluto -> segundos_abs)
+REMOVIDAS = ("tempo_disponivel_absoluto",)
+
+# Esquema compacto (ver _compactar)
+CATEGORICAS = ("pessoa_entregadora", "pessoa_entregadora_normalizado", "praca", "sub_praca", "periodo")
+CONTAGENS = ("numero_de_corridas_ofertadas", "numero_de_corridas_aceitas",
+             "numero_de_corridas_rejeitadas", "numero_de_corridas_completadas")
 
-@st.cache_data
-def carregar_dados():
-    destino = Path("Tricolor.xlsx")
+class ErroCarregamento(RuntimeError):
+    """Não foi possível obter a planilha (nem local, nem backup, nem Drive)."""
+
+@medido()
+def carregar_base(destino: Path = DESTINO, file_id: str | None = None) -> pd.DataFrame:
+    """
+    Carrega o bundle sem depender do Streamlit (app, CLI, jobs agendados).
+    Ordem: planilha local, backup do ambiente, download do Drive.
+    """
+    destino = Path(destino)
 
     # 1) Local primeiro (evita depender do Drive quando já existe)
     if destino.exists() and destino.stat().st_size > 0:
         return _ler(destino)
 
     # 2) Backup do ambiente (se você subir junto ao app)
-    backup = Path("/mnt/data/Tricolor.xlsx")
-    if backup.exists() and backup.stat().st_size > 0:
-        st.warning("⚠️ Usando cópia local de backup (/mnt/data/Calendarios.xlsx).")
-        return _ler(backup)
+    if BACKUP.exists() and BACKUP.stat().st_size > 0:
+        logger.warning("Usando cópia local de backup (%s).", BACKUP)
+        return _ler(BACKUP)
 
     # 3) Drive (robusto)
-    file_id = st.secrets.get("CALENDARIO_FILE_ID", "1t5t1oZYJdMSmZJDUpkFtOPtn5MVN9chN")  # seu atual
-    if not _baixar_drive(file_id, destino):
-        st.error("❌ Falha ao baixar do Google Drive. Verifique ID e compartilhamento (Qualquer pessoa com o link → Leitor).")
-        st.stop()
+    if not baixar_drive(file_id or FILE_ID_PADRAO, destino):
+        raise ErroCarregamento("Falha ao baixar do Google Drive. Verifique ID e compartilhamento "
+                               "(Qualquer pessoa com o link → Leitor).")
 
     return _ler(destino)
 
-def _baixar_drive(file_id: str, out: Path) -> bool:
-    try:
-        # preferir ID (evita cair em /share)
-        gdown.download(id=file_id, output=str(out), quiet=False)
-        if out.exists() and out.stat().st_size > 0:
-            return True
-
-        # fallback com export=download + fuzzy
-        url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        gdown.download(url=url, output=str(out), quiet=False, fuzzy=True)
-        return out.exists() and out.stat().st_size > 0
-    except Exception as e:
-        st.warning(f"Download falhou: {e}")
-        return False
+def baixar_planilha(destino: Path = DESTINO, file_id: str | None = None) -> bool:
+    """
+    Atualiza a planilha (botão "🔄 Atualizar dados" / job noturno); sem mudança no Drive, não baixa
+    nem toca no arquivo. Na próxima leitura, _ler incorpora apenas os dias novos à base já gravada.
+    """
+    return baixar_drive(file_id or FILE_ID_PADRAO, Path(destino))
 
+@medido()
 def _ler(path: Path) -> pd.DataFrame:
-    df = pd.read_excel(path, sheet_name=SHEET)
+    """Lê a aba 'bundle' usando o cache Parquet quando a planilha não mudou."""
+    chave = _chave_arquivo(path)
+    df = _ler_cache(path, chave)
+    if df is not None:
+        return df
+
+    bruto = ler_planilha(path)
+    bruto["data_do_periodo"] = pd.to_datetime(bruto["data_do_periodo"])
+    antes = memoria_por_linha_objetos(bruto)
+    # checksum do histórico que a próxima ingestão vai reaproveitar (antes de derivar_bundle alterar 'bruto')
+    historico = _resumo_historico(bruto, bruto["data_do_periodo"].max().normalize())
+    with medir("data_loader.ingerir", linhas=len(bruto)):
+        df = _ingerir_incremental(bruto, *_ler_base(path))
+    df.attrs["memoria_bytes_linha"] = {"antes": round(antes, 1), "depois": round(memoria_por_linha(df), 1)}
+    logger.info("bundle: %d linhas, %.0f -> %.0f bytes/linha", len(df),
+                df.attrs["memoria_bytes_linha"]["antes"], df.attrs["memoria_bytes_linha"]["depois"])
+    sha = hash_arquivo(path)
+    df.attrs["versao"] = _versao(sha)
+    _gravar_cache(path, df, chave, sha, historico)
+    return df
+
+def ler_planilha(path: Path, leitor: str | None = None) -> pd.DataFrame:
+    """
+    Aba 'bundle', só com as colunas usadas nos relatórios (leitor_xlsx.COLUNAS).
+    Linhas em branco ficam de fora nos dois leitores: a base não depende de qual leu a planilha.
+    """
+    if (leitor or LEITOR_XLSX) == "pandas":
+        with medir("openpyxl.read_excel", arquivo=path.name):
+            bruto = pd.read_excel(path, sheet_name=SHEET, usecols=lambda c: c in COLUNAS)
+        # mesma regra do leitor_xlsx: célula vazia ou texto vazio
+        vazias = bruto.isna() | bruto.apply(lambda c: c.astype(object).eq(""))
+        return bruto[~vazias.all(axis=1)].reset_index(drop=True)
+    return ler_bundle(path, SHEET)
+
+def _versao(sha256: str) -> str:
+    """Versão dos dados (conteúdo da planilha): chave do cache de resultados (cache_resultados)."""
+    return f"{CACHE_VERSAO}-{sha256[:16]}"
+
+def memoria_por_linha(df: pd.DataFrame) -> float:
+    """Bytes por linha contando o conteúdo das strings (memory_usage deep)."""
+    return float(df.memory_usage(deep=True).sum()) / max(len(df), 1)
+
+def memoria_por_linha_objetos(bruto: pd.DataFrame) -> float:
+    """
+    Bytes por linha do mesmo conteúdo com textos e durações em colunas object, como o pd.read_excel
+    montava (ponteiro de 8 bytes + o objeto Python de cada célula). É a referência do "antes" da compactação:
+    o leitor em streaming já entrega categóricas e segundos, e memory_usage delas não diria nada.
+    """
+    n = len(bruto)
+    total = bruto.index.memory_usage()
+    for coluna, serie in bruto.items():
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tamanhos = np.array([sys.getsizeof(c) for c in serie.cat.categories] + [sys.getsizeof(np.nan)])
+            total += 8 * n + int(tamanhos[serie.cat.codes.to_numpy()].sum())  # código -1 -> NaN
+        elif coluna == DURACAO_SAIDA:
+            total += (8 + sys.getsizeof(time())) * n  # openpyxl entrega datetime.time
+        elif pd.api.types.is_string_dtype(serie.dtype):
+            total += int(serie.astype(object).memory_usage(deep=True, index=False))
+        else:
+            total += int(serie.memory_usage(deep=True, index=False))
+    return float(total) / max(n, 1)
+
+def _ingerir_incremental(bruto: pd.DataFrame, base: pd.DataFrame | None = None,
+                         historico: dict | None = None) -> pd.DataFrame:
+    """
+    Junta à base já derivada só as linhas a partir do último dia ingerido.
+    O último dia é reprocessado inteiro (pode ter chegado pela metade no export anterior).
+    O histórico anterior ao corte só é reaproveitado se o checksum das linhas brutas ('historico',
+    gravado junto com a base) bate com o da planilha atual: linha corrigida, removida ou incluída
+    no passado, ou coluna nova, refaz tudo.
+    Quando o histórico sai idêntico ao da base anterior (chaves de entregador inclusive), attrs['incremental']
+    registra o corte e a versão daquela base: o cubo e as tabelas dela também podem ser reaproveitados
+    até o corte (atualizador.montar_versao).
+    """
+    colunas_brutas = set(bruto.columns) - set(REMOVIDAS) - set(DERIVADAS)
+    if base is None or base.empty or colunas_brutas != set(base.columns) - set(DERIVADAS):
+        return derivar_bundle(bruto)
+
+    corte = base["data_do_periodo"].max().normalize()
+    antigos = base[base["data_do_periodo"] < corte]
+    if (not historico or historico.get("corte") != corte.isoformat()
+            or historico != _resumo_historico(bruto, corte) or historico["linhas"] != len(antigos)):
+        return derivar_bundle(bruto)
+
+    # linhas sem data não entram em 'antigos': voltam sempre com as novas
+    novos = derivar_bundle(bruto[~(bruto["data_do_periodo"] < corte)].copy())
+    df = concatenar(antigos, novos[antigos.columns])
+    # grafias novas podem completar nomes truncados do histórico: unifica de novo sobre a base inteira
+    chaves = chaves_entregadores(df["pessoa_entregadora"])
+    df["pessoa_entregadora_normalizado"] = _em_ordem(chaves)
+    df.attrs = dict(novos.attrs)  # contagens de qualidade referem-se ao que foi ingerido agora
+    if np.array_equal(chaves.iloc[:len(antigos)].astype(object).to_numpy(),
+                      antigos["pessoa_entregadora_normalizado"].astype(object).to_numpy()):
+        df.attrs["incremental"] = {"corte": corte.isoformat(), "base": base.attrs.get("versao")}
+    return df
+
+def _resumo_historico(bruto: pd.DataFrame, corte) -> dict | None:
+    """
+    Checksum das linhas brutas anteriores a 'corte': soma (módulo 2^64) dos hashes de cada linha,
+    que não depende da ordem das linhas no export. None sem data de corte.
+    """
+    if pd.isna(corte):
+        return None
+    antes = bruto[bruto["data_do_periodo"] < corte]
+    hashes = pd.util.hash_pandas_object(antes[sorted(antes.columns)], index=False).to_numpy()
+    return {"corte": corte.isoformat(), "linhas": len(antes), "hash": f"{int(hashes.sum(dtype=np.uint64)):016x}"}
+
+def derivar_bundle(df: pd.DataFrame) -> pd.DataFrame:
+    """Aba 'bundle' crua (ler_planilha) -> base do app: colunas DERIVADAS, esquema compacto, ordem de data. Altera 'df'."""
     df["data_do_periodo"] = pd.to_datetime(df["data_do_periodo"])
-    df["data"] = df["data_do_periodo"].dt.date
+    df["data"] = df["data_do_periodo"].dt.normalize()
     df["mes"] = df["data_do_periodo"].dt.month
     df["ano"] = df["data_do_periodo"].dt.year
-    df["pessoa_entregadora_normalizado"] = df["pessoa_entregadora"].apply(normalizar)
+    df["mes_ano"] = df["data"].dt.to_period("M").dt.to_timestamp()  # eixo dos gráficos mensais
+    df["pessoa_entregadora_normalizado"] = chaves_entregadores(df["pessoa_entregadora"])  # nomes.py
+
+    # SH/UTR passam a ser soma de inteiros; células ilegíveis viram 0 e ficam contadas em attrs
+    if "segundos_abs" in df.columns:
+        # leitor_xlsx já converteu durante a leitura, marcando as ilegíveis
+        invalidas = df["segundos_abs"] == DURACAO_INVALIDA
+        df["segundos_abs"], invalidos = df["segundos_abs"].mask(invalidas, 0), int(invalidas.sum())
+    elif "tempo_disponivel_absoluto" in df.columns:
+        segundos, invalidos = duracoes_para_segundos(df["tempo_disponivel_absoluto"])
+        # na posição da coluna crua, como sai do leitor_xlsx: mesmo esquema nos dois leitores
+        df.insert(df.columns.get_loc("tempo_disponivel_absoluto"), "segundos_abs", segundos)
+    else:
+        df["segundos_abs"], invalidos = 0, 0
+    df.attrs["duracoes_invalidas"] = invalidos
+    df = df.drop(columns=[c for c in REMOVIDAS if c in df.columns])
+    # base em ordem de data: meses e períodos viram fatias contíguas (indices.IndiceDatas)
+    df = df.sort_values("data_do_periodo", kind="stable").reset_index(drop=True)
+    return _compactar(df)
+
+def _compactar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Esquema enxuto para o frame que fica em cache e é copiado por sessão:
+    categorias para nomes/praças/turnos (e textos repetitivos), datas em datetime64,
+    contagens em int32, segundos em int32, mes/ano em int8/int16.
+    """
+    for c in CATEGORICAS:
+        if c in df.columns:
+            df[c] = _em_ordem(df[c])
+
+    for c in CONTAGENS:
+        if c in df.columns:
+            valores = pd.to_numeric(df[c], errors="coerce")
+            inteiro = valores.dropna().mod(1).eq(0).all()
+            df[c] = valores.fillna(0).astype("int32") if inteiro else valores.astype("float32")
+
+    df["segundos_abs"] = df["segundos_abs"].astype("int32")
+    sem_data = df["data_do_periodo"].isna().any()  # NaT vira NA: só aí precisa de inteiro anulável
+    df["mes"] = df["mes"].astype("Int8" if sem_data else "int8")
+    df["ano"] = df["ano"].astype("Int16" if sem_data else "int16")
+
+    # demais colunas de texto com muita repetição (tags, status...) também viram categoria
+    for c in df.columns:
+        if c not in CATEGORICAS and (pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c])):
+            if df[c].nunique(dropna=True) <= len(df) // 2:
+                df[c] = df[c].astype("category")
     return df
+
+def _em_ordem(serie: pd.Series) -> pd.Series:
+    """
+    Categórica com as categorias em ordem alfabética (o leitor_xlsx e chaves_entregadores as criam na ordem
+    em que aparecem): o esquema sai o mesmo com os dois leitores e com a base montada de uma vez ou em partes.
+    """
+    serie = serie.astype("category")
+    return serie.cat.reorder_categories(serie.cat.categories.sort_values())
+
+# ===== Cache em disco =====
+
+def caminhos_cache(path: Path) -> tuple[Path, Path]:
+    """(parquet, metadados) do cache da planilha: Tricolor.xlsx -> Tricolor.parquet, Tricolor.cache.json."""
+    return path.with_suffix(".parquet"), path.with_suffix(".cache.json")
+
+def _chave_arquivo(path: Path) -> dict:
+    info = path.stat()
+    return {"versao": CACHE_VERSAO, "tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+@medido()
+def _ler_cache(path: Path, chave: dict) -> pd.DataFrame | None:
+    """
+    Devolve o DataFrame do cache se ele corresponde à planilha atual.
+    Tamanho + mtime iguais bastam; se só o mtime mudou (ex.: baixou de novo o mesmo arquivo),
+    confere o hash do conteúdo e, batendo, apenas atualiza a chave.
+    """
+    parquet, meta_path = caminhos_cache(path)
+    if not parquet.exists() or not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get("versao") != chave["versao"] or meta.get("tamanho") != chave["tamanho"]:
+            return None
+        if meta.get("mtime_ns") != chave["mtime_ns"]:
+            sha = hash_arquivo(path)
+            if meta.get("sha256") != sha:
+                return None
+            escrever_atomico(meta_path, json.dumps({**meta, **chave}).encode())
+        df = pd.read_parquet(parquet)
+        df.attrs.pop("incremental", None)  # vale só para a ingestão que gravou o cache
+        df.attrs["versao"] = _versao(meta["sha256"])
+        return df
+    except Exception:
+        # cache corrompido/ilegível: relê a planilha
+        return None
+
+def _ler_base(path: Path) -> tuple[pd.DataFrame | None, dict | None]:
+    """
+    Última base gravada, mesmo que a planilha tenha mudado (ponto de partida do incremental),
+    e o checksum do histórico dela.
+    """
+    parquet, meta_path = caminhos_cache(path)
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get("versao") != CACHE_VERSAO:
+            return None, None
+        base = pd.read_parquet(parquet)
+        base.attrs["versao"] = _versao(meta["sha256"])
+        return base, meta.get("historico")
+    except Exception:
+        return None, None
+
+@medido()
+def _gravar_cache(path: Path, df: pd.DataFrame, chave: dict, sha256: str, historico: dict | None = None) -> None:
+    parquet, meta_path = caminhos_cache(path)
+    try:
+        tmp = parquet.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, parquet)
+        meta = {**chave, "sha256": sha256, "linhas": len(df), "historico": historico}
+        escrever_atomico(meta_path, json.dumps(meta).encode())
+    except Exception as e:
+        # sem cache o app continua funcionando, só fica mais lento no próximo start
+        logger.warning("Não foi possível gravar o cache de dados: %s", e)
@@ -0,0 +1,216 @@
+"""
+Download condicional, retomável e atômico das planilhas (Drive ou qualquer URL HTTP).
+
+    baixar(url_drive(file_id), Path("Tricolor.xlsx"), validar=validar_xlsx)
+    baixar_drive(file_id, Path("Tricolor.xlsx"))   # o mesmo, com o gdown de reserva
+
+- Condicional: manda If-None-Match/If-Modified-Since com o ETag/Last-Modified do último download
+  (Tricolor.download.json). 304, ou os mesmos metadados e tamanho num servidor que ignora esses
+  cabeçalhos, encerra sem baixar o corpo.
+- Retomável: o corpo vai para Tricolor.xlsx.part; se a conexão cair, a próxima tentativa pede só o
+  que falta (Range + If-Range, para não emendar pedaços de versões diferentes).
+- Atômico: só depois de conferir tamanho e formato o .part substitui o destino (os.replace). Se o
+  conteúdo é idêntico ao atual (mesmo sha256), o destino nem é tocado e o mtime continua o mesmo.
+"""
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from pathlib import Path
+
+import gdown
+import requests
+
+from instrumentacao import medido, medir
+
+logger = logging.getLogger(__name__)
+
+BAIXADO, SEM_MUDANCA = "baixado", "sem_mudanca"
+BLOCO = 1 << 20
+BLOCO_REDE = 1 << 16  # o que chega vai para o .part em pedaços pequenos: um corte perde no máximo isso
+TENTATIVAS = 3
+TIMEOUT = (10, 60)  # conexão, leitura entre blocos
+
+class ErroDownload(RuntimeError):
+    """Download não concluído; o destino fica como estava."""
+
+class _Incompleto(Exception):
+    """Corpo menor que o anunciado: a próxima tentativa continua do ponto em que parou."""
+
+def url_drive(file_id: str) -> str:
+    # confirm=t pula a página de "não foi possível verificar vírus" dos arquivos grandes
+    return f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm=t"
+
+def caminhos(destino: Path) -> tuple[Path, Path]:
+    """(.part, metadados) do destino: Tricolor.xlsx -> Tricolor.xlsx.part, Tricolor.download.json."""
+    return destino.with_suffix(destino.suffix + ".part"), destino.with_suffix(".download.json")
+
+def validar_xlsx(path: Path) -> None:
+    """.xlsx é um zip com [Content_Types].xml; página HTML de erro/login do Drive não passa."""
+    try:
+        with zipfile.ZipFile(path) as z:
+            if "[Content_Types].xml" not in z.namelist():
+                raise ErroDownload(f"{path.name}: zip sem [Content_Types].xml (não é .xlsx)")
+    except zipfile.BadZipFile:
+        raise ErroDownload(f"{path.name}: não é .xlsx (página de erro ou de confirmação do Drive?)") from None
+
+@medido()
+def baixar(url: str, destino, validar=None, tentativas: int = TENTATIVAS, timeout=TIMEOUT) -> str:
+    """
+    Atualiza 'destino' a partir de 'url'; devolve BAIXADO ou SEM_MUDANCA.
+    'validar(path)' confere o arquivo completo antes da troca (levanta ErroDownload se inválido).
+    Falhas de rede são retomadas até 'tentativas' vezes; depois levanta ErroDownload.
+    """
+    destino = Path(destino)
+    ultimo = None
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return _tentar(url, destino, validar, timeout)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                _Incompleto) as e:
+            ultimo = e
+            logger.warning("Download de %s interrompido (tentativa %d/%d): %s", destino.name, tentativa, tentativas, e)
+        except requests.RequestException as e:
+            raise ErroDownload(f"{destino.name}: {e}") from e
+    raise ErroDownload(f"{destino.name}: {ultimo}")
+
+def _tentar(url: str, destino: Path, validar, timeout) -> str:
+    part, meta_path = caminhos(destino)
+    meta = ler_meta(destino)
+    tem_destino = destino.exists() and destino.stat().st_size > 0
+    parcial = meta.get("parcial") or {}
+
+    cabecalhos = {"Accept-Encoding": "identity"}  # bytes do arquivo como estão: Range e tamanho batem
+    if tem_destino and meta.get("etag"):
+        cabecalhos["If-None-Match"] = meta["etag"]
+    if tem_destino and meta.get("last_modified"):
+        cabecalhos["If-Modified-Since"] = meta["last_modified"]
+    inicio = part.stat().st_size if part.exists() else 0
+    validador = parcial.get("etag") or parcial.get("last_modified")
+    if inicio and validador and parcial.get("url") == url:
+        cabecalhos["Range"] = f"bytes={inicio}-"
+        cabecalhos["If-Range"] = validador  # mudou no servidor: vem 200 com o arquivo inteiro
+    else:
+        inicio = 0
+
+    with requests.get(url, headers=cabecalhos, stream=True, timeout=timeout) as r:
+        if r.status_code == 304:
+            logger.info("%s sem mudanças no servidor (304).", destino.name)
+            return SEM_MUDANCA
+        if r.status_code == 416:  # .part já tem tudo (ou é de outro arquivo): recomeça do zero
+            part.unlink(missing_ok=True)
+            raise _Incompleto("Range fora do arquivo")
+        r.raise_for_status()
+
+        remoto = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+        retomando = r.status_code == 206
+        total = _tamanho_total(r, inicio if retomando else 0)
+        if (tem_destino and any(remoto.values()) and total is not None
+                and all(meta.get(k) == v for k, v in remoto.items())
+                and meta.get("tamanho") == total == destino.stat().st_size):
+            logger.info("%s sem mudanças no servidor (mesmo ETag/Last-Modified e tamanho).", destino.name)
+            return SEM_MUDANCA
+
+        escrever_atomico(meta_path, json.dumps({**meta, "parcial": {**remoto, "url": url}}).encode())
+        with medir("download.corpo", arquivo=destino.name, retomado_de=inicio if retomando else 0), \
+                open(part, "ab" if retomando else "wb") as f:
+            for bloco in r.iter_content(BLOCO_REDE):
+                f.write(bloco)
+
+    tamanho = part.stat().st_size
+    if total is not None and tamanho < total:
+        raise _Incompleto(f"{tamanho} de {total} bytes")
+    if total is not None and tamanho > total:
+        part.unlink()
+        raise ErroDownload(f"{destino.name}: {tamanho} bytes, esperado {total}")
+    try:
+        if validar:
+            validar(part)
+    except ErroDownload:
+        part.unlink()
+        escrever_atomico(meta_path, json.dumps({k: v for k, v in meta.items() if k != "parcial"}).encode())
+        raise
+
+    sha = hash_arquivo(part)
+    novo = {**remoto, "tamanho": tamanho, "sha256": sha}
+    if tem_destino and meta.get("sha256") == sha and destino.stat().st_size == tamanho:
+        part.unlink()
+        escrever_atomico(meta_path, json.dumps(novo).encode())
+        logger.info("%s baixado de novo, mas com o mesmo conteúdo; mantido o local.", destino.name)
+        return SEM_MUDANCA
+    os.replace(part, destino)
+    escrever_atomico(meta_path, json.dumps(novo).encode())
+    return BAIXADO
+
+def _tamanho_total(r: requests.Response, inicio: int) -> int | None:
+    """Tamanho do arquivo inteiro: Content-Range (206) ou início + Content-Length; None se desconhecido."""
+    faixa = r.headers.get("Content-Range", "")
+    if "/" in faixa and not faixa.endswith("*"):
+        return int(faixa.rsplit("/", 1)[1])
+    comprimento = r.headers.get("Content-Length")
+    # com Content-Encoding o Content-Length é do corpo comprimido, não do arquivo
+    if comprimento is None or r.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    return inicio + int(comprimento)
+
+@medido()
+def baixar_drive(file_id: str, out: Path) -> bool:
+    """
+    Atualiza 'out' com o .xlsx do Drive; False se não deu (o local fica como estava).
+    Direto (baixar): condicional, retomável e com troca atômica, sem baixar nada se não mudou.
+    Se o Drive não entregar o .xlsx (página de confirmação/login), tenta o gdown, também via
+    arquivo temporário. 'out' nunca fica pela metade.
+    """
+    out = Path(out)
+    try:
+        baixar(url_drive(file_id), out, validar=validar_xlsx)
+        return True
+    except ErroDownload as e:
+        logger.warning("Download direto falhou (%s); tentando gdown.", e)
+    return _baixar_gdown(file_id, out)
+
+def _baixar_gdown(file_id: str, out: Path) -> bool:
+    tmp = out.with_suffix(".gdown" + out.suffix)
+    try:
+        # preferir ID (evita cair em /share)
+        gdown.download(id=file_id, output=str(tmp), quiet=False)
+        if not (tmp.exists() and tmp.stat().st_size > 0):
+            # fallback com export=download + fuzzy
+            url = f"https://drive.google.com/uc?export=download&id={file_id}"
+            gdown.download(url=url, output=str(tmp), quiet=False, fuzzy=True)
+        validar_xlsx(tmp)
+        if out.exists() and hash_arquivo(tmp) == hash_arquivo(out):
+            tmp.unlink()  # mesmo conteúdo: mantém o local (e o mtime, que chaveia os caches)
+        else:
+            os.replace(tmp, out)
+        registrar(out)
+        return True
+    except Exception as e:
+        logger.warning("Download falhou: %s", e)
+        tmp.unlink(missing_ok=True)
+        return False
+
+def ler_meta(destino: Path) -> dict:
+    try:
+        return json.loads(caminhos(Path(destino))[1].read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def registrar(destino: Path) -> None:
+    """Grava os metadados de um arquivo obtido por fora (gdown): o próximo download compara o sha256."""
+    destino = Path(destino)
+    escrever_atomico(caminhos(destino)[1],
+                     json.dumps({"tamanho": destino.stat().st_size, "sha256": hash_arquivo(destino)}).encode())
+
+def hash_arquivo(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def escrever_atomico(path: Path, conteudo: bytes) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(conteudo)
+    os.replace(tmp, path)
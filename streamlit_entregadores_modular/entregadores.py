@@ -0,0 +1,174 @@
+"""
+Linha de comando dos relatórios, sem subir o Streamlit (cron, workers, precomputação noturna).
+
+    python -m entregadores report --nome "Fulano" --mes 7 --ano 2025
+    python -m entregadores categorias --mes 7 --ano 2025 --out categorias.csv
+    python -m entregadores utr --mes 7 --ano 2025 --out utr.parquet
+    python -m entregadores alertas --janela 30 --minimo 4
+    python -m entregadores lote --mes 7 --ano 2025 --out lote.zip
+    python -m entregadores promocoes --promocoes Promocoes.xlsx --out pagamentos.csv
+    python -m entregadores precomputar --dir resultados
+
+Os dados vêm de data_loader.carregar_base (mesmo cache Parquet do app).
+Saídas .parquet viram Parquet; o resto é CSV (sem --out, CSV na saída padrão).
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import date
+from pathlib import Path
+import pandas as pd
+
+from agregados import construir_cubo
+from indices import IndiceDatas
+from data_loader import carregar_base, baixar_planilha, DESTINO
+import instrumentacao
+from lote import gerar_lote, EXPORTADORES
+from promocoes import avaliar_promocoes
+from promocoes_loader import carregar_promocoes, estruturar_promocoes
+from relatorios import (
+    gerar_dados,
+    gerar_simplicado,
+    classificar_entregadores,
+    classificar_por_mes,
+    utr_por_entregador_turno,
+    detectar_ausencias,
+)
+
+def _gravar(df: pd.DataFrame, out: str | None) -> None:
+    if not out:
+        df.to_csv(sys.stdout, index=False)
+        return
+    destino = Path(out)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.suffix == ".parquet":
+        df.to_parquet(destino, index=False)
+    else:
+        df.to_csv(destino, index=False)
+    print(f"{len(df)} linhas -> {destino}", file=sys.stderr)
+
+def _cubo(args) -> IndiceDatas:
+    planilha = Path(args.planilha)
+    if args.atualizar and not baixar_planilha(planilha):
+        raise SystemExit("Falha ao baixar a planilha do Drive.")
+    return IndiceDatas(construir_cubo(carregar_base(planilha)))  # meses/períodos viram fatias
+
+def cmd_report(args, cubo):
+    if args.simplificado:
+        texto = gerar_simplicado(args.nome, args.mes, args.ano, cubo)
+    else:
+        texto = gerar_dados(args.nome, args.mes, args.ano, cubo)
+    if texto is None:
+        raise SystemExit("Nenhum dado encontrado.")
+    if args.out:
+        Path(args.out).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+def cmd_categorias(args, cubo):
+    if args.por_mes:
+        _gravar(classificar_por_mes(cubo), args.out)
+    else:
+        _gravar(classificar_entregadores(cubo, args.mes, args.ano), args.out)
+
+def cmd_utr(args, cubo):
+    _gravar(utr_por_entregador_turno(cubo, args.mes, args.ano), args.out)
+
+def cmd_alertas(args, cubo):
+    ausencias = detectar_ausencias(cubo, janela=args.janela, dias_ativo=args.dias_ativo)
+    _gravar(ausencias[ausencias["sequencia_atual"] >= args.minimo], args.out)
+
+def cmd_lote(args, cubo):
+    meses = [(args.mes, args.ano)]
+    if args.mes2 and args.ano2:
+        meses.append((args.mes2, args.ano2))
+    lote = gerar_lote(cubo, meses)
+    formato = args.formato or (Path(args.out).suffix.lstrip(".") if args.out else "zip")
+    if formato not in EXPORTADORES:
+        raise SystemExit(f"Formato desconhecido: {formato} (use {', '.join(EXPORTADORES)})")
+    out = Path(args.out or f"relatorios_{args.ano}_{args.mes:02d}.{formato}")
+    out.write_bytes(EXPORTADORES[formato](lote))
+    print(f"{lote['pessoa_entregadora_normalizado'].nunique()} entregadores, {len(lote)} relatórios -> {out}",
+          file=sys.stderr)
+
+def cmd_promocoes(args, cubo):
+    promos = estruturar_promocoes(*carregar_promocoes(args.promocoes, atualizar=args.atualizar))
+    resultado = avaliar_promocoes(cubo, promos, ativas_em=args.vigentes_em)
+    _gravar(resultado[resultado["elegivel"]] if args.so_elegiveis else resultado, args.out)
+
+def cmd_precomputar(args, cubo):
+    """Resultados completos para o job noturno: categorias por mês, UTR diário e ausências."""
+    pasta = Path(args.dir)
+    _gravar(classificar_por_mes(cubo), str(pasta / "categorias_por_mes.parquet"))
+    _gravar(utr_por_entregador_turno(cubo), str(pasta / "utr_diario.parquet"))
+    _gravar(detectar_ausencias(cubo), str(pasta / "ausencias.parquet"))
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="entregadores", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--planilha", default=str(DESTINO), help="caminho do Tricolor.xlsx (padrão: %(default)s)")
+    parser.add_argument("--atualizar", action="store_true", help="baixa a planilha do Drive antes de ler")
+    parser.add_argument("--spans", metavar="ARQUIVO",
+                        help="grava os spans de tempo em JSON Lines ('-' = stderr); padrão: INSTRUMENTACAO/INSTRUMENTACAO_LOG")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def mes_ano(p, obrigatorio=False):
+        p.add_argument("--mes", type=int, required=obrigatorio)
+        p.add_argument("--ano", type=int, required=obrigatorio)
+
+    p = sub.add_parser("report", help="relatório de um entregador (Ver geral / Simplificada)")
+    p.add_argument("--nome", required=True)
+    mes_ano(p)
+    p.add_argument("--simplificado", action="store_true", help="formato WhatsApp (exige --mes/--ano)")
+    p.add_argument("--out")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("categorias", help="classificação Premium/Conectado/Casual/Flutuante")
+    mes_ano(p)
+    p.add_argument("--por-mes", action="store_true", help="todos os meses (entregador × mês)")
+    p.add_argument("--out")
+    p.set_defaults(func=cmd_categorias)
+
+    p = sub.add_parser("utr", help="UTR diário por entregador e turno")
+    mes_ano(p)
+    p.add_argument("--out")
+    p.set_defaults(func=cmd_utr)
+
+    p = sub.add_parser("alertas", help="sequências de faltas dos entregadores ativos")
+    p.add_argument("--janela", type=int, default=30)
+    p.add_argument("--dias-ativo", type=int, default=15)
+    p.add_argument("--minimo", type=int, default=4)
+    p.add_argument("--out")
+    p.set_defaults(func=cmd_alertas)
+
+    p = sub.add_parser("lote", help="simplificado + completo de todos os entregadores")
+    mes_ano(p, obrigatorio=True)
+    p.add_argument("--mes2", type=int)
+    p.add_argument("--ano2", type=int)
+    p.add_argument("--formato", choices=sorted(EXPORTADORES))
+    p.add_argument("--out")
+    p.set_defaults(func=cmd_lote)
+
+    p = sub.add_parser("promocoes", help="elegibilidade e valor de cada entregador nas promoções")
+    p.add_argument("--promocoes", help="caminho do Promocoes.xlsx (padrão: cópia local/Drive)")
+    p.add_argument("--vigentes-em", type=date.fromisoformat, help="só promoções vigentes na data (AAAA-MM-DD)")
+    p.add_argument("--so-elegiveis", action="store_true")
+    p.add_argument("--out")
+    p.set_defaults(func=cmd_promocoes)
+
+    p = sub.add_parser("precomputar", help="grava categorias, UTR e ausências em Parquet")
+    p.add_argument("--dir", default="resultados")
+    p.set_defaults(func=cmd_precomputar)
+    return parser
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    args = _parser().parse_args(argv)
+    # na linha de comando os spans só saem se pedidos (--spans ou INSTRUMENTACAO no ambiente)
+    instrumentacao.configurar("1" if args.spans else os.environ.get("INSTRUMENTACAO", "0"), args.spans)
+    if args.comando == "report" and args.simplificado and not (args.mes and args.ano):
+        raise SystemExit("--simplificado exige --mes e --ano")
+    args.func(args, _cubo(args))
+
+if __name__ == "__main__":
+    main()
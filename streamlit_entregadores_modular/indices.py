@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from nomes import ResolvedorNomes
+
+class IndiceNomes:
+    """
+    Permutação que ordena o cubo por (nome normalizado, data), com o trecho [i, f) de cada entregador.
+    Montado uma vez por versão dos dados; buscar um entregador custa O(linhas dele), não O(base).
+    O cubo não é copiado: o índice guarda só a permutação (int64 por linha) e os offsets.
+    """
+
+    def __init__(self, cubo: pd.DataFrame):
+        self.cubo = cubo
+        self.nomes = ResolvedorNomes(cubo)
+        nomes = cubo["pessoa_entregadora_normalizado"].astype(object).fillna("").to_numpy(dtype=object)
+        if len(nomes) == 0:
+            self._ordem, self._fatias = np.array([], dtype=np.int64), {}
+            return
+        codigos, chaves = pd.factorize(nomes, sort=True)
+        # data ausente vai para o fim da fatia, como no sort_values
+        datas = pd.to_datetime(cubo["data"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+        datas = np.where(datas == np.iinfo(np.int64).min, np.iinfo(np.int64).max, datas)
+        self._ordem = np.lexsort((datas, codigos))
+        inicios = np.searchsorted(codigos[self._ordem], np.arange(len(chaves)), side="left")
+        fins = np.r_[inicios[1:], len(nomes)]
+        self._fatias = {chave: (int(i), int(f)) for chave, i, f in zip(chaves, inicios, fins)}
+
+    def __contains__(self, nome) -> bool:
+        return self.nomes.chave(nome) in self._fatias
+
+    def linhas(self, nome) -> pd.DataFrame:
+        """Linhas do cubo do entregador (pela chave: variantes de grafia unificadas), em ordem de data."""
+        i, f = self._fatias.get(self.nomes.chave(nome), (0, 0))
+        return self.cubo.iloc[self._ordem[i:f]]
+
+    def linhas_exatas(self, nome) -> pd.DataFrame:
+        """Como linhas(), mas só as grafias idênticas a 'nome' (equivale a df['pessoa_entregadora'] == nome)."""
+        dados = self.linhas(nome)
+        return dados[dados["pessoa_entregadora"] == nome]
+
+class IndiceDatas:
+    """
+    Cubo ordenado por data, com os códigos categóricos de nome/praça/subpraça/turno.
+    Período e mês viram fatias (iloc, sem cópia): intervalo por busca binária, mês pelos offsets
+    pré-calculados. Dias avulsos usam um bitmap por ordinal do dia; os demais filtros são máscaras
+    sobre arrays de inteiros só dentro da fatia.
+    """
+
+    DIMENSOES = ("pessoa_entregadora", "pessoa_entregadora_normalizado", "praca", "sub_praca", "periodo")
+
+    def __init__(self, cubo: pd.DataFrame):
+        # a base do data_loader (e o cubo dela) já vem em ordem de data: aí não há reordenação nem cópia
+        if cubo["data"].is_monotonic_increasing:
+            self.cubo = cubo
+        else:
+            self.cubo = cubo.sort_values("data", kind="stable").reset_index(drop=True)
+        dias = pd.to_datetime(self.cubo["data"]).to_numpy(dtype="datetime64[D]")
+        self._fim_validos = int(np.searchsorted(dias, np.datetime64("NaT"), side="left"))  # NaT no fim
+        self._dias = dias[:self._fim_validos]
+        self._dia0 = self._dias[0] if len(self._dias) else np.datetime64("1970-01-01")
+        self._ordinais = (self._dias - self._dia0).astype(np.int64)
+
+        # offsets de mês: (ano, mes) -> [i, f)
+        meses = self._dias.astype("datetime64[M]")
+        inicios = np.flatnonzero(np.r_[True, meses[1:] != meses[:-1]]) if len(meses) else np.array([], int)
+        fins = np.r_[inicios[1:], len(meses)]
+        self._meses = {(int(str(m)[:4]), int(str(m)[5:7])): (int(i), int(f))
+                       for m, i, f in zip(meses[inicios], inicios, fins)}
+
+        self.nomes = ResolvedorNomes(self.cubo)
+        self._codigos, self._categorias = {}, {}
+        for c in self.DIMENSOES:
+            if c in self.cubo.columns:
+                cat = self.cubo[c].astype("category")
+                self._codigos[c] = cat.cat.codes.to_numpy()
+                self._categorias[c] = cat.cat.categories
+
+    @property
+    def empty(self) -> bool:
+        return self.cubo.empty
+
+    def meses(self) -> list[tuple[int, int]]:
+        """(ano, mes) presentes, em ordem."""
+        return list(self._meses)
+
+    def fatia(self, inicio=None, fim=None) -> tuple[int, int]:
+        """Posições [i, f) das linhas com inicio <= data <= fim (datas ausentes ficam de fora)."""
+        i = 0 if inicio is None else int(np.searchsorted(self._dias, np.datetime64(pd.Timestamp(inicio), "D"), "left"))
+        f = self._fim_validos if fim is None else int(np.searchsorted(self._dias, np.datetime64(pd.Timestamp(fim), "D"), "right"))
+        return i, max(i, f)
+
+    def fatia_mes(self, mes: int, ano: int) -> tuple[int, int]:
+        return self._meses.get((int(ano), int(mes)), (0, 0))
+
+    def mes(self, mes: int, ano: int) -> pd.DataFrame:
+        i, f = self.fatia_mes(mes, ano)
+        return self.cubo.iloc[i:f]
+
+    def selecionar(self, nome=None, entregador=None, praca=None, sub_praca=None, periodo=None,
+                   data_inicio=None, data_fim=None, dias=None, mes=None, ano=None) -> pd.DataFrame:
+        """
+        Linhas do cubo que atendem a todos os filtros informados.
+        nome casa pela chave do entregador (variantes unificadas); entregador, pela grafia exata.
+        praca/sub_praca/periodo aceitam um valor ou uma lista. 'dias' (datas avulsas) tem precedência
+        sobre data_inicio/data_fim; mes/ano restringem ao mês.
+        """
+        if dias is not None and len(dias) == 0:
+            return self.cubo.iloc[0:0]
+        if dias is not None:
+            dias = np.unique(np.array([np.datetime64(pd.Timestamp(d), "D") for d in dias]))
+            data_inicio, data_fim = dias[0], dias[-1]
+        i, f = self.fatia(data_inicio, data_fim)
+        if mes is not None and ano is not None:
+            im, fm = self.fatia_mes(mes, ano)
+            i, f = max(i, im), max(max(i, im), min(f, fm))
+
+        mascara = None
+        filtros = {"pessoa_entregadora_normalizado": None if nome is None else self.nomes.chave(nome),
+                   "pessoa_entregadora": entregador, "praca": praca, "sub_praca": sub_praca, "periodo": periodo}
+        for coluna, valores in filtros.items():
+            if valores is None or (isinstance(valores, (list, tuple, set)) and not valores):
+                continue
+            if coluna not in self._codigos:
+                return self.cubo.iloc[0:0]
+            valores = list(valores) if isinstance(valores, (list, tuple, set)) else [valores]
+            alvo = self._categorias[coluna].get_indexer(valores)
+            m = np.isin(self._codigos[coluna][i:f], alvo[alvo >= 0])
+            mascara = m if mascara is None else mascara & m
+        if dias is not None and len(dias) > 1 and f > i:
+            # bitmap dos dias pedidos, indexado pelo ordinal do dia de cada linha da fatia
+            ordinais = self._ordinais[i:f]
+            bitmap = np.zeros(int(ordinais[-1]) + 1, dtype=bool)
+            pedidos = (dias - self._dia0).astype(np.int64)
+            bitmap[pedidos[(pedidos >= 0) & (pedidos < len(bitmap))]] = True
+            m = bitmap[ordinais]
+            mascara = m if mascara is None else mascara & m
+
+        linhas = self.cubo.iloc[i:f]
+        return linhas if mascara is None else linhas[mascara]
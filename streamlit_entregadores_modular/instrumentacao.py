@@ -0,0 +1,128 @@
+"""
+Spans de tempo (e, opcionalmente, pico de memória) nos caminhos quentes: carga, relatórios, modos do app.
+
+    with medir("plotly", modo=modo): ...
+    @medido()
+    def classificar_entregadores(...): ...
+
+Cada span vira uma linha JSON no logger 'instrumentacao' e entra no coletor da execução atual
+(o app guarda os últimos N por sessão). Importar o módulo não liga nada: até alguém chamar
+configurar() (o app e a CLI chamam), fica desligado e sem handler de log. Nível por INSTRUMENTACAO
+(variável de ambiente ou secrets):
+  "0" desligado (o decorador chama a função direto, medir() devolve um nullcontext)
+  "1" só tempo (padrão de configurar())
+  "memoria" tempo + pico de memória via tracemalloc (deixa tudo mais lento; para diagnóstico)
+Com tracemalloc o pico é do processo: sessões simultâneas entram na conta umas das outras.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger("instrumentacao")
+
+DESLIGADO, TEMPO, MEMORIA = 0, 1, 2
+_NIVEIS = {"0": DESLIGADO, "": DESLIGADO, "1": TEMPO, "memoria": MEMORIA}
+_nivel = DESLIGADO  # até configurar()
+_NULO = contextlib.nullcontext()
+
+# por execução (thread do Streamlit / processo da CLI): destino dos spans e pilha dos abertos
+_coletor = contextvars.ContextVar("coletor_spans", default=None)
+_pilha = contextvars.ContextVar("pilha_spans", default=())
+
+def configurar(nivel=None, arquivo=None) -> None:
+    """
+    Nível ("0", "1", "memoria"; padrão INSTRUMENTACAO) e destino das linhas JSON
+    ('arquivo' ou INSTRUMENTACAO_LOG; "-" ou vazio = stderr).
+    """
+    global _nivel
+    nivel = os.environ.get("INSTRUMENTACAO", "1") if nivel is None else str(nivel)
+    _nivel = _NIVEIS.get(nivel.strip().lower(), TEMPO)
+    if _nivel == MEMORIA and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif _nivel != MEMORIA and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    arquivo = arquivo or os.environ.get("INSTRUMENTACAO_LOG", "-")
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+        h.close()
+    if _nivel != DESLIGADO:
+        handler = logging.StreamHandler() if arquivo == "-" else logging.FileHandler(arquivo, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False  # as linhas JSON não se misturam ao formato do log do app
+
+def ativo() -> bool:
+    return _nivel != DESLIGADO
+
+def coletar(destino) -> None:
+    """Spans desta execução também vão para 'destino' (lista/deque; o app passa um deque da sessão)."""
+    _coletor.set(destino)
+
+def medir(nome: str, **atributos):
+    """Context manager do span 'nome'; atributos (modo, mes, linhas...) vão junto no registro."""
+    if _nivel == DESLIGADO:
+        return _NULO
+    return _span(nome, atributos)
+
+def medido(nome: str | None = None):
+    """Decorador: um span por chamada, com o nome 'modulo.funcao' se 'nome' não for dado."""
+    def decorar(func):
+        rotulo = nome or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def envolvida(*args, **kwargs):
+            if _nivel == DESLIGADO:
+                return func(*args, **kwargs)
+            with _span(rotulo, {}):
+                return func(*args, **kwargs)
+        return envolvida
+    return decorar
+
+@contextlib.contextmanager
+def _span(nome: str, atributos: dict):
+    memoria = _nivel == MEMORIA and tracemalloc.is_tracing()
+    pilha = _pilha.get()
+    quadro = {"base": 0, "pico": 0}
+    if memoria:
+        atual, pico = tracemalloc.get_traced_memory()
+        if pilha:
+            pilha[-1]["pico"] = max(pilha[-1]["pico"], pico)  # o reset abaixo apagaria o pico do pai
+        tracemalloc.reset_peak()
+        quadro["base"] = atual
+    token = _pilha.set(pilha + (quadro,))
+    registro = {"span": nome, "inicio": datetime.now().isoformat(timespec="milliseconds"),
+                "nivel": len(pilha), **atributos}
+    t0 = time.perf_counter()
+    try:
+        yield registro
+    except Exception as e:
+        registro["erro"] = type(e).__name__
+        raise
+    except BaseException:
+        registro["interrompido"] = True  # st.stop()/st.rerun(): fim normal do script, não erro
+        raise
+    finally:
+        registro["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        _pilha.reset(token)
+        if memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            pico = max(pico, quadro["pico"])
+            registro["pico_mb"] = round(max(pico - quadro["base"], 0) / 2**20, 2)
+            if pilha:
+                pilha[-1]["pico"] = max(pilha[-1]["pico"], pico)
+        _emitir(registro)
+
+def _emitir(registro: dict) -> None:
+    destino = _coletor.get()
+    if destino is not None:
+        destino.append(registro)
+    if logger.handlers:
+        logger.info(json.dumps(registro, ensure_ascii=False, default=str))
@@ -0,0 +1,207 @@
+"""
+Leitura da aba 'bundle' em streaming, direto para colunas tipadas pré-alocadas.
+
+pd.read_excel monta o frame inteiro em objetos Python antes de converter os tipos (o pico de memória
+é o dobro do frame final). Aqui cada linha da planilha vai, célula a célula, para arrays numpy:
+datas em datetime64, números em float64, textos em códigos int32 de uma categórica montada durante
+a leitura e tempo_disponivel_absoluto já em segundos. Só as COLUNAS usadas pelos relatórios são lidas.
+
+Motor: python-calamine (Rust; opcional, `pip install python-calamine`) se instalado, senão openpyxl
+em modo read_only. Os dois entregam uma linha por vez, sem carregar a aba toda.
+"""
+import logging
+import time as _relogio
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from instrumentacao import medir
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
+
+# coluna -> tipo no streaming; as demais colunas da aba são ignoradas
+COLUNAS = {
+    "data_do_periodo": "data",
+    "periodo": "texto",
+    "pessoa_entregadora": "texto",
+    "praca": "texto",
+    "sub_praca": "texto",
+    "tempo_disponivel_escalado": "numero",
+    "tempo_disponivel_absoluto": "duracao",
+    "numero_de_corridas_ofertadas": "numero",
+    "numero_de_corridas_aceitas": "numero",
+    "numero_de_corridas_rejeitadas": "numero",
+    "numero_de_corridas_completadas": "numero",
+}
+# tempo_disponivel_absoluto sai daqui como segundos_abs; DURACAO_INVALIDA marca célula preenchida e ilegível
+DURACAO_SAIDA = "segundos_abs"
+DURACAO_INVALIDA = int(np.iinfo(np.int32).min)
+
+_EPOCA = datetime(1970, 1, 1)
+_MICRO = timedelta(microseconds=1)
+_NAT = np.iinfo(np.int64).min
+_CAPACIDADE_INICIAL = 1 << 14
+
+def motor_padrao() -> str:
+    return "calamine" if CalamineWorkbook is not None else "openpyxl"
+
+def ler_bundle(path, aba: str = "bundle", motor: str | None = None) -> pd.DataFrame:
+    """
+    Aba 'aba' com as COLUNAS presentes, tipadas. attrs["leitura"] traz motor, linhas, segundos e linhas/s.
+    Datas ilegíveis viram NaT; números ilegíveis, NaN; durações ilegíveis, DURACAO_INVALIDA.
+    """
+    motor = motor or motor_padrao()
+    with medir("leitor_xlsx.ler_bundle", motor=motor, arquivo=getattr(path, "name", str(path))) as span:
+        t0 = _relogio.perf_counter()
+        fechar, linhas = _abrir(path, aba, motor)
+        try:
+            df = _ler_linhas(linhas)
+        finally:
+            fechar()
+        segundos = _relogio.perf_counter() - t0
+        leitura = {"motor": motor, "linhas": len(df), "s": round(segundos, 3),
+                   "linhas_por_s": round(len(df) / segundos) if segundos > 0 else None}
+        if span is not None:
+            span.update(linhas=len(df), linhas_por_s=leitura["linhas_por_s"])
+    df.attrs["leitura"] = leitura
+    logger.info("%s/%s (%s): %d linhas em %.2f s (%s linhas/s)", getattr(path, "name", path), aba,
+                motor, len(df), segundos, leitura["linhas_por_s"])
+    return df
+
+def _abrir(path, aba: str, motor: str):
+    """(fechar, iterador de linhas como tuplas de valores, cabeçalho primeiro)."""
+    if motor == "calamine":
+        if CalamineWorkbook is None:
+            raise ImportError("motor 'calamine' pede o pacote python-calamine")
+        wb = CalamineWorkbook.from_path(str(path))
+        return wb.close, wb.get_sheet_by_name(aba).iter_rows()
+    wb = load_workbook(path, read_only=True, data_only=True)
+    return wb.close, wb[aba].iter_rows(values_only=True)
+
+def _ler_linhas(linhas) -> pd.DataFrame:
+    cabecalho = next(linhas, None) or ()
+    posicoes = {nome: i for i, nome in enumerate(cabecalho) if nome in COLUNAS}
+    colunas = [_Coluna(nome, COLUNAS[nome], pos) for nome, pos in posicoes.items()]
+    maior_posicao = max(posicoes.values(), default=-1)
+
+    capacidade, n = _CAPACIDADE_INICIAL, 0
+    for c in colunas:
+        c.alocar(capacidade)
+    for linha in linhas:
+        if len(linha) <= maior_posicao:
+            linha = tuple(linha) + (None,) * (maior_posicao + 1 - len(linha))
+        valores = [linha[c.posicao] for c in colunas]
+        if all(v is None or v == "" for v in valores):
+            continue  # linha em branco (fim formatado da aba, separadores)
+        if n == capacidade:
+            capacidade *= 2
+            for c in colunas:
+                c.crescer(capacidade)
+        for c, v in zip(colunas, valores):
+            c.gravar(n, v)
+        n += 1
+
+    df = pd.DataFrame({c.saida: c.serie(n) for c in colunas})
+    return df[[c.saida for c in sorted(colunas, key=lambda c: c.posicao)]]
+
+class _Coluna:
+    """Buffer tipado de uma coluna: array pré-alocado que dobra quando enche."""
+
+    def __init__(self, nome: str, tipo: str, posicao: int):
+        self.nome, self.tipo, self.posicao = nome, tipo, posicao
+        self.saida = DURACAO_SAIDA if tipo == "duracao" else nome
+        self.categorias = {}     # texto -> código, na ordem em que aparecem
+        self.irregulares = []    # (linha, valor) de datas em texto/número, convertidas no fim
+
+    def alocar(self, capacidade: int) -> None:
+        dtype = {"data": np.int64, "numero": np.float64, "texto": np.int32, "duracao": np.int32}[self.tipo]
+        self.buffer = np.empty(capacidade, dtype=dtype)
+
+    def crescer(self, capacidade: int) -> None:
+        novo = np.empty(capacidade, dtype=self.buffer.dtype)
+        novo[:len(self.buffer)] = self.buffer
+        self.buffer = novo
+
+    def gravar(self, i: int, v) -> None:
+        if v == "":
+            v = None  # calamine entrega célula vazia como ""
+        if self.tipo == "texto":
+            if v is None:
+                self.buffer[i] = -1
+            else:
+                codigo = self.categorias.get(v)
+                if codigo is None:
+                    codigo = self.categorias[v] = len(self.categorias)
+                self.buffer[i] = codigo
+        elif self.tipo == "numero":
+            self.buffer[i] = _numero(v)
+        elif self.tipo == "data":
+            if isinstance(v, datetime):
+                self.buffer[i] = (v - _EPOCA) // _MICRO
+            elif isinstance(v, date):
+                self.buffer[i] = (datetime.combine(v, time()) - _EPOCA) // _MICRO
+            else:
+                self.buffer[i] = _NAT
+                if v is not None:
+                    self.irregulares.append((i, v))
+        else:
+            self.buffer[i] = _segundos(v)
+
+    def serie(self, n: int):
+        valores = self.buffer[:n]
+        if self.tipo == "texto":
+            return pd.Categorical.from_codes(valores, categories=pd.Index(list(self.categorias)))
+        if self.tipo == "data":
+            datas = valores.view("datetime64[us]").copy()
+            if self.irregulares:
+                posicoes, brutos = zip(*self.irregulares)
+                convertidas = pd.to_datetime(pd.Series(brutos, dtype=object).astype(str), errors="coerce")
+                datas[list(posicoes)] = convertidas.to_numpy(dtype="datetime64[us]")
+            return datas
+        return valores.copy()
+
+def _numero(v) -> float:
+    if v is None or isinstance(v, (datetime, date, time, timedelta)):
+        return np.nan
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _segundos(v) -> int:
+    """
+    Mesmas regras de utils.duracoes_para_segundos, por célula: vazio (ausente ou só espaços) 0,
+    ilegível DURACAO_INVALIDA.
+    """
+    if v is None or (isinstance(v, float) and v != v):
+        return 0
+    if isinstance(v, time):
+        return v.hour * 3600 + v.minute * 60 + v.second + round(v.microsecond / 1e6)
+    if isinstance(v, timedelta):
+        return round(v.total_seconds())
+    if isinstance(v, (datetime, date)):
+        return DURACAO_INVALIDA
+    if isinstance(v, (int, float)):
+        return round(v)  # números já vêm em segundos
+    texto = str(v).strip()
+    if not texto:
+        return 0
+    partes = texto.split(":")
+    if len(partes) == 3:
+        try:
+            return round(int(partes[0]) * 3600 + int(partes[1]) * 60 + float(partes[2]))
+        except ValueError:
+            pass
+    try:
+        return round(float(texto))
+    except ValueError:
+        pass
+    segundos = pd.to_timedelta(texto, errors="coerce")
+    return DURACAO_INVALIDA if pd.isna(segundos) else round(segundos.total_seconds())
@@ -0,0 +1,109 @@
+"""
+Relatórios em lote para todos os entregadores (fechamento do mês).
+Pela linha de comando: python -m entregadores lote --mes 7 --ano 2025 [--mes2 8 --ano2 2025] --out lote.zip
+"""
+import io
+import json
+import re
+import zipfile
+import pandas as pd
+
+from agregados import como_cubo
+from indices import IndiceDatas
+from instrumentacao import medido
+from nomes import nomes_de_exibicao
+from relatorios import gerar_texto, texto_simplificado, periodo_mes, dias_no_mes, taxas
+from utils import tempo_online_pct
+
+COLUNAS_LOTE = ["pessoa_entregadora", "pessoa_entregadora_normalizado", "ano", "mes",
+                "texto_simplificado", "texto_completo"]
+
+def _metricas_lote(cubo, meses: list[tuple[int, int]]) -> pd.DataFrame:
+    """Uma passada de agregação: métricas por (entregador, ano, mes) só dos meses pedidos."""
+    if isinstance(cubo, IndiceDatas):
+        # cada mês é uma fatia pelos offsets do índice
+        dados = pd.concat([cubo.mes(mes, ano) for mes, ano in meses])
+    else:
+        filtro = pd.Series(False, index=cubo.index)
+        for mes, ano in meses:
+            filtro |= (cubo["mes"] == mes) & (cubo["ano"] == ano)
+        dados = cubo[filtro]
+    dados = dados[dados["pessoa_entregadora"].notna()]
+
+    aggs = {
+        "presencas": ("data", "nunique"),
+        "turnos": ("turnos", "sum"),
+        "ofertadas": ("numero_de_corridas_ofertadas", "sum"),
+        "aceitas": ("numero_de_corridas_aceitas", "sum"),
+        "rejeitadas": ("numero_de_corridas_rejeitadas", "sum"),
+        "completas": ("numero_de_corridas_completadas", "sum"),
+    }
+    tem_online = "soma_tempo_disponivel_escalado" in dados.columns
+    if tem_online:
+        aggs["soma_online"] = ("soma_tempo_disponivel_escalado", "sum")
+        aggs["n_online"] = ("n_tempo_disponivel_escalado", "sum")
+
+    m = dados.groupby(["pessoa_entregadora_normalizado", "ano", "mes"], observed=True).agg(**aggs).reset_index()
+    # uma grafia por entregador em todos os meses do lote (a mais frequente)
+    m.insert(0, "pessoa_entregadora",
+             m["pessoa_entregadora_normalizado"].astype(object).map(nomes_de_exibicao(dados)).to_numpy())
+    if tem_online:
+        m["tempo_pct"] = tempo_online_pct(m["soma_online"], m["n_online"])
+    else:
+        m["tempo_pct"] = 0.0
+    return m
+
+@medido()
+def gerar_lote(df: pd.DataFrame, meses: list[tuple[int, int]]) -> pd.DataFrame:
+    """
+    Texto simplificado (WhatsApp) e completo (Ver geral) de todos os entregadores nos meses pedidos
+    [(mes, ano), ...]. Uma linha por (entregador, mês), na ordem dos nomes e dos meses informados.
+    """
+    meses = list(dict.fromkeys((int(m), int(a)) for m, a in meses))
+    m = _metricas_lote(df if isinstance(df, IndiceDatas) else como_cubo(df), meses)
+    if m.empty:
+        return pd.DataFrame(columns=COLUNAS_LOTE)
+
+    simplificados, completos = [], []
+    for r in m.itertuples(index=False):
+        ofertadas, aceitas, rejeitadas, completas = int(r.ofertadas), int(r.aceitas), int(r.rejeitadas), int(r.completas)
+        tx = taxas(ofertadas, aceitas, rejeitadas, completas)
+        periodo = periodo_mes(r.mes, r.ano)
+        turnos = int(r.turnos)
+        simplificados.append(texto_simplificado(r.pessoa_entregadora, periodo, r.tempo_pct, turnos,
+                                                ofertadas, aceitas, rejeitadas, completas, *tx))
+        dias = dias_no_mes(r.mes, r.ano)
+        completos.append(gerar_texto(r.pessoa_entregadora, periodo, dias, r.presencas, dias - r.presencas,
+                                     r.tempo_pct, turnos, ofertadas, aceitas, rejeitadas, completas, *tx))
+    m["texto_simplificado"] = simplificados
+    m["texto_completo"] = completos
+
+    ordem_mes = {mes_ano: i for i, mes_ano in enumerate(meses)}
+    m["__ordem__"] = [ordem_mes[(mes, ano)] for mes, ano in zip(m["mes"], m["ano"])]
+    # a chave desempata dois entregadores com a mesma grafia: as linhas de cada um ficam juntas
+    m = m.sort_values(["pessoa_entregadora", "pessoa_entregadora_normalizado", "__ordem__"], kind="stable")
+    return m[COLUNAS_LOTE].reset_index(drop=True)
+
+# ===== Exportação =====
+
+def _nome_arquivo(nome: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", nome).strip("_") or "sem_nome"
+
+def exportar_zip(lote: pd.DataFrame) -> bytes:
+    """ZIP com simplificado/<nome>.txt e completo/<nome>.txt (meses juntos, como na tela)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nome_norm, grupo in lote.groupby("pessoa_entregadora_normalizado", sort=False):
+            arquivo = _nome_arquivo(nome_norm)
+            zf.writestr(f"simplificado/{arquivo}.txt", "\n\n".join(grupo["texto_simplificado"]))
+            zf.writestr(f"completo/{arquivo}.txt", "\n\n".join(grupo["texto_completo"]))
+    return buf.getvalue()
+
+def exportar_csv(lote: pd.DataFrame) -> bytes:
+    return lote.to_csv(index=False).encode("utf-8")
+
+def exportar_jsonl(lote: pd.DataFrame) -> bytes:
+    linhas = (json.dumps(r, ensure_ascii=False) for r in lote.astype(object).to_dict("records"))
+    return ("\n".join(linhas) + "\n").encode("utf-8")
+
+EXPORTADORES = {"zip": exportar_zip, "csv": exportar_csv, "jsonl": exportar_jsonl}
@@ -1,24 +1,30 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, timedelta
-
-from utils import tempo_para_segundos  
+from collections import deque
 
 from relatorios import (
     gerar_dados,
     gerar_simplicado,
-    gerar_alertas_de_faltas,
-    get_entregadores,
+    detectar_ausencias,
+    formatar_alertas,
     classificar_entregadores,
-    utr_por_entregador_turno,
-    utr_pivot_por_entregador,
-    _horas_from_abs,
-    utr_por_entregador_turno
+    carregar_regras_categorias,
+    matriz_categorias,
+    utr_consolidado,
+    indicadores_do_mes,
+    gerar_por_praca_data_turno,
 
 )
+from lote import gerar_lote, EXPORTADORES
+from promocoes_loader import PROMOCOES_DESTINO
+from promocoes import avaliar_promocoes, nome_promocao
 from auth import autenticar, USUARIOS
-from data_loader import carregar_dados
+from data_loader import DESTINO, ErroCarregamento
+from atualizador import Atualizador, montar_versao, baixar_planilhas, assinatura_arquivos
+import instrumentacao
+from instrumentacao import medir
+from cache_resultados import CacheResultados
 
 def _hms_from_hours(h):
     try:
@@ -29,7 +35,45 @@ def _hms_from_hours(h):
     except Exception:
         return "00:00:00"
 
+def _grafico(fig):
+    with medir("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+# -------------------------------------------------------------------
+# Dados: versão atual compartilhada, próxima montada em segundo plano (atualizador.py)
+# -------------------------------------------------------------------
+# cache_resource: um único Atualizador por processo, e com ele um único DataFrame/cubo/índice por
+# versão, compartilhado entre sessões e reruns sem cópia. É somente leitura: nada abaixo atribui
+# colunas em df/cubo (derivações novas vão para o data_loader; recortes usam filtros/assign).
+@st.cache_resource
+def carregar_atualizador():
+    """
+    Verifica o Drive a cada ATUALIZACAO_INTERVALO_MIN (padrão 30) e troca a versão quando algo mudou.
+    Nenhuma sessão espera a carga, exceto a primeira do processo.
+    """
+    file_id, promocoes_file_id = st.secrets.get("CALENDARIO_FILE_ID"), st.secrets.get("PROMOCOES_FILE_ID")
+    atualizador = Atualizador(
+        construir=lambda anterior: montar_versao(file_id=file_id, promocoes_file_id=promocoes_file_id,
+                                                 anterior=anterior),
+        buscar=lambda: baixar_planilhas(file_id, promocoes_file_id),
+        assinatura=lambda: assinatura_arquivos(DESTINO, PROMOCOES_DESTINO),
+        intervalo_s=float(st.secrets.get("ATUALIZACAO_INTERVALO_MIN", 30)) * 60,
+    )
+    atualizador.iniciar()
+    return atualizador
 
+@st.cache_resource
+def configurar_instrumentacao():
+    """Uma vez por processo: nível e destino dos spans (INSTRUMENTACAO / INSTRUMENTACAO_LOG nos secrets ou no ambiente)."""
+    instrumentacao.configurar(st.secrets.get("INSTRUMENTACAO"), st.secrets.get("INSTRUMENTACAO_LOG"))
+
+@st.cache_resource
+def carregar_cache_resultados():
+    """
+    Resultados dos relatórios por (versão dos dados, função, parâmetros), entre sessões e reruns.
+    Não precisa limpar ao atualizar: a versão nova dos dados descarta os resultados antigos.
+    """
+    return CacheResultados(max_mb=float(st.secrets.get("CACHE_RESULTADOS_MB", 256)))
 
 # -------------------------------------------------------------------
 # Config da página (coloque antes de qualquer renderização Streamlit)
@@ -95,536 +139,569 @@ modo = st.sidebar.radio("Escolha uma opção:", [
     "Alertas de Faltas",
     "Relatório Customizado",
     "Categorias de Entregadores",
-    "UTR"
+    "UTR",
+    "Promoções",
 ])
 
 if not modo:
     st.stop()
 
+# spans da sessão (tempo/memória de carga, relatórios, modo e gráficos): painel do admin abaixo
+N_SPANS = 50
+configurar_instrumentacao()
+spans_sessao = st.session_state.setdefault("spans", deque(maxlen=N_SPANS))
+instrumentacao.coletar(spans_sessao)
+
 # -------------------------------------------------------------------
 # Dados
 # -------------------------------------------------------------------
-df = carregar_dados()
-df["data"] = pd.to_datetime(df["data"])
-df["mes_ano"] = df["data"].dt.to_period("M").dt.to_timestamp()
-
-entregadores = get_entregadores(df)
+atualizador = carregar_atualizador()
+try:
+    dados = atualizador.atual()  # a mesma versão durante todo o rerun, mesmo se outra for publicada
+except ErroCarregamento as e:
+    st.error(f"❌ {e}")
+    st.stop()
+# cubo (entregador, dia, turno, praça, subpraça) em ordem de data: mês/período dos relatórios vira fatia
+indice_datas = dados.indice_datas
+indice_nomes = dados.indice_nomes  # relatórios de um entregador leem só a fatia dele
+opcoes = dados.opcoes
+resultados = carregar_cache_resultados()  # resultados.chamar(func, indice_datas, ...) em vez de func(indice_datas, ...)
+st.sidebar.caption(f"📅 Dados de {dados.gerada_em:%d/%m/%Y %H:%M} · até {opcoes['data_max']:%d/%m/%Y} "
+                   f"· versão {dados.versao.rsplit('-', 1)[-1][:8]}")
 
 nivel = USUARIOS.get(st.session_state.usuario, {}).get("nivel", "")
 if nivel == "admin":
-    if st.button("🔄 Atualizar dados"):
-        st.cache_data.clear()
-        st.rerun()
+    estado = atualizador.estado()
+    if st.button("🔄 Atualizar dados", disabled=estado["ocupado"]):
+        atualizador.solicitar()
+        st.info("Verificando o Drive em segundo plano; os dados atuais seguem valendo até a nova versão ficar pronta.")
+    if estado["ocupado"]:
+        st.sidebar.caption("⏳ Montando a próxima versão dos dados...")
+    if estado["erro"]:
+        st.sidebar.caption(f"⚠️ Última atualização falhou (mantida a versão atual): {estado['erro']}")
+    if estado["ultima_verificacao"]:
+        st.sidebar.caption(f"🔎 Última verificação do Drive: {estado['ultima_verificacao']:%d/%m %H:%M}")
+
+    carga = dados.carga
+    invalidos = carga.get("duracoes_invalidas", 0)
+    if invalidos:
+        st.sidebar.caption(f"⚠️ {invalidos} célula(s) de tempo_disponivel_absoluto não reconhecida(s) na última carga (contadas como 0).")
+    memoria = carga.get("memoria_bytes_linha")
+    if memoria:
+        st.sidebar.caption(f"💾 {carga['linhas']:,} linhas · {memoria['antes']:.0f} → {memoria['depois']:.0f} bytes/linha "
+                           f"({carga['memoria_mb']:.1f} MB)".replace(",", "."))
+    leitura = carga.get("leitura")
+    if leitura:
+        st.sidebar.caption(f"📥 Planilha lida em {leitura['s']:.1f} s · {leitura['linhas_por_s'] or 0:,} linhas/s "
+                           f"({leitura['motor']})".replace(",", "."))
+    est = resultados.estatisticas()
+    st.sidebar.caption(f"🧮 Cache de resultados: {est['itens']} item(ns), {est['mb']:.1f} MB · "
+                       f"{est['acertos']} acerto(s) / {est['faltas']} cálculo(s)")
+    if instrumentacao.ativo():
+        with st.sidebar.expander(f"⏱️ Últimos {N_SPANS} spans da sessão"):
+            if spans_sessao:
+                tabela_spans = pd.DataFrame(list(spans_sessao)[::-1])
+                colunas_spans = [c for c in ["inicio", "span", "ms", "pico_mb", "nivel", "modo", "erro"]
+                                 if c in tabela_spans.columns]
+                st.dataframe(tabela_spans[colunas_spans], use_container_width=True, hide_index=True)
+            else:
+                st.caption("Nenhum span registrado ainda.")
 
 # -------------------------------------------------------------------
 # Ver geral / Simplificada
 # -------------------------------------------------------------------
 if modo in ["Ver geral", "Simplificada (WhatsApp)"]:
-    with st.form("formulario"):
-        entregadores_lista = sorted(df["pessoa_entregadora"].dropna().unique())
-        nome = st.selectbox("🔎 Selecione o entregador:", [None] + entregadores_lista, format_func=lambda x: "" if x is None else x)
-
+    with medir("modo", modo=modo):
+        with st.form("formulario"):
+            entregadores_lista = opcoes["entregadores"]
+            nome = st.selectbox("🔎 Selecione o entregador:", [None] + entregadores_lista, format_func=lambda x: "" if x is None else x)
+
+            if modo == "Simplificada (WhatsApp)":
+                col1, col2 = st.columns(2)
+                mes1 = col1.selectbox("1º Mês:", list(range(1, 13)))
+                ano1 = col2.selectbox("1º Ano:", opcoes["anos"])
+                mes2 = col1.selectbox("2º Mês:", list(range(1, 13)))
+                ano2 = col2.selectbox("2º Ano:", opcoes["anos"])
+
+            gerar = st.form_submit_button("🔍 Gerar relatório")
+
+        if gerar and nome:
+            with st.spinner("Gerando relatório..."):
+                if modo == "Ver geral":
+                    texto = gerar_dados(nome, None, None, indice_nomes.linhas(nome))
+                    st.text_area("Resultado:", value=texto or "❌ Nenhum dado encontrado", height=400)
+                else:
+                    dados_nome = indice_nomes.linhas(nome)
+                    t1 = gerar_simplicado(nome, mes1, ano1, dados_nome)
+                    t2 = gerar_simplicado(nome, mes2, ano2, dados_nome)
+                    st.text_area("Resultado:", value="\n\n".join([t for t in [t1, t2] if t]), height=600)
+
+        # ---- Lote: todos os entregadores de uma vez (fechamento do mês)
         if modo == "Simplificada (WhatsApp)":
-            col1, col2 = st.columns(2)
-            mes1 = col1.selectbox("1º Mês:", list(range(1, 13)))
-            ano1 = col2.selectbox("1º Ano:", sorted(df["ano"].unique(), reverse=True))
-            mes2 = col1.selectbox("2º Mês:", list(range(1, 13)))
-            ano2 = col2.selectbox("2º Ano:", sorted(df["ano"].unique(), reverse=True))
-
-        gerar = st.form_submit_button("🔍 Gerar relatório")
-
-    if gerar and nome:
-        with st.spinner("Gerando relatório..."):
-            if modo == "Ver geral":
-                texto = gerar_dados(nome, None, None, df[df["pessoa_entregadora"] == nome])
-                st.text_area("Resultado:", value=texto or "❌ Nenhum dado encontrado", height=400)
-            else:
-                t1 = gerar_simplicado(nome, mes1, ano1, df)
-                t2 = gerar_simplicado(nome, mes2, ano2, df)
-                st.text_area("Resultado:", value="\n\n".join([t for t in [t1, t2] if t]), height=600)
+            with st.expander("📦 Gerar para todos os entregadores (lote)"):
+                with st.form("formulario_lote"):
+                    anos_lote = opcoes["anos"]
+                    c1, c2 = st.columns(2)
+                    lote_mes1 = c1.selectbox("1º Mês:", list(range(1, 13)), key="lote_mes1")
+                    lote_ano1 = c2.selectbox("1º Ano:", anos_lote, key="lote_ano1")
+                    lote_mes2 = c1.selectbox("2º Mês (opcional):", [None] + list(range(1, 13)), key="lote_mes2",
+                                             format_func=lambda x: "—" if x is None else str(x))
+                    lote_ano2 = c2.selectbox("2º Ano:", anos_lote, key="lote_ano2")
+                    formato_lote = st.radio("Formato:", ["zip", "csv", "jsonl"], horizontal=True,
+                                            format_func={"zip": "ZIP (.txt por entregador)", "csv": "CSV", "jsonl": "JSONL"}.get)
+                    gerar_lote_btn = st.form_submit_button("📦 Gerar lote")
+
+                if gerar_lote_btn:
+                    meses_lote = [(lote_mes1, lote_ano1)] + ([(lote_mes2, lote_ano2)] if lote_mes2 else [])
+                    with st.spinner("Gerando relatórios de todos os entregadores..."):
+                        lote = gerar_lote(indice_datas, meses_lote)
+                    if lote.empty:
+                        st.info("Nenhum dado encontrado para os meses selecionados.")
+                    else:
+                        st.success(f"✅ {lote['pessoa_entregadora_normalizado'].nunique()} entregadores, {len(lote)} relatórios.")
+                        st.download_button(
+                            "⬇️ Baixar lote",
+                            data=EXPORTADORES[formato_lote](lote),
+                            file_name=f"relatorios_{lote_ano1}_{lote_mes1:02d}.{formato_lote}",
+                            mime={"zip": "application/zip", "csv": "text/csv", "jsonl": "application/jsonl"}[formato_lote],
+                        )
                 
 # -------------------------------------------------------------------
 # 📊 Indicadores Gerais (com % e UTR alinhado ao modo UTR)
 # -------------------------------------------------------------------
 if modo == "📊 Indicadores Gerais":
-    st.subheader("🔎 Escolha o indicador que deseja visualizar:")
-
-    tipo_grafico = st.radio(
-        "Tipo de gráfico:",
-        [
-            "Corridas ofertadas",
-            "Corridas aceitas",
-            "Corridas rejeitadas",
-            "Corridas completadas",
-            "Horas realizadas",
-        ],
-        index=0,
-        horizontal=True,
-    )
+    with medir("modo", modo=modo):
+        st.subheader("🔎 Escolha o indicador que deseja visualizar:")
+
+        tipo_grafico = st.radio(
+            "Tipo de gráfico:",
+            [
+                "Corridas ofertadas",
+                "Corridas aceitas",
+                "Corridas rejeitadas",
+                "Corridas completadas",
+                "Horas realizadas",
+            ],
+            index=0,
+            horizontal=True,
+        )
 
-    # ----- Preparos comuns -----
-    # garante datetime e coluna mês/ano
-    df["data"] = pd.to_datetime(df["data"], errors="coerce")
-    df["mes_ano"] = df["data"].dt.to_period("M").dt.to_timestamp()
+        # ----- Preparos comuns -----
+        # mês/ano atuais (pra série diária)
+        mes_atual = pd.Timestamp.today().month
+        ano_atual = pd.Timestamp.today().year
+        # tabelas prontas na carga dos dados: aqui só se escolhem colunas e o mês
+        indicadores = dados.indicadores
+        mensal = indicadores["mensal"]
+        serie_dia = indicadores_do_mes(indicadores["diario"], mes_atual, ano_atual)
+
+        # ====== RAMO 1: Horas realizadas ======
+        if tipo_grafico == "Horas realizadas":
+            # --- Barras: total de horas por mês (mês a mês)
+            fig_mensal = px.bar(
+                mensal,
+                x="mes_rotulo",
+                y="horas",
+                text="horas",
+                title="Horas realizadas por mês",
+                labels={"mes_rotulo": "Mês/Ano", "horas": "Horas"},
+                template="plotly_dark",
+                color_discrete_sequence=["#00BFFF"],
+            )
+            fig_mensal.update_traces(
+                texttemplate="<b>%{text:.1f}h</b>",
+                textposition="outside",
+                textfont=dict(size=16, color="white"),
+                marker_line_color="rgba(255,255,255,0.25)",
+                marker_line_width=0.5,
+            )
+            fig_mensal.update_layout(
+                plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+                font=dict(color="white"), title_font=dict(size=22),
+                xaxis=dict(showgrid=False, tickfont=dict(size=14)),
+                yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.15)", tickfont=dict(size=14)),
+                bargap=0.25, margin=dict(t=70, r=20, b=60, l=60), showlegend=False,
+            )
+            _grafico(fig_mensal)
+
+            # --- Linha: horas por dia no mês atual
+            if not serie_dia.empty:
+                fig_linha = px.line(
+                    serie_dia, x="dia", y="horas",
+                    title="📈 Horas realizadas por dia (mês atual)",
+                    labels={"dia": "Dia", "horas": "Horas"},
+                    template="plotly_dark",
+                )
+                fig_linha.update_traces(mode="lines", line_shape="spline", hovertemplate="Dia %{x}<br>%{y:.2f}h<extra></extra>")
+                fig_linha.update_layout(
+                    plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+                    font=dict(color="white"), title_font=dict(size=22),
+                    xaxis=dict(showgrid=False, tickmode="linear", dtick=1),
+                    yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.15)"),
+                    margin=dict(t=60, r=20, b=60, l=60),
+                )
+                total_horas_mes = serie_dia["horas"].sum()
+
+                # helper: float horas -> HH:MM:SS
+                def _hms_from_hours(h):
+                    try:
+                        total_seconds = int(round(float(h) * 3600))
+                        horas, resto = divmod(total_seconds, 3600)
+                        minutos, segundos = divmod(resto, 60)
+                        return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
+                    except Exception:
+                        return "00:00:00"
+
+                st.metric("⏱️ Horas realizadas no mês", _hms_from_hours(total_horas_mes))
+                _grafico(fig_linha)
+            else:
+                st.info("Sem dados no mês atual para plotar as horas diárias.")
 
-    # mês/ano atuais (pra série diária)
-    mes_atual = pd.Timestamp.today().month
-    ano_atual = pd.Timestamp.today().year
-    df_mes_atual = df[(df["data"].dt.month == mes_atual) & (df["data"].dt.year == ano_atual)]
+            st.stop()  # encerra o fluxo aqui pra 'Horas realizadas'
 
-    # ====== RAMO 1: Horas realizadas ======
-    if tipo_grafico == "Horas realizadas":
-        if "tempo_disponivel_absoluto" not in df.columns:
-            st.warning("Coluna 'tempo_disponivel_absoluto' não encontrada.")
+        # ====== RAMO 2: Corridas (ofertadas/aceitas/rejeitadas/completadas) ======
+        coluna_map = {
+            "Corridas ofertadas": ("numero_de_corridas_ofertadas", "Corridas ofertadas por mês", "Corridas"),
+            "Corridas aceitas": ("numero_de_corridas_aceitas", "Corridas aceitas por mês", "Corridas Aceitas"),
+            "Corridas rejeitadas": ("numero_de_corridas_rejeitadas", "Corridas rejeitadas por mês", "Corridas Rejeitadas"),
+            "Corridas completadas": ("numero_de_corridas_completadas", "Corridas completadas por mês", "Corridas Completadas"),
+        }
+        if tipo_grafico not in coluna_map:
+            st.warning("Tipo de gráfico inválido.")
             st.stop()
 
-        # HH:MM:SS -> segundos (vetorizado e robusto)
-        if "segundos_abs" not in df.columns:
-            df = df.copy()
-            df["segundos_abs"] = df["tempo_disponivel_absoluto"].map(tempo_para_segundos).fillna(0).astype(int)
+        col, titulo, label = coluna_map[tipo_grafico]
 
-        # --- Barras: total de horas por mês (mês a mês)
-        mensal_horas = (
-            df.groupby("mes_ano", as_index=False)["segundos_abs"].sum()
-              .assign(horas=lambda d: d["segundos_abs"] / 3600.0)
-        )
-        mensal_horas["mes_rotulo"] = mensal_horas["mes_ano"].dt.strftime("%b/%y")
-
-        fig_mensal = px.bar(
-            mensal_horas,
-            x="mes_rotulo",
-            y="horas",
-            text="horas",
-            title="Horas realizadas por mês",
-            labels={"mes_rotulo": "Mês/Ano", "horas": "Horas"},
-            template="plotly_dark",
-            color_discrete_sequence=["#00BFFF"],
+        # ---- Gráfico de barras
+        fig = px.bar(
+            mensal, x="mes_rotulo", y=col, text=f"rotulo_{col}", title=titulo,
+            labels={col: label, "mes_rotulo": "Mês/Ano"},
+            template="plotly_dark", color_discrete_sequence=["#00BFFF"]
         )
-        fig_mensal.update_traces(
-            texttemplate="<b>%{text:.1f}h</b>",
+        fig.update_traces(
+            texttemplate="%{text}",
             textposition="outside",
             textfont=dict(size=16, color="white"),
             marker_line_color="rgba(255,255,255,0.25)",
             marker_line_width=0.5,
         )
-        fig_mensal.update_layout(
+        fig.update_layout(
             plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
             font=dict(color="white"), title_font=dict(size=22),
-            xaxis=dict(showgrid=False, tickfont=dict(size=14)),
-            yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.15)", tickfont=dict(size=14)),
-            bargap=0.25, margin=dict(t=70, r=20, b=60, l=60), showlegend=False,
+            xaxis=dict(showgrid=False), yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.15)"),
+            bargap=0.25, margin=dict(t=80, r=20, b=60, l=60), showlegend=False,
         )
-        st.plotly_chart(fig_mensal, use_container_width=True)
-
-        # --- Linha: horas por dia no mês atual
-        if not df_mes_atual.empty:
-            por_dia_h = (
-                df_mes_atual.assign(segundos_abs=lambda d: d["tempo_disponivel_absoluto"].map(tempo_para_segundos).fillna(0).astype(int))
-                           .assign(dia=lambda d: d["data"].dt.day)
-                           .groupby("dia", as_index=False)["segundos_abs"].sum()
-                           .assign(horas=lambda d: d["segundos_abs"] / 3600.0)
-                           .sort_values("dia")
-            )
-            fig_linha = px.line(
-                por_dia_h, x="dia", y="horas",
-                title="📈 Horas realizadas por dia (mês atual)",
-                labels={"dia": "Dia", "horas": "Horas"},
-                template="plotly_dark",
-            )
-            fig_linha.update_traces(mode="lines", line_shape="spline", hovertemplate="Dia %{x}<br>%{y:.2f}h<extra></extra>")
-            fig_linha.update_layout(
-                plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-                font=dict(color="white"), title_font=dict(size=22),
-                xaxis=dict(showgrid=False, tickmode="linear", dtick=1),
-                yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.15)"),
-                margin=dict(t=60, r=20, b=60, l=60),
-            )
-            total_horas_mes = por_dia_h["horas"].sum()
-
-            # helper: float horas -> HH:MM:SS
-            def _hms_from_hours(h):
-                try:
-                    total_seconds = int(round(float(h) * 3600))
-                    horas, resto = divmod(total_seconds, 3600)
-                    minutos, segundos = divmod(resto, 60)
-                    return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
-                except Exception:
-                    return "00:00:00"
-
-            st.metric("⏱️ Horas realizadas no mês", _hms_from_hours(total_horas_mes))
-            st.plotly_chart(fig_linha, use_container_width=True)
-        else:
-            st.info("Sem dados no mês atual para plotar as horas diárias.")
-
-        st.stop()  # encerra o fluxo aqui pra 'Horas realizadas'
-
-    # ====== RAMO 2: Corridas (ofertadas/aceitas/rejeitadas/completadas) ======
-    coluna_map = {
-        "Corridas ofertadas": ("numero_de_corridas_ofertadas", "Corridas ofertadas por mês", "Corridas"),
-        "Corridas aceitas": ("numero_de_corridas_aceitas", "Corridas aceitas por mês", "Corridas Aceitas"),
-        "Corridas rejeitadas": ("numero_de_corridas_rejeitadas", "Corridas rejeitadas por mês", "Corridas Rejeitadas"),
-        "Corridas completadas": ("numero_de_corridas_completadas", "Corridas completadas por mês", "Corridas Completadas"),
-    }
-    if tipo_grafico not in coluna_map:
-        st.warning("Tipo de gráfico inválido.")
-        st.stop()
-
-    col, titulo, label = coluna_map[tipo_grafico]
-
-    # ---- Totais mensais (base do gráfico)
-    mensal = df.groupby("mes_ano", as_index=False)[col].sum()
-    mensal["mes_rotulo"] = mensal["mes_ano"].dt.strftime("%b/%y")
-
-    # ---- % em relação às ofertadas (para aceitas/rejeitadas/completadas)
-    if tipo_grafico in ["Corridas aceitas", "Corridas rejeitadas", "Corridas completadas"]:
-        mensal_ofert = (
-            df.groupby("mes_ano", as_index=False)["numero_de_corridas_ofertadas"].sum()
-              .rename(columns={"numero_de_corridas_ofertadas": "ofertadas_total"})
+        _grafico(fig)
+
+        # ---- Série diária (mês atual) — mantém igual para o indicador escolhido
+        fig_dia = px.line(
+            serie_dia, x="dia", y=col,
+            title=f"📈 {label} por dia (mês atual)",
+            labels={"dia": "Dia", col: label},
+            template="plotly_dark"
         )
-        mensal = mensal.merge(mensal_ofert, on="mes_ano", how="left")
-
-        def _pct(v, base):
-            try:
-                v = float(v); base = float(base)
-                return f"{(v/base*100):.1f}%" if base > 0 else "0.0%"
-            except Exception:
-                return "0.0%"
-
-        mensal["__label_text__"] = mensal.apply(
-            lambda r: f"{int(r[col])} ({_pct(r[col], r.get('ofertadas_total', 0))})",
-            axis=1
-        )
-
-    # ---- UTR médio do mês (média das UTR diárias → igual ao modo UTR) para OFERTADAS
-    elif tipo_grafico == "Corridas ofertadas":
-        base_utr = utr_por_entregador_turno(df, None, None)  # mesma função usada no modo UTR
-        if not base_utr.empty:
-            base_utr = base_utr.copy()
-            # garante datetime e filtra válidos
-            base_utr["data"] = pd.to_datetime(base_utr["data"], errors="coerce")
-            base_utr = base_utr.dropna(subset=["data"])
-
-            # 1) cria 'dia' explícito e tira média de UTR POR DIA
-            base_utr["dia"] = base_utr["data"].dt.date
-            utr_por_dia = (
-                base_utr.groupby("dia", as_index=False)["UTR"]
-                        .mean()
-                        .rename(columns={"UTR": "UTR_dia"})
-            )
+        fig_dia.update_traces(line_shape="spline", mode="lines+markers")
+        total_mes = int(serie_dia[col].sum())
+        st.metric(f"🚗 {label} no mês", total_mes)
+        _grafico(fig_dia)
 
-            # 2) média MENSAL das médias diárias
-            utr_por_dia["mes_ano"] = pd.to_datetime(utr_por_dia["dia"]).dt.to_period("M").dt.to_timestamp()
-            utr_mensal = (
-                utr_por_dia.groupby("mes_ano", as_index=False)["UTR_dia"]
-                           .mean()
-                           .rename(columns={"UTR_dia": "UTR_medio"})
-            )
-
-            # 3) junta na base mensal das barras
-            mensal = mensal.merge(utr_mensal, on="mes_ano", how="left")
-
-            # 4) label: valor absoluto + UTR médio com 2 casas
-            mensal["__label_text__"] = mensal.apply(
-                lambda r: f"{int(r[col])}\nUTR {0.00 if pd.isna(r['UTR_medio']) else float(r['UTR_medio']):.2f}",
-                axis=1
-            )
-        else:
-            mensal["__label_text__"] = mensal[col].fillna(0).astype(int).astype(str) + "\nUTR 0.00"
 
-    else:
-        mensal["__label_text__"] = mensal[col].fillna(0).astype(int).astype(str)
 
-    # ---- Gráfico de barras
-    fig = px.bar(
-        mensal, x="mes_rotulo", y=col, text="__label_text__", title=titulo,
-        labels={col: label, "mes_rotulo": "Mês/Ano"},
-        template="plotly_dark", color_discrete_sequence=["#00BFFF"]
-    )
-    fig.update_traces(
-        texttemplate="%{text}",
-        textposition="outside",
-        textfont=dict(size=16, color="white"),
-        marker_line_color="rgba(255,255,255,0.25)",
-        marker_line_width=0.5,
-    )
-    fig.update_layout(
-        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-        font=dict(color="white"), title_font=dict(size=22),
-        xaxis=dict(showgrid=False), yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.15)"),
-        bargap=0.25, margin=dict(t=80, r=20, b=60, l=60), showlegend=False,
-    )
-    st.plotly_chart(fig, use_container_width=True)
 
-    # ---- Série diária (mês atual) — mantém igual para o indicador escolhido
-    por_dia = (
-        df_mes_atual.assign(dia=lambda d: d["data"].dt.day)
-                    .groupby("dia", as_index=False)[col].sum()
-                    .sort_values("dia")
-    )
-    fig_dia = px.line(
-        por_dia, x="dia", y=col,
-        title=f"📈 {label} por dia (mês atual)",
-        labels={"dia": "Dia", col: label},
-        template="plotly_dark"
-    )
-    fig_dia.update_traces(line_shape="spline", mode="lines+markers")
-    total_mes = int(por_dia[col].sum())
-    st.metric(f"🚗 {label} no mês", total_mes)
-    st.plotly_chart(fig_dia, use_container_width=True)
+# -------------------------------------------------------------------
+# Alertas de Faltas
+# -------------------------------------------------------------------
+if modo == "Alertas de Faltas":
+    with medir("modo", modo=modo):
+        col1, col2 = st.columns(2)
+        janela_faltas = col1.number_input("Janela analisada (dias)", min_value=7, max_value=180, value=30)
+        minimo_faltas = col2.number_input("Faltas consecutivas para alertar", min_value=1, max_value=60, value=4)
+        st.subheader(f"⚠️ Entregadores com {minimo_faltas}+ faltas consecutivas")
 
+        ausencias = detectar_ausencias(indice_datas, janela=int(janela_faltas))
+        mensagens = formatar_alertas(ausencias, minimo_faltas=int(minimo_faltas))
 
+        if mensagens:
+            st.text_area("Resultado:", value="\n".join(mensagens), height=400)
+        else:
+            st.success("✅ Nenhum entregador ativo com faltas consecutivas.")
 
+        with st.expander("📋 Sequências de ausência de todos os ativos"):
+            st.dataframe(ausencias, use_container_width=True)
 
 # -------------------------------------------------------------------
-# Alertas de Faltas
+# Relatório Customizado
 # -------------------------------------------------------------------
-if modo == "Alertas de Faltas":
-    st.subheader("⚠️ Entregadores com 3+ faltas consecutivas")
+if modo == "Relatório Customizado":
+    with medir("modo", modo=modo):
+        st.header("Relatório Customizado do Entregador")
 
-    hoje = datetime.now().date()
-    ultimos_15_dias = hoje - timedelta(days=15)
-    df["data"] = pd.to_datetime(df["data"]).dt.date
+        entregadores_lista = opcoes["entregadores"]
+        entregador = st.selectbox("🔎 Selecione o entregador:", [None] + entregadores_lista, format_func=lambda x: "" if x is None else x)
 
-    ativos = df[df["data"] >= ultimos_15_dias]["pessoa_entregadora_normalizado"].unique()
-    mensagens = []
+        subpracas = opcoes["subpracas"]
+        filtro_subpraca = st.multiselect("Filtrar por subpraça:", subpracas)
 
-    for nome in ativos:
-        entregador = df[df["pessoa_entregadora_normalizado"] == nome]
-        if entregador.empty:
-            continue
+        turnos = opcoes["turnos"]
+        filtro_turno = st.multiselect("Filtrar por turno:", turnos)
 
-        dias = pd.date_range(end=hoje - timedelta(days=1), periods=30).to_pydatetime()
-        dias = [d.date() for d in dias]
-        presencas = set(entregador["data"])
 
-        sequencia = 0
-        for dia in sorted(dias):
-            if dia in presencas:
-                sequencia = 0
-            else:
-                sequencia += 1
+        tipo_periodo = st.radio("Como deseja escolher as datas?", ("Período contínuo", "Dias específicos"))
+        filtro_datas = {}
 
-        if sequencia >= 4:
-            nome_original = entregador["pessoa_entregadora"].iloc[0]
-            ultima_data = entregador["data"].max().strftime('%d/%m')
-            mensagens.append(
-                f"• {nome_original} – {sequencia} dias consecutivos ausente (última presença: {ultima_data})"
+        if tipo_periodo == "Período contínuo":
+            data_min = opcoes["data_min"]
+            data_max = opcoes["data_max"]
+            periodo = st.date_input("Selecione o intervalo de datas:", [data_min, data_max], format="DD/MM/YYYY")
+            if len(periodo) == 2:
+                filtro_datas = {"data_inicio": periodo[0], "data_fim": periodo[1]}
+            elif len(periodo) == 1:
+                filtro_datas = {"data_inicio": periodo[0], "data_fim": periodo[0]}
+        else:
+            dias_opcoes = opcoes["dias"]
+            dias_escolhidos = st.multiselect(
+                "Selecione os dias desejados:",
+                dias_opcoes,
+                format_func=lambda x: x.strftime("%d/%m/%Y")
             )
+            if dias_escolhidos:
+                filtro_datas = {"dias": dias_escolhidos}
 
-    if mensagens:
-        st.text_area("Resultado:", value="\n".join(mensagens), height=400)
-    else:
-        st.success("✅ Nenhum entregador ativo com faltas consecutivas.")
+        detalhar = st.multiselect("Detalhar por (opcional):", ["praca", "sub_praca", "data", "periodo"],
+                                  format_func={"praca": "Praça", "sub_praca": "Subpraça", "data": "Dia", "periodo": "Turno"}.get)
 
-# -------------------------------------------------------------------
-# Relatório Customizado
-# -------------------------------------------------------------------
-if modo == "Relatório Customizado":
-    st.header("Relatório Customizado do Entregador")
-
-    entregadores_lista = sorted(df["pessoa_entregadora"].dropna().unique())
-    entregador = st.selectbox("🔎 Selecione o entregador:", [None] + entregadores_lista, format_func=lambda x: "" if x is None else x)
-
-    subpracas = sorted(df["sub_praca"].dropna().unique())
-    filtro_subpraca = st.multiselect("Filtrar por subpraça:", subpracas)
-
-    turnos = sorted(df["periodo"].dropna().unique())
-    filtro_turno = st.multiselect("Filtrar por turno:", turnos)
-
-    df['data_do_periodo'] = pd.to_datetime(df['data_do_periodo'])
-    df['data'] = df['data_do_periodo'].dt.date
-
-    tipo_periodo = st.radio("Como deseja escolher as datas?", ("Período contínuo", "Dias específicos"))
-    dias_escolhidos = []
-
-    if tipo_periodo == "Período contínuo":
-        data_min = df["data"].min()
-        data_max = df["data"].max()
-        periodo = st.date_input("Selecione o intervalo de datas:", [data_min, data_max], format="DD/MM/YYYY")
-        if len(periodo) == 2:
-            dias_escolhidos = list(pd.date_range(start=periodo[0], end=periodo[1]).date)
-        elif len(periodo) == 1:
-            dias_escolhidos = [periodo[0]]
-    else:
-        dias_opcoes = sorted(df["data"].unique())
-        dias_escolhidos = st.multiselect(
-            "Selecione os dias desejados:",
-            dias_opcoes,
-            format_func=lambda x: x.strftime("%d/%m/%Y")
-        )
+        gerar_custom = st.button("Gerar relatório customizado")
 
-    gerar_custom = st.button("Gerar relatório customizado")
+        if gerar_custom and entregador:
+            df_filt = indice_datas.selecionar(nome=entregador, sub_praca=filtro_subpraca or None,
+                                              periodo=filtro_turno or None, **filtro_datas)
 
-    if gerar_custom and entregador:
-        df_filt = df[df["pessoa_entregadora"] == entregador]
-        if filtro_subpraca:
-            df_filt = df_filt[df_filt["sub_praca"].isin(filtro_subpraca)]
-        if filtro_turno:
-            df_filt = df_filt[df_filt["periodo"].isin(filtro_turno)]
-        if dias_escolhidos:
-            df_filt = df_filt[df_filt["data"].isin(dias_escolhidos)]
+            texto = gerar_dados(entregador, None, None, df_filt)
+            st.text_area("Resultado:", value=texto or "❌ Nenhum dado encontrado", height=400)
 
-        texto = gerar_dados(entregador, None, None, df_filt)
-        st.text_area("Resultado:", value=texto or "❌ Nenhum dado encontrado", height=400)
+            if detalhar and not df_filt.empty:
+                detalhe = gerar_por_praca_data_turno(
+                    None, nome=entregador, sub_praca=filtro_subpraca or None, turno=filtro_turno or None,
+                    data_inicio=filtro_datas.get("data_inicio"), data_fim=filtro_datas.get("data_fim"),
+                    datas_especificas=filtro_datas.get("dias"), agrupar_por=detalhar, indice=indice_datas,
+                )
+                st.dataframe(detalhe, use_container_width=True)
 
 # -------------------------------------------------------------------
 # Categorias de Entregadores
 # -------------------------------------------------------------------
 if modo == "Categorias de Entregadores":
-    st.header("📚 Categorias de Entregadores")
+    with medir("modo", modo=modo):
+        st.header("📚 Categorias de Entregadores")
 
-    tipo_cat = st.radio("Período de análise:", ["Mês/Ano", "Todo o histórico"], horizontal=True, index=0)
-    mes_sel_cat = ano_sel_cat = None
-    if tipo_cat == "Mês/Ano":
-        col1, col2 = st.columns(2)
-        mes_sel_cat = col1.selectbox("Mês", list(range(1, 13)))
-        ano_sel_cat = col2.selectbox("Ano", sorted(df["ano"].unique(), reverse=True))
-
-    df_cat = classificar_entregadores(df, mes_sel_cat, ano_sel_cat) if tipo_cat == "Mês/Ano" else classificar_entregadores(df)
-
-    if df_cat.empty:
-        st.info("Nenhum dado encontrado para o período selecionado.")
-    else:
-        # SH -> HH:MM:SS SEMPRE para exibição/CSV
-        if "supply_hours" in df_cat.columns:
-            df_cat["tempo_hms"] = df_cat["supply_hours"].apply(_hms_from_hours)
-
-        # Resumo por categoria
-        contagem = df_cat["categoria"].value_counts().reindex(["Premium","Conectado","Casual","Flutuante"]).fillna(0).astype(int)
-        c1,c2,c3,c4 = st.columns(4)
-        c1.metric("🚀 Premium", int(contagem.get("Premium",0)))
-        c2.metric("🎯 Conectado", int(contagem.get("Conectado",0)))
-        c3.metric("👍 Casual", int(contagem.get("Casual",0)))
-        c4.metric("↩ Flutuante", int(contagem.get("Flutuante",0)))
-
-        # Tabela (usa HH:MM:SS)
-        st.subheader("Tabela de classificação")
-        cols_cat = ["pessoa_entregadora","categoria","tempo_hms","aceitacao_%","conclusao_%","ofertadas","aceitas","completas","criterios_atingidos"]
-        st.dataframe(
-            df_cat[cols_cat].style.format({"aceitacao_%":"{:.1f}","conclusao_%":"{:.1f}"}),
-            use_container_width=True
-        )
+        tipo_cat = st.radio("Período de análise:", ["Mês/Ano", "Todo o histórico"], horizontal=True, index=0)
+        mes_sel_cat = ano_sel_cat = None
+        if tipo_cat == "Mês/Ano":
+            col1, col2 = st.columns(2)
+            mes_sel_cat = col1.selectbox("Mês", list(range(1, 13)))
+            ano_sel_cat = col2.selectbox("Ano", opcoes["anos"])
+
+        # regras editáveis sem deploy: [[CATEGORIAS]] nos secrets ou categorias.json ao lado do app
+        regras_cat = carregar_regras_categorias(st.secrets.get("CATEGORIAS") or "categorias.json")
+        df_cat = (resultados.chamar(classificar_entregadores, indice_datas, mes_sel_cat, ano_sel_cat, regras=regras_cat)
+                  if tipo_cat == "Mês/Ano" else resultados.chamar(classificar_entregadores, indice_datas, regras=regras_cat))
+
+        if df_cat.empty:
+            st.info("Nenhum dado encontrado para o período selecionado.")
+        else:
+            # SH -> HH:MM:SS SEMPRE para exibição/CSV
+            if "supply_hours" in df_cat.columns:
+                df_cat["tempo_hms"] = df_cat["supply_hours"].apply(_hms_from_hours)
+
+            # Resumo por categoria (na ordem das regras)
+            icones = {"Premium": "🚀", "Conectado": "🎯", "Casual": "👍", "Flutuante": "↩"}
+            categorias = list(df_cat["categoria"].cat.categories)
+            contagem = df_cat["categoria"].value_counts().reindex(categorias).fillna(0).astype(int)
+            for col_m, cat in zip(st.columns(len(categorias)), categorias):
+                col_m.metric(f"{icones.get(cat, '•')} {cat}", int(contagem.get(cat, 0)))
+
+            # Tabela (usa HH:MM:SS)
+            st.subheader("Tabela de classificação")
+            cols_cat = ["pessoa_entregadora","categoria","tempo_hms","aceitacao_%","conclusao_%","ofertadas","aceitas","completas","criterios_atingidos"]
+            st.dataframe(
+                df_cat[cols_cat].style.format({"aceitacao_%":"{:.1f}","conclusao_%":"{:.1f}"}),
+                use_container_width=True
+            )
 
-        # CSV com vírgula e HH:MM:SS
-        csv_cat = df_cat[cols_cat].to_csv(index=False, decimal=",").encode("utf-8")
-        st.download_button("⬇️ Baixar CSV", data=csv_cat, file_name="categorias_entregadores.csv", mime="text/csv")
+            # CSV com vírgula e HH:MM:SS
+            csv_cat = df_cat[cols_cat].to_csv(index=False, decimal=",").encode("utf-8")
+            st.download_button("⬇️ Baixar CSV", data=csv_cat, file_name="categorias_entregadores.csv", mime="text/csv")
+
+        with st.expander("🔀 Migração de categoria mês a mês"):
+            matriz = resultados.chamar(matriz_categorias, indice_datas, regras=regras_cat)
+            if matriz.empty:
+                st.info("Sem dados para montar a matriz.")
+            else:
+                st.dataframe(matriz, use_container_width=True)
+                csv_mat = matriz.to_csv().encode("utf-8")
+                st.download_button("⬇️ Baixar matriz (CSV)", data=csv_mat, file_name="categorias_por_mes.csv", mime="text/csv")
 
 # -------------------------------------------------------------------
 # UTR — Barras limpas (1 cor), números grandes e dia embaixo de cada barra
 # -------------------------------------------------------------------
 if modo == "UTR":
-    st.header("🧭 UTR – Corridas ofertadas por hora (média diária)")
-
-    # --- Período (mês/ano) ---
-    col1, col2 = st.columns(2)
-    mes_sel = col1.selectbox("Mês", list(range(1, 13)))
-    ano_sel = col2.selectbox("Ano", sorted(df["ano"].unique(), reverse=True))
-
-    # Base completa (para gráfico e CSV geral)
-    base_full = utr_por_entregador_turno(df, mes_sel, ano_sel)
-    if base_full.empty:
-        st.info("Nenhum dado encontrado para o período selecionado.")
-        st.stop()
-
-    if "supply_hours" in base_full.columns:
-        base_full["tempo_hms"] = base_full["supply_hours"].apply(_hms_from_hours)
-
-    # --- Turno (limpo) ---
-    turnos_opts = ["Todos os turnos"]
-    if "periodo" in base_full.columns:
-        turnos_opts += sorted([t for t in base_full["periodo"].dropna().unique()])
-    turno_sel = st.selectbox("Turno", options=turnos_opts, index=0)
-
-    # Filtra só para o gráfico
-    base_plot = base_full if turno_sel == "Todos os turnos" else base_full[base_full["periodo"] == turno_sel]
-    if base_plot.empty:
-        st.info("Sem dados para o turno selecionado.")
-        st.stop()
-
-    # Série: média UTR por dia
-    base_plot["data"] = pd.to_datetime(base_plot["data"])
-    serie = (
-        base_plot.groupby(base_plot["data"].dt.day)["UTR"]
-        .mean()
-        .reset_index()
-        .rename(columns={"data": "dia_num", "UTR": "utr_media"})
-    )
-    serie.columns = ["dia_num", "utr_media"]
-    serie = serie.sort_values("dia_num")
-    y_max = (serie["utr_media"].max() or 0) * 1.25  # espaço para labels fora da barra
-
-    # ======= Gráfico de barras (1 cor) =======
-    import plotly.express as px
-    titulo_turno = turno_sel if turno_sel != "Todos os turnos" else "Todos os turnos"
-    fig = px.bar(
-        serie,
-        x="dia_num",
-        y="utr_media",
-        text="utr_media",
-        title=f"UTR médio por dia – {mes_sel:02d}/{ano_sel} • {titulo_turno}",
-        labels={"dia_num": "Dia do mês", "utr_media": "UTR médio"},
-        template="plotly_dark",
-        color_discrete_sequence=["#00BFFF"],  # 1 cor só
-    )
+    with medir("modo", modo=modo):
+        st.header("🧭 UTR – Corridas ofertadas por hora (média diária)")
 
-    # Números grandes/visíveis
-    fig.update_traces(
-        texttemplate="<b>%{text:.2f}</b>",
-        textposition="outside",
-        textfont=dict(size=18, color="white"),
-        marker_line_color="rgba(255,255,255,0.25)",
-        marker_line_width=0.5,
-    )
+        # --- Período (mês/ano) ---
+        col1, col2 = st.columns(2)
+        mes_sel = col1.selectbox("Mês", list(range(1, 13)))
+        ano_sel = col2.selectbox("Ano", opcoes["anos"])
+
+        # diário (gráfico e CSV geral), média mensal e entregador × turno, de uma base só
+        utr = resultados.chamar(utr_consolidado, indice_datas, mes_sel, ano_sel)
+        base_full = utr["diario"]
+        if base_full.empty:
+            st.info("Nenhum dado encontrado para o período selecionado.")
+            st.stop()
 
-    # Eixo X com todos os dias visíveis (1,2,3,...)
-    fig.update_xaxes(
-        tickmode="linear", dtick=1, tick0=1,
-        tickfont=dict(size=14),
-        showgrid=False, showline=True, linewidth=1, linecolor="rgba(255,255,255,0.2)"
-    )
+        if "supply_hours" in base_full.columns:
+            base_full["tempo_hms"] = base_full["supply_hours"].apply(_hms_from_hours)
 
-    # Y com espaço pra label e sem cortar topo
-    fig.update_yaxes(
-        range=[0, max(y_max, 1)],  # evita range muito baixo
-        showgrid=True, gridcolor="gray", rangemode="tozero",
-        tickfont=dict(size=14)
-    )
+        # --- Turno (limpo) ---
+        turnos_opts = ["Todos os turnos"]
+        if "periodo" in base_full.columns:
+            turnos_opts += sorted([t for t in base_full["periodo"].dropna().unique()])
+        turno_sel = st.selectbox("Turno", options=turnos_opts, index=0)
 
-    fig.update_layout(
-        bargap=0.25,
-        uniformtext_minsize=14, uniformtext_mode="show",
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        font=dict(color="white"),
-        title_font=dict(size=22),
-        showlegend=False,
-        margin=dict(t=70, r=20, b=60, l=60),
-    )
+        # Filtra só para o gráfico
+        base_plot = base_full if turno_sel == "Todos os turnos" else base_full[base_full["periodo"] == turno_sel]
+        if base_plot.empty:
+            st.info("Sem dados para o turno selecionado.")
+            st.stop()
+
+        # Série: média UTR por dia
+        serie = (
+            base_plot.groupby(pd.to_datetime(base_plot["data"]).dt.day)["UTR"]
+            .mean()
+            .reset_index()
+            .rename(columns={"data": "dia_num", "UTR": "utr_media"})
+        )
+        serie.columns = ["dia_num", "utr_media"]
+        serie = serie.sort_values("dia_num")
+        y_max = (serie["utr_media"].max() or 0) * 1.25  # espaço para labels fora da barra
+
+        # ======= Gráfico de barras (1 cor) =======
+        import plotly.express as px
+        titulo_turno = turno_sel if turno_sel != "Todos os turnos" else "Todos os turnos"
+        fig = px.bar(
+            serie,
+            x="dia_num",
+            y="utr_media",
+            text="utr_media",
+            title=f"UTR médio por dia – {mes_sel:02d}/{ano_sel} • {titulo_turno}",
+            labels={"dia_num": "Dia do mês", "utr_media": "UTR médio"},
+            template="plotly_dark",
+            color_discrete_sequence=["#00BFFF"],  # 1 cor só
+        )
+
+        # Números grandes/visíveis
+        fig.update_traces(
+            texttemplate="<b>%{text:.2f}</b>",
+            textposition="outside",
+            textfont=dict(size=18, color="white"),
+            marker_line_color="rgba(255,255,255,0.25)",
+            marker_line_width=0.5,
+        )
 
-    st.plotly_chart(fig, use_container_width=True)
+        # Eixo X com todos os dias visíveis (1,2,3,...)
+        fig.update_xaxes(
+            tickmode="linear", dtick=1, tick0=1,
+            tickfont=dict(size=14),
+            showgrid=False, showline=True, linewidth=1, linecolor="rgba(255,255,255,0.2)"
+        )
 
-    # ======= Métrica única =======
-    st.metric("Média UTR no mês", f"{serie['utr_media'].mean():.2f}")
+        # Y com espaço pra label e sem cortar topo
+        fig.update_yaxes(
+            range=[0, max(y_max, 1)],  # evita range muito baixo
+            showgrid=True, gridcolor="gray", rangemode="tozero",
+            tickfont=dict(size=14)
+        )
 
-    # ======= CSV GERAL (ignora filtro de turno) =======
-    st.caption("📄 O botão abaixo baixa o **CSV GERAL** (sem filtro de turno).")
-    cols_csv = ["data","pessoa_entregadora","periodo","tempo_hms","corridas_ofertadas","UTR"]
-    base_csv = base_full.copy()
-    try:
-        base_csv["data"] = pd.to_datetime(base_csv["data"]).dt.strftime("%d/%m/%Y")
-    except Exception:
-        base_csv["data"] = base_csv["data"].astype(str)
-    for c in cols_csv:
-        if c not in base_csv.columns:
-            base_csv[c] = None
-    base_csv["UTR"] = pd.to_numeric(base_csv["UTR"], errors="coerce").round(2)
-    base_csv["corridas_ofertadas"] = pd.to_numeric(base_csv["corridas_ofertadas"], errors="coerce").fillna(0).astype(int)
-
-    csv_bin = base_csv[cols_csv].to_csv(index=False, decimal=",").encode("utf-8")
-    st.download_button(
-        "⬇️ Baixar CSV (GERAL)",
-        data=csv_bin,
-        file_name=f"utr_entregador_turno_diario_{mes_sel:02d}_{ano_sel}.csv",
-        mime="text/csv",
-        help="Exporta o CSV geral do mês/ano, ignorando o filtro de turno."
-    )
\ No newline at end of file
+        fig.update_layout(
+            bargap=0.25,
+            uniformtext_minsize=14, uniformtext_mode="show",
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)",
+            font=dict(color="white"),
+            title_font=dict(size=22),
+            showlegend=False,
+            margin=dict(t=70, r=20, b=60, l=60),
+        )
+
+        _grafico(fig)
+
+        # ======= Métricas =======
+        col1, col2 = st.columns(2)
+        col1.metric(f"Média UTR no mês • {titulo_turno}", f"{serie['utr_media'].mean():.2f}")
+        if not utr["mensal"].empty:
+            col2.metric("Média UTR no mês • todos os turnos", f"{utr['mensal']['UTR_medio'].iloc[0]:.2f}")
+
+        with st.expander("UTR médio por entregador × turno"):
+            st.dataframe(utr["por_turno"], use_container_width=True)
+
+        # ======= CSV GERAL (ignora filtro de turno) =======
+        st.caption("📄 O botão abaixo baixa o **CSV GERAL** (sem filtro de turno).")
+        cols_csv = ["data","pessoa_entregadora","periodo","tempo_hms","corridas_ofertadas","UTR"]
+        base_csv = base_full.copy()
+        try:
+            base_csv["data"] = pd.to_datetime(base_csv["data"]).dt.strftime("%d/%m/%Y")
+        except Exception:
+            base_csv["data"] = base_csv["data"].astype(str)
+        for c in cols_csv:
+            if c not in base_csv.columns:
+                base_csv[c] = None
+        base_csv["UTR"] = pd.to_numeric(base_csv["UTR"], errors="coerce").round(2)
+        base_csv["corridas_ofertadas"] = pd.to_numeric(base_csv["corridas_ofertadas"], errors="coerce").fillna(0).astype(int)
+
+        csv_bin = base_csv[cols_csv].to_csv(index=False, decimal=",").encode("utf-8")
+        st.download_button(
+            "⬇️ Baixar CSV (GERAL)",
+            data=csv_bin,
+            file_name=f"utr_entregador_turno_diario_{mes_sel:02d}_{ano_sel}.csv",
+            mime="text/csv",
+            help="Exporta o CSV geral do mês/ano, ignorando o filtro de turno."
+        )
+
+# -------------------------------------------------------------------
+# Promoções — elegibilidade e valor a pagar por entregador
+# -------------------------------------------------------------------
+if modo == "Promoções":
+    with medir("modo", modo=modo):
+        st.header("🎁 Promoções – elegibilidade e pagamento")
+
+        promos = dados.promocoes
+        if promos is None:
+            st.error(f"❌ Não foi possível carregar as promoções: {dados.promocoes_erro}")
+            st.stop()
+
+        so_vigentes = st.checkbox("Só promoções vigentes hoje", value=False)
+        hoje = pd.Timestamp.today().date()
+        disponiveis = [p for p in promos if not so_vigentes or p.data_inicio <= hoje <= p.data_fim]
+        rotulos = {f"{nome_promocao(p)} ({p.tipo}, {p.data_inicio:%d/%m} a {p.data_fim:%d/%m/%Y})": p for p in disponiveis}
+        escolhidas = st.multiselect("Promoções:", list(rotulos), default=list(rotulos))
+        so_elegiveis = st.checkbox("Mostrar só elegíveis", value=True)
+
+        resultado = avaliar_promocoes(indice_datas, [rotulos[r] for r in escolhidas])
+        if so_elegiveis:
+            resultado = resultado[resultado["elegivel"]]
+
+        if resultado.empty:
+            st.info("Nenhum entregador encontrado para as promoções selecionadas.")
+        else:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Promoções", resultado["id_promocao"].nunique())
+            c2.metric("Entregadores elegíveis", int(resultado.loc[resultado["elegivel"], "pessoa_entregadora_normalizado"].nunique()))
+            c3.metric("Total a pagar", f"R$ {resultado['valor'].sum():,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+
+            cols_promo = ["promocao", "tipo", "pessoa_entregadora", "rotas", "horas", "pct_online", "aceitacao_%",
+                          "conclusao_%", "fases_atingidas", "fases_total", "faixa", "elegivel", "valor"]
+            st.dataframe(resultado[cols_promo], use_container_width=True)
+
+            csv_promo = resultado.drop(columns=["pessoa_entregadora_normalizado"]).to_csv(index=False, decimal=",").encode("utf-8")
+            st.download_button("⬇️ Baixar CSV", data=csv_promo, file_name="promocoes_pagamentos.csv", mime="text/csv")
@@ -0,0 +1,89 @@
+"""
+Chave de cada entregador: nome normalizado com as variantes de grafia unificadas.
+
+O export traz a mesma pessoa como 'Maria Souza', 'MARIA  SOUZA', 'Maria Sousa Lima'... Acento, caixa e
+espaços a normalização resolve; sobrenome truncado ('maria souza' / 'maria souza lima', 'maria s' /
+'maria souza') é unificado aqui, quando há uma única extensão possível. O ID canônico é a grafia
+normalizada mais completa do grupo e vai para 'pessoa_entregadora_normalizado'.
+"""
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from utils import normalizar
+
+def _abreviada(palavra: str) -> bool:
+    """Inicial ou abreviação: 's', 's.', 'sou', 'sz.'."""
+    return palavra.endswith(".") or len(palavra) <= 3
+
+def _variante(curto: str, longo: str) -> bool:
+    """
+    'curto' é 'longo' truncado, palavra a palavra: as palavras iguais, menos a última de 'curto',
+    que pode ser a abreviação da palavra correspondente ('maria s' / 'maria souza').
+    Palavra inteira que só é prefixo de outra não conta: 'joao silva' não é 'joao silvano'.
+    """
+    pc, pl = curto.split(), longo.split()
+    if len(pc) > len(pl) or pc[:-1] != pl[:len(pc) - 1]:
+        return False
+    ultima, correspondente = pc[-1], pl[len(pc) - 1]
+    return ultima == correspondente or (_abreviada(ultima) and correspondente.startswith(ultima.rstrip(".")))
+
+def unificar_variantes(normalizados) -> dict[str, str]:
+    """
+    nome normalizado -> ID canônico, só para os nomes que são variante truncada de outro (ver _variante).
+    Exige duas palavras ('maria' sozinho casaria com todas as Marias) e uma extensão sem ambiguidade:
+    se 'maria souza' prefixa 'maria souza lima' e 'maria souza costa', fica como está.
+    """
+    nomes = sorted({n for n in normalizados if n})
+    canonicos = {}
+    for pos, nome in enumerate(nomes):
+        if " " not in nome:
+            continue
+        # em ordem alfabética, os nomes que começam com 'nome' vêm logo depois dele
+        base = nome.rstrip(".")
+        fim = bisect.bisect_left(nomes, base + "\uffff", pos + 1)
+        extensoes = [e for e in nomes[bisect.bisect_left(nomes, base):fim] if e != nome and _variante(nome, e)]
+        if not extensoes:
+            continue
+        maior = max(extensoes, key=len)
+        if all(e == maior or _variante(e, maior) for e in extensoes):
+            canonicos[nome] = maior
+    return canonicos
+
+def chaves_entregadores(nomes: pd.Series) -> pd.Series:
+    """
+    pessoa_entregadora -> pessoa_entregadora_normalizado (categórica).
+    normalizar roda uma vez por grafia distinta (milhares), não por linha; os códigos levam o resultado
+    de volta às linhas. Nome ausente vira "" (como normalizar(NaN)).
+    """
+    codigos, distintos = pd.factorize(nomes)
+    normalizados = [normalizar(n) for n in distintos]
+    canonicos = unificar_variantes(normalizados)
+    chaves = np.array([canonicos.get(n, n) for n in normalizados] + [""], dtype=object)  # código -1 -> ""
+    codigos_chave, categorias = pd.factorize(chaves)
+    valores = pd.Categorical.from_codes(codigos_chave[codigos], categories=categorias)
+    return pd.Series(valores, index=nomes.index, name="pessoa_entregadora_normalizado").cat.remove_unused_categories()
+
+def nomes_de_exibicao(dados: pd.DataFrame) -> pd.Series:
+    """Chave -> grafia de exibição do entregador: a mais frequente entre as variantes dele em 'dados'."""
+    pares = dados.groupby(["pessoa_entregadora_normalizado", "pessoa_entregadora"], observed=True).size()
+    pares = pares[pares > 0].sort_values(ascending=False, kind="stable").reset_index()
+    return (pares.drop_duplicates("pessoa_entregadora_normalizado")
+                 .set_index("pessoa_entregadora_normalizado")["pessoa_entregadora"].astype(object))
+
+class ResolvedorNomes:
+    """
+    Nome como veio do seletor/CLI -> chave do entregador. Necessário porque a chave de uma grafia
+    truncada é a do nome completo, que normalizar(nome) sozinho não devolve.
+    """
+
+    def __init__(self, dados: pd.DataFrame):
+        pares = dados[["pessoa_entregadora", "pessoa_entregadora_normalizado"]].drop_duplicates()
+        self._chaves = {normalizar(n): chave for n, chave in
+                        zip(pares["pessoa_entregadora"].astype(object), pares["pessoa_entregadora_normalizado"].astype(object))
+                        if pd.notna(n)}
+
+    def chave(self, nome) -> str:
+        normalizado = normalizar(nome)
+        return self._chaves.get(normalizado, normalizado)
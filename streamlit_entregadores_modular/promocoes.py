@@ -0,0 +1,230 @@
+"""
+Apuração das promoções (fases, por_hora, faixa_rotas) sobre a base de turnos.
+
+Cada tipo é avaliado numa passada vetorizada para todos os entregadores × promoções:
+as somas por intervalo de datas saem de somas acumuladas por (entregador, dia) localizadas
+com busca binária (junção por intervalo), e a faixa de prêmio com searchsorted sobre faixa_min.
+
+Convenções da apuração:
+- rotas = corridas completadas no período da promoção (ou da fase);
+- fases: cada fase com rotas >= min_rotas conta como atingida; valor = valor_premio × fases atingidas;
+- por_hora: elegível se % online (média de tempo_disponivel_escalado), % aceitação e % conclusão
+  batem os mínimos; valor = valor_premio × horas online (segundos_abs);
+- faixa_rotas: valor = valor_premio da faixa [faixa_min, faixa_max] que contém as rotas.
+valor_premio de fases/por_hora vem da coluna de mesmo nome na aba 'promocoes' (0 se não houver).
+"""
+import numpy as np
+import pandas as pd
+from datetime import date
+
+from agregados import como_cubo
+from instrumentacao import medido
+from nomes import nomes_de_exibicao
+from utils import tempo_online_pct
+
+COLUNAS_PROMOCOES = [
+    "id_promocao", "promocao", "tipo", "data_inicio", "data_fim",
+    "pessoa_entregadora", "pessoa_entregadora_normalizado",
+    "rotas", "horas", "pct_online", "aceitacao_%", "conclusao_%",
+    "fases_atingidas", "fases_total", "faixa", "elegivel", "valor",
+]
+
+METRICAS = ["turnos", "ofertadas", "aceitas", "completas", "segundos", "soma_online", "n_online"]
+
+class _SomasPorIntervalo:
+    """
+    Somas acumuladas por (entregador, dia), ordenadas pela chave codigo * n_dias + dia.
+    soma(metrica, inicios, fins) devolve a matriz entregadores × intervalos em O(E·I·log N).
+    """
+
+    def __init__(self, cubo: pd.DataFrame):
+        dados = cubo[cubo["pessoa_entregadora_normalizado"].notna() & cubo["data"].notna()]
+        codigos, self.nomes_norm = pd.factorize(dados["pessoa_entregadora_normalizado"].astype(object))
+        self.nomes = pd.Series(self.nomes_norm).map(nomes_de_exibicao(dados)).to_numpy()
+
+        datas = pd.to_datetime(dados["data"]).dt.normalize()
+        self.dia0 = datas.min() if len(datas) else pd.Timestamp(0)
+        dias = (datas - self.dia0).dt.days.to_numpy(dtype=np.int64)
+        self.n_dias = int(dias.max()) + 1 if len(dias) else 1
+
+        online = dados["soma_tempo_disponivel_escalado"] if "soma_tempo_disponivel_escalado" in dados else 0
+        n_online = dados["n_tempo_disponivel_escalado"] if "n_tempo_disponivel_escalado" in dados else 0
+        diario = pd.DataFrame({
+            "chave": codigos.astype(np.int64) * self.n_dias + dias,
+            "turnos": dados["turnos"].to_numpy(),
+            "ofertadas": dados["numero_de_corridas_ofertadas"].to_numpy(),
+            "aceitas": dados["numero_de_corridas_aceitas"].to_numpy(),
+            "completas": dados["numero_de_corridas_completadas"].to_numpy(),
+            "segundos": dados["segundos_abs"].to_numpy() if "segundos_abs" in dados else 0,
+            "soma_online": np.asarray(online, dtype=float) if np.ndim(online) else 0.0,
+            "n_online": np.asarray(n_online, dtype=float) if np.ndim(n_online) else 0.0,
+        }).groupby("chave", sort=True).sum()
+
+        self.chaves = diario.index.to_numpy()
+        zeros = np.zeros((1, len(METRICAS)))
+        acumulado = np.vstack([zeros, np.cumsum(diario[METRICAS].to_numpy(dtype=float), axis=0)])
+        self._acumulado = dict(zip(METRICAS, acumulado.T))
+
+    def __len__(self):
+        return len(self.nomes_norm)
+
+    def posicoes(self, inicios, fins) -> tuple[np.ndarray, np.ndarray]:
+        """Posições [lo, hi) de cada (entregador, intervalo) nas chaves ordenadas."""
+        ini = self._indice_dia(inicios, lado="inicio")
+        fim = self._indice_dia(fins, lado="fim")
+        base = (np.arange(len(self), dtype=np.int64) * self.n_dias)[:, None]
+        lo = np.searchsorted(self.chaves, base + ini[None, :], side="left")
+        hi = np.searchsorted(self.chaves, base + fim[None, :], side="right")
+        return lo, np.maximum(hi, lo)  # intervalo fora da base (fim < início) soma zero
+
+    def soma(self, metrica: str, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        acumulado = self._acumulado[metrica]
+        return acumulado[hi] - acumulado[lo]
+
+    def _indice_dia(self, datas, lado: str) -> np.ndarray:
+        dias = (pd.to_datetime(pd.Series(list(datas), dtype=object)) - self.dia0).dt.days.to_numpy(dtype=np.int64)
+        # recorta na janela da base sem deixar um intervalo vazio virar um dia válido
+        if lado == "inicio":
+            return np.clip(dias, 0, self.n_dias)
+        return np.clip(dias, -1, self.n_dias - 1)
+
+def _valor_premio(promo) -> float:
+    valor = promo.atributos.get("valor_premio")
+    return float(valor) if valor is not None and pd.notna(valor) else 0.0
+
+def nome_promocao(promo) -> str:
+    return str(promo.atributos.get("nome") or promo.id)
+
+def _rotulo_faixa(faixa) -> str:
+    sem_teto = faixa.faixa_max is None or pd.isna(faixa.faixa_max)
+    return f"{faixa.faixa_min:g}+" if sem_teto else f"{faixa.faixa_min:g}–{faixa.faixa_max:g}"
+
+def _indicadores(somas, lo, hi) -> dict:
+    """Matrizes entregadores × promoções com as métricas exibidas (mesmos arredondamentos da tabela)."""
+    ofertadas = somas.soma("ofertadas", lo, hi)
+    aceitas = somas.soma("aceitas", lo, hi)
+    completas = somas.soma("completas", lo, hi)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aceitacao = np.where(ofertadas > 0, aceitas / ofertadas * 100, 0.0)
+        conclusao = np.where(aceitas > 0, completas / aceitas * 100, 0.0)
+    return {
+        "rotas": completas.astype(int),
+        "horas": (somas.soma("segundos", lo, hi) / 3600).round(2),
+        "pct_online": tempo_online_pct(somas.soma("soma_online", lo, hi), somas.soma("n_online", lo, hi)),
+        "aceitacao_%": aceitacao.round(1),
+        "conclusao_%": conclusao.round(1),
+    }
+
+def _tabela(somas, promos, lo, hi, indicadores=None, **colunas) -> pd.DataFrame:
+    """Linhas (entregador, promoção) só onde o entregador rodou no período da promoção."""
+    e, p = np.nonzero(somas.soma("turnos", lo, hi) > 0)
+    if len(e) == 0:
+        return pd.DataFrame(columns=COLUNAS_PROMOCOES)
+    indicadores = indicadores or _indicadores(somas, lo, hi)
+
+    def por_promocao(valores):
+        return np.array(valores, dtype=object)[p]
+
+    out = pd.DataFrame({
+        "id_promocao": por_promocao([pr.id for pr in promos]),
+        "promocao": por_promocao([nome_promocao(pr) for pr in promos]),
+        "tipo": por_promocao([pr.tipo for pr in promos]),
+        "data_inicio": por_promocao([pr.data_inicio for pr in promos]),
+        "data_fim": por_promocao([pr.data_fim for pr in promos]),
+        "pessoa_entregadora": somas.nomes[e],
+        "pessoa_entregadora_normalizado": somas.nomes_norm[e],
+    })
+    for nome, matriz in {**indicadores, **colunas}.items():
+        out[nome] = matriz[e, p]
+    return out
+
+def _avaliar_fases(somas, promos) -> pd.DataFrame:
+    # todas as fases de todas as promoções numa só matriz entregadores × fases
+    dono = np.array([i for i, promo in enumerate(promos) for _ in promo.fases], dtype=int)
+    fases = [f for promo in promos for f in promo.fases]
+    lo_f, hi_f = somas.posicoes([f.inicio for f in fases], [f.fim for f in fases])
+    minimos = np.array([f.min_rotas for f in fases], dtype=float)
+    atingiu = somas.soma("completas", lo_f, hi_f) >= minimos[None, :] if fases else np.zeros((len(somas), 0), bool)
+
+    # fases atingidas por promoção: soma das colunas de cada dono (uma passada com np.add.at)
+    atingidas = np.zeros((len(somas), len(promos)), dtype=int)
+    np.add.at(atingidas.T, dono, atingiu.T.astype(int))
+    total = np.bincount(dono, minlength=len(promos))[None, :].repeat(len(somas), axis=0)
+    valor = atingidas * np.array([_valor_premio(p) for p in promos])[None, :]
+
+    lo, hi = somas.posicoes([p.data_inicio for p in promos], [p.data_fim for p in promos])
+    return _tabela(somas, promos, lo, hi, fases_atingidas=atingidas, fases_total=total,
+                   elegivel=atingidas > 0, valor=valor)
+
+def _avaliar_por_hora(somas, promos) -> pd.DataFrame:
+    lo, hi = somas.posicoes([p.data_inicio for p in promos], [p.data_fim for p in promos])
+    ind = _indicadores(somas, lo, hi)
+    # promoção sem linha em criterios_por_hora: mínimos infinitos (ninguém elegível)
+    minimos = np.array([(p.criterios.min_pct_online, p.criterios.min_aceitacao, p.criterios.min_conclusao)
+                        if p.criterios else (np.inf,) * 3 for p in promos], dtype=float)
+    elegivel = ((ind["pct_online"] >= minimos[None, :, 0]) & (ind["aceitacao_%"] >= minimos[None, :, 1])
+                & (ind["conclusao_%"] >= minimos[None, :, 2]))
+    premio = np.array([_valor_premio(p) for p in promos])[None, :]
+    valor = np.where(elegivel, premio * ind["horas"], 0.0).round(2)
+    return _tabela(somas, promos, lo, hi, indicadores=ind, elegivel=elegivel, valor=valor)
+
+def _avaliar_faixas(somas, promos) -> pd.DataFrame:
+    lo, hi = somas.posicoes([p.data_inicio for p in promos], [p.data_fim for p in promos])
+    ind = _indicadores(somas, lo, hi)
+    rotas = ind["rotas"]
+
+    # todas as faixas numa só tabela ordenada: chave = posição da promoção × M + faixa_min
+    faixas = [(i, f) for i, promo in enumerate(promos) for f in sorted(promo.faixas, key=lambda f: f.faixa_min)]
+    faixa_idx = np.full(rotas.shape, -1)
+    if faixas:
+        dono = np.array([i for i, _ in faixas])
+        mins = np.array([f.faixa_min for _, f in faixas], dtype=float)
+        maxs = np.array([np.nan if f.faixa_max is None else f.faixa_max for _, f in faixas], dtype=float)
+        maxs = np.where(np.isnan(maxs), np.inf, maxs)  # faixa_max vazia = sem teto
+        M = max(np.nanmax(np.abs(mins)), rotas.max(initial=0)) + 1
+        chaves = dono * M + mins
+        consulta = np.arange(len(promos))[None, :] * M + rotas
+        pos = np.searchsorted(chaves, consulta, side="right") - 1
+        valida = (pos >= 0) & (dono[np.clip(pos, 0, None)] == np.arange(len(promos))[None, :])
+        valida &= rotas <= maxs[np.clip(pos, 0, None)]
+        faixa_idx = np.where(valida, pos, -1)
+        premios = np.array([f.valor_premio for _, f in faixas], dtype=float)
+        rotulos = np.array([_rotulo_faixa(f) for _, f in faixas] + [""], dtype=object)
+
+    achou = faixa_idx >= 0
+    valor = np.where(achou, premios[faixa_idx] if faixas else 0.0, 0.0)
+    rotulo = rotulos[faixa_idx] if faixas else np.full(rotas.shape, "", dtype=object)
+    return _tabela(somas, promos, lo, hi, indicadores=ind, faixa=rotulo, elegivel=achou & (valor > 0), valor=valor)
+
+AVALIADORES = {"fases": _avaliar_fases, "por_hora": _avaliar_por_hora, "faixa_rotas": _avaliar_faixas}
+
+@medido()
+def avaliar_promocoes(df: pd.DataFrame, promocoes: list, ativas_em: date | None = None) -> pd.DataFrame:
+    """
+    Elegibilidade e valor de cada entregador em cada promoção (lista de promocoes_loader.Promocao).
+    Com 'ativas_em', só as promoções vigentes nessa data. Uma linha por (promoção, entregador que rodou no período).
+    """
+    if ativas_em is not None:
+        promocoes = [p for p in promocoes if p.data_inicio <= ativas_em <= p.data_fim]
+    cubo = como_cubo(df)
+    if cubo.empty or not promocoes:
+        return pd.DataFrame(columns=COLUNAS_PROMOCOES)
+
+    somas = _SomasPorIntervalo(cubo)
+    partes = []
+    for tipo, avaliar in AVALIADORES.items():
+        do_tipo = [p for p in promocoes if p.tipo == tipo]
+        if do_tipo:
+            partes.append(avaliar(somas, do_tipo))
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_PROMOCOES)
+
+    out = pd.concat(partes, ignore_index=True).reindex(columns=COLUNAS_PROMOCOES)
+    out["elegivel"] = out["elegivel"].fillna(False).astype(bool)
+    out["valor"] = out["valor"].fillna(0.0).astype(float).round(2)
+    out["faixa"] = out["faixa"].fillna("")
+    for c in ("fases_atingidas", "fases_total"):
+        out[c] = out[c].astype("Int64")
+    return out.sort_values(["data_inicio", "id_promocao", "valor", "pessoa_entregadora"],
+                           ascending=[True, True, False, True], kind="stable").reset_index(drop=True)
@@ -1,62 +1,142 @@
-import pandas as pd
-import gdown
-
-def carregar_promocoes(path=None):
-    if not path:
-        # ID do seu arquivo no Google Drive (já exportado como .xlsx)
-        file_id = "1tvke4iQnVmbJO34RtGYfaI_KzliSumWH"
-        url = f"https://drive.google.com/uc?id={file_id}"
-        path = "Promocoes.xlsx"
-        gdown.download(url, path, quiet=False)
-
-    promocoes = pd.read_excel(path, sheet_name="promocoes")
-    fases = pd.read_excel(path, sheet_name="fases")
-    criterios = pd.read_excel(path, sheet_name="criterios_por_hora")
-    faixas = pd.read_excel(path, sheet_name="faixas_de_rotas")
-    return promocoes, fases, criterios, faixas
-
-def estruturar_promocoes(promocoes, fases, criterios, faixas):
-    lista = []
-
-    for _, row in promocoes.iterrows():
-        promo = row.to_dict()
-        promo["data_inicio"] = pd.to_datetime(promo["data_inicio"]).date()
-        promo["data_fim"] = pd.to_datetime(promo["data_fim"]).date()
-
-        tipo = promo["tipo"]
-        idp = promo["id"]
-
-        if tipo == "fases":
-            fases_rel = fases[fases["id_promocao"] == idp]
-            promo["fases"] = [
-                {
-                    "nome": f["fase_nome"],
-                    "inicio": pd.to_datetime(f["data_inicio"]).date(),
-                    "fim": pd.to_datetime(f["data_fim"]).date(),
-                    "min_rotas": f["min_rotas"]
-                }
-                for _, f in fases_rel.iterrows()
-            ]
-
-        elif tipo == "por_hora":
-            crit = criterios[criterios["id_promocao"] == idp].iloc[0]
-            promo["criterios"] = {
-                "min_pct_online": crit["min_pct_online"],
-                "min_aceitacao": crit["min_aceitacao"],
-                "min_conclusao": crit["min_conclusao"]
-            }
-
-        elif tipo == "faixa_rotas":
-            faixas_rel = faixas[faixas["id_promocao"] == idp]
-            promo["faixas"] = [
-                {
-                    "faixa_min": f["faixa_min"],
-                    "faixa_max": f["faixa_max"],
-                    "valor_premio": f["valor_premio"]
-                }
-                for _, f in faixas_rel.iterrows()
-            ]
-
-        lista.append(promo)
-
-    return lista
+import json
+import logging
+import os
+import pandas as pd
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+from download import baixar_drive, escrever_atomico, hash_arquivo
+from instrumentacao import medido
+
+logger = logging.getLogger(__name__)
+
+PROMOCOES_DESTINO = Path("Promocoes.xlsx")
+# ID do seu arquivo no Google Drive (já exportado como .xlsx)
+PROMOCOES_FILE_ID = os.environ.get("PROMOCOES_FILE_ID", "1tvke4iQnVmbJO34RtGYfaI_KzliSumWH")
+ABAS = ("promocoes", "fases", "criterios_por_hora", "faixas_de_rotas")
+
+# Cache binário ao lado da planilha (Promocoes.xlsx -> Promocoes.pkl + Promocoes.cache.json).
+PROMOCOES_CACHE_VERSAO = 1
+
+@medido()
+def carregar_promocoes(path=None, file_id=None, atualizar=False):
+    """
+    Devolve (promocoes, fases, criterios, faixas).
+    Sem 'path' usa Promocoes.xlsx local e só vai ao Drive se ele não existir (ou com atualizar=True).
+    As quatro abas são lidas numa única abertura da planilha e ficam em cache até o arquivo mudar.
+    """
+    if path:
+        path = Path(path)
+    else:
+        path = PROMOCOES_DESTINO
+        if atualizar or not (path.exists() and path.stat().st_size > 0):
+            if not baixar_promocoes(path, file_id) and not path.exists():
+                raise FileNotFoundError("Falha ao baixar Promocoes.xlsx do Google Drive.")
+
+    abas = _ler_abas(path)
+    return tuple(abas[nome] for nome in ABAS)
+
+def baixar_promocoes(destino: Path = PROMOCOES_DESTINO, file_id: str | None = None) -> bool:
+    """
+    Atualiza a planilha de promoções. Sem mudança no Drive (ou com conteúdo idêntico), a cópia
+    local fica como está (mesmo mtime), e o cache das abas continua valendo.
+    """
+    return baixar_drive(file_id or PROMOCOES_FILE_ID, Path(destino))
+
+@medido()
+def _ler_abas(path: Path) -> dict:
+    pkl, meta_path = path.with_suffix(".pkl"), path.with_suffix(".cache.json")
+    info = path.stat()
+    chave = {"versao": PROMOCOES_CACHE_VERSAO, "tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get("versao") == chave["versao"] and meta.get("tamanho") == chave["tamanho"]:
+            if meta.get("mtime_ns") != chave["mtime_ns"]:
+                # baixou de novo o mesmo conteúdo: confere o hash e só atualiza a chave
+                if meta.get("sha256") != hash_arquivo(path):
+                    raise ValueError("planilha mudou")
+                escrever_atomico(meta_path, json.dumps({**meta, **chave}).encode())
+            return pd.read_pickle(pkl)
+    except Exception:
+        pass  # sem cache (ou ilegível): lê a planilha
+
+    abas = pd.read_excel(path, sheet_name=list(ABAS))  # uma abertura do workbook para as quatro abas
+    try:
+        tmp = pkl.with_suffix(".pkl.tmp")
+        pd.to_pickle(abas, tmp)
+        os.replace(tmp, pkl)
+        escrever_atomico(meta_path, json.dumps({**chave, "sha256": hash_arquivo(path)}).encode())
+    except Exception as e:
+        logger.warning("Não foi possível gravar o cache de promoções: %s", e)
+    return abas
+
+@dataclass(slots=True, frozen=True)
+class Fase:
+    nome: str
+    inicio: date
+    fim: date
+    min_rotas: float
+
+@dataclass(slots=True, frozen=True)
+class CriteriosHora:
+    min_pct_online: float
+    min_aceitacao: float
+    min_conclusao: float
+
+@dataclass(slots=True, frozen=True)
+class Faixa:
+    faixa_min: float
+    faixa_max: float
+    valor_premio: float
+
+@dataclass(slots=True)
+class Promocao:
+    id: object
+    tipo: str
+    data_inicio: date
+    data_fim: date
+    atributos: dict = field(default_factory=dict)  # demais colunas da aba 'promocoes' (nome, valor...)
+    fases: tuple[Fase, ...] = ()
+    criterios: CriteriosHora | None = None
+    faixas: tuple[Faixa, ...] = ()
+
+def _datas(serie: pd.Series) -> list:
+    return [d.date() if pd.notna(d) else None for d in pd.to_datetime(serie)]
+
+def _por_id(tabela: pd.DataFrame, colunas: list[str], tipo) -> dict:
+    """id_promocao -> tupla de registros 'tipo', na ordem da planilha (um groupby, sem filtrar por promoção)."""
+    if tabela.empty:
+        return {}
+    valores = list(zip(*(tabela[c].tolist() for c in colunas)))
+    return {idp: tuple(tipo(*valores[i]) for i in posicoes)
+            for idp, posicoes in tabela.groupby("id_promocao", sort=False).indices.items()}
+
+def estruturar_promocoes(promocoes, fases, criterios, faixas) -> list[Promocao]:
+    """Monta uma Promocao por linha da aba 'promocoes', com as fases/critérios/faixas ligados por id_promocao."""
+    fases = fases.assign(data_inicio=_datas(fases["data_inicio"]), data_fim=_datas(fases["data_fim"]))
+    fases_por_id = _por_id(fases, ["fase_nome", "data_inicio", "data_fim", "min_rotas"], Fase)
+    faixas_por_id = _por_id(faixas, ["faixa_min", "faixa_max", "valor_premio"], Faixa)
+    # por_hora usa a primeira linha de critérios da promoção
+    criterios_por_id = {idp: regs[0] for idp, regs in
+                        _por_id(criterios, ["min_pct_online", "min_aceitacao", "min_conclusao"], CriteriosHora).items()}
+
+    base = ["id", "tipo", "data_inicio", "data_fim"]
+    extras = [c for c in promocoes.columns if c not in base]
+    atributos = promocoes[extras].astype(object).where(promocoes[extras].notna(), None).to_dict("records")
+
+    lista = []
+    for idp, tipo, inicio, fim, attrs in zip(promocoes["id"].tolist(), promocoes["tipo"].tolist(),
+                                             _datas(promocoes["data_inicio"]), _datas(promocoes["data_fim"]),
+                                             atributos):
+        promo = Promocao(id=idp, tipo=tipo, data_inicio=inicio, data_fim=fim, atributos=attrs)
+        if tipo == "fases":
+            promo.fases = fases_por_id.get(idp, ())
+        elif tipo == "por_hora":
+            promo.criterios = criterios_por_id.get(idp)
+        elif tipo == "faixa_rotas":
+            promo.faixas = faixas_por_id.get(idp, ())
+        lista.append(promo)
+
+    return lista
@@ -1,5 +1,12 @@
-from utils import normalizar, tempo_para_segundos, calcular_tempo_online
-from datetime import datetime, timedelta, date
+from utils import calcular_tempo_online, tempo_online_pct
+from agregados import como_cubo
+from indices import IndiceDatas
+from nomes import ResolvedorNomes, nomes_de_exibicao
+from instrumentacao import medido
+from datetime import datetime
+from pathlib import Path
+import json
+import numpy as np
 import pandas as pd
 
 def get_entregadores(df):
@@ -25,11 +32,58 @@ def gerar_texto(nome, periodo, dias_esperados, presencas, faltas, tempo_pct,
 • 🏁 Completas: {completas} ({tx_completas}%)
 """
 
+MESES_PT = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+            "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+def texto_simplificado(nome, periodo, tempo_pct, turnos, ofertadas, aceitas, rejeitadas, completas,
+                       tx_aceitas, tx_rejeitadas, tx_completas):
+    return f"""{nome} – {periodo}
+
+Tempo online: {tempo_pct}%
+
+Turnos realizados: {turnos}
+
+Corridas:
+* Ofertadas: {ofertadas}
+* Aceitas: {aceitas} ({tx_aceitas}%)
+* Rejeitadas: {rejeitadas} ({tx_rejeitadas}%)
+* Completas: {completas} ({tx_completas}%)
+"""
+
+def periodo_mes(mes, ano) -> str:
+    return f"{MESES_PT[mes - 1]}/{ano}"
+
+def dias_no_mes(mes, ano) -> int:
+    return pd.Period(year=ano, month=mes, freq="M").days_in_month
+
+def taxas(ofertadas, aceitas, rejeitadas, completas) -> tuple[float, float, float]:
+    """(% aceitas, % rejeitadas, % completas) como nos textos: sobre ofertadas / sobre aceitas."""
+    tx_aceitas = round(aceitas / ofertadas * 100, 1) if ofertadas else 0.0
+    tx_rejeitadas = round(rejeitadas / ofertadas * 100, 1) if ofertadas else 0.0
+    tx_completas = round(completas / aceitas * 100, 1) if aceitas else 0.0
+    return tx_aceitas, tx_rejeitadas, tx_completas
+
+def _recorte(df, nome=None, mes=None, ano=None, desde=None) -> pd.DataFrame:
+    """
+    Linhas do cubo por nome (chave do entregador, variantes unificadas), mês e/ou data mínima.
+    Com indices.IndiceDatas (o do app e da CLI) mês e datas são fatias; com DataFrame, máscaras.
+    """
+    if isinstance(df, IndiceDatas):
+        return df.selecionar(nome=nome, mes=mes, ano=ano, data_inicio=desde)
+    dados = como_cubo(df)
+    if nome is not None:
+        dados = dados[dados["pessoa_entregadora_normalizado"] == ResolvedorNomes(dados).chave(nome)]
+    if mes is not None and ano is not None:
+        dados = dados[(dados["mes"] == mes) & (dados["ano"] == ano)]
+    if desde is not None:
+        dados = dados[dados["data"] >= desde]
+    return dados
+
+@medido()
 def gerar_dados(nome, mes, ano, df):
-    nome_norm = normalizar(nome)
-    dados = df[(df["pessoa_entregadora_normalizado"] == nome_norm)]
-    if mes and ano:
-        dados = dados[(df["mes"] == mes) & (df["ano"] == ano)]
+    if not (mes and ano):
+        mes = ano = None
+    dados = _recorte(df, nome=nome, mes=mes, ano=ano)
     if dados.empty:
         return None
 
@@ -37,30 +91,24 @@ def gerar_dados(nome, mes, ano, df):
 
     presencas = dados["data"].nunique()
     if mes and ano:
-        dias_no_mes = pd.date_range(start=f"{ano}-{mes:02d}-01", periods=31, freq='D')
-        dias_no_mes = dias_no_mes[dias_no_mes.month == mes]
-        faltas = len(dias_no_mes) - presencas
-        dias_esperados = len(dias_no_mes)
+        dias_esperados = dias_no_mes(mes, ano)
+        faltas = dias_esperados - presencas
     else:
         min_data = dados["data"].min()
         max_data = dados["data"].max()
         dias_esperados = (max_data - min_data).days + 1
         faltas = dias_esperados - presencas
 
-    turnos = len(dados)
+    turnos = int(dados["turnos"].sum())
     ofertadas = int(dados["numero_de_corridas_ofertadas"].sum())
     aceitas = int(dados["numero_de_corridas_aceitas"].sum())
     rejeitadas = int(dados["numero_de_corridas_rejeitadas"].sum())
     completas = int(dados["numero_de_corridas_completadas"].sum())
 
-    tx_aceitas = round(aceitas / ofertadas * 100, 1) if ofertadas else 0.0
-    tx_rejeitadas = round(rejeitadas / ofertadas * 100, 1) if ofertadas else 0.0
-    tx_completas = round(completas / aceitas * 100, 1) if aceitas else 0.0
+    tx_aceitas, tx_rejeitadas, tx_completas = taxas(ofertadas, aceitas, rejeitadas, completas)
 
     if mes and ano:
-        meses_pt = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-                    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-        periodo = f"{meses_pt[mes - 1]}/{ano}"
+        periodo = periodo_mes(mes, ano)
     else:
         min_data = dados["data"].min().strftime('%d/%m/%Y')
         max_data = dados["data"].max().strftime('%d/%m/%Y')
@@ -70,225 +118,297 @@ def gerar_dados(nome, mes, ano, df):
                        turnos, ofertadas, aceitas, rejeitadas, completas,
                        tx_aceitas, tx_rejeitadas, tx_completas)
 
+@medido()
 def gerar_simplicado(nome, mes, ano, df):
-    nome_norm = normalizar(nome)
-    dados = df[(df["pessoa_entregadora_normalizado"] == nome_norm) &
-               (df["mes"] == mes) & (df["ano"] == ano)]
+    dados = _recorte(df, nome=nome, mes=mes, ano=ano)
     if dados.empty:
         return None
 
     tempo_pct = calcular_tempo_online(dados)
-    turnos = len(dados)
+    turnos = int(dados["turnos"].sum())
     ofertadas = int(dados["numero_de_corridas_ofertadas"].sum())
     aceitas = int(dados["numero_de_corridas_aceitas"].sum())
     rejeitadas = int(dados["numero_de_corridas_rejeitadas"].sum())
     completas = int(dados["numero_de_corridas_completadas"].sum())
-    tx_aceitas = round(aceitas / ofertadas * 100, 1) if ofertadas else 0.0
-    tx_rejeitadas = round(rejeitadas / ofertadas * 100, 1) if ofertadas else 0.0
-    tx_completas = round(completas / aceitas * 100, 1) if aceitas else 0.0
-    meses_pt = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-                "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-    periodo = f"{meses_pt[mes-1]}/{ano}"
-    return f"""{nome} – {periodo}
-
-Tempo online: {tempo_pct}%
-
-Turnos realizados: {turnos}
-
-Corridas:
-* Ofertadas: {ofertadas}
-* Aceitas: {aceitas} ({tx_aceitas}%)
-* Rejeitadas: {rejeitadas} ({tx_rejeitadas}%)
-* Completas: {completas} ({tx_completas}%)
-"""
+    tx_aceitas, tx_rejeitadas, tx_completas = taxas(ofertadas, aceitas, rejeitadas, completas)
+    return texto_simplificado(nome, periodo_mes(mes, ano), tempo_pct, turnos, ofertadas, aceitas, rejeitadas,
+                              completas, tx_aceitas, tx_rejeitadas, tx_completas)
 
-def gerar_alertas_de_faltas(df):
-    hoje = datetime.now().date()
-    ultimos_15_dias = hoje - timedelta(days=15)
-    ativos = df[df["data"] >= ultimos_15_dias]["pessoa_entregadora_normalizado"].unique()
-    mensagens = []
+@medido()
+def detectar_ausencias(df, hoje=None, janela: int = 30, dias_ativo: int = 15) -> pd.DataFrame:
+    """
+    Sequências de ausência de todos os entregadores numa passada, sobre um bitmap de presença
+    (entregador × dia) dos 'janela' dias que terminam ontem.
+    Considera ativo quem apareceu nos últimos 'dias_ativo' dias. Colunas:
+      pessoa_entregadora, pessoa_entregadora_normalizado, sequencia_atual, maior_sequencia,
+      dias_presentes, ultima_presenca
+    """
+    colunas = ["pessoa_entregadora", "pessoa_entregadora_normalizado", "sequencia_atual",
+               "maior_sequencia", "dias_presentes", "ultima_presenca"]
+    hoje = pd.Timestamp(hoje or datetime.now().date())
+    fim = hoje - pd.Timedelta(days=1)
+    inicio = fim - pd.Timedelta(days=janela - 1)
+
+    # só importa o que caiu na janela ou no período de atividade (fatia do fim da base)
+    dados = _recorte(df, desde=min(inicio, hoje - pd.Timedelta(days=dias_ativo)))
+    if dados.empty:
+        return pd.DataFrame(columns=colunas)
+
+    datas = pd.to_datetime(dados["data"]).dt.normalize()
+    codigos, nomes_norm = pd.factorize(dados["pessoa_entregadora_normalizado"])
+    validos = codigos >= 0
+
+    por_nome = pd.DataFrame({"codigo": codigos[validos], "data": datas[validos].to_numpy()})
+    resumo = por_nome.groupby("codigo").agg(ultima_presenca=("data", "max"))
+    ativos = resumo.index[resumo["ultima_presenca"] >= hoje - pd.Timedelta(days=dias_ativo)].to_numpy()
+    if len(ativos) == 0:
+        return pd.DataFrame(columns=colunas)
+
+    # bitmap: linha = entregador ativo, coluna = dia da janela
+    linha = np.full(len(nomes_norm), -1)
+    linha[ativos] = np.arange(len(ativos))
+    offset = (por_nome["data"] - inicio).dt.days.to_numpy()
+    na_janela = (offset >= 0) & (offset < janela) & (linha[por_nome["codigo"].to_numpy()] >= 0)
+    presenca = np.zeros((len(ativos), janela), dtype=bool)
+    presenca[linha[por_nome["codigo"].to_numpy()[na_janela]], offset[na_janela]] = True
+
+    # sequência atual = zeros no fim da linha; maior = maior corrida de zeros (cumsum com reset nas presenças)
+    alguma = presenca.any(axis=1)
+    atual = np.where(alguma, presenca[:, ::-1].argmax(axis=1), janela)
+    ausente = (~presenca).astype("int64")
+    acumulado = ausente.cumsum(axis=1)
+    reset = np.maximum.accumulate(np.where(presenca, acumulado, 0), axis=1)
+    maior = (acumulado - reset).max(axis=1)
+
+    chaves = np.asarray(nomes_norm)[ativos]
+    out = pd.DataFrame({
+        "pessoa_entregadora": pd.Series(chaves, dtype=object).map(nomes_de_exibicao(dados)).to_numpy(),
+        "pessoa_entregadora_normalizado": chaves,
+        "sequencia_atual": atual,
+        "maior_sequencia": maior,
+        "dias_presentes": presenca.sum(axis=1),
+        "ultima_presenca": resumo.loc[ativos, "ultima_presenca"].dt.date.to_numpy(),
+    })
+    return out.sort_values(["sequencia_atual", "pessoa_entregadora"], ascending=[False, True]).reset_index(drop=True)
+
+def formatar_alertas(ausencias: pd.DataFrame, minimo_faltas: int = 4) -> list[str]:
+    """Mensagens de alerta a partir da saída de detectar_ausencias."""
+    alertas = ausencias[ausencias["sequencia_atual"] >= minimo_faltas]
+    return [
+        f"• {nome} – {seq} dias consecutivos ausente (última presença: {ultima.strftime('%d/%m')})"
+        for nome, seq, ultima in zip(alertas["pessoa_entregadora"], alertas["sequencia_atual"], alertas["ultima_presenca"])
+    ]
+
+def gerar_alertas_de_faltas(df, hoje=None, janela: int = 30, dias_ativo: int = 15, minimo_faltas: int = 4):
+    return formatar_alertas(detectar_ausencias(df, hoje=hoje, janela=janela, dias_ativo=dias_ativo), minimo_faltas)
+
+COLUNAS_CONSULTA = ["turnos", "presencas", "horas", "tempo_online_%", "ofertadas", "aceitas", "rejeitadas",
+                    "completas", "aceitacao_%", "rejeicao_%", "conclusao_%"]
+
+@medido()
+def gerar_por_praca_data_turno(df, nome=None, praca=None, data_inicio=None, data_fim=None, turno=None,
+                               datas_especificas=None, sub_praca=None, entregador=None,
+                               agrupar_por=("praca", "data", "periodo"), indice=None) -> pd.DataFrame:
+    """
+    Métricas agregadas pelos campos de 'agrupar_por' depois de aplicar os filtros (turno = coluna 'periodo';
+    nome casa pelo nome normalizado, entregador pela grafia exata).
+    Os filtros rodam sobre um indices.IndiceDatas; passe 'indice' (o do app) para não montar um a cada chamada.
+    """
+    if indice is None:
+        indice = df if isinstance(df, IndiceDatas) else IndiceDatas(como_cubo(df))
+    dados = indice.selecionar(nome=nome, entregador=entregador, praca=praca, sub_praca=sub_praca, periodo=turno,
+                              data_inicio=data_inicio, data_fim=data_fim, dias=datas_especificas)
+    chaves = [c for c in agrupar_por if c in dados.columns]
+    if dados.empty:
+        return pd.DataFrame(columns=chaves + COLUNAS_CONSULTA)
+
+    aggs = dict(
+        turnos=("turnos", "sum"),
+        presencas=("data", "nunique"),
+        segundos=("segundos_abs", "sum"),
+        ofertadas=("numero_de_corridas_ofertadas", "sum"),
+        aceitas=("numero_de_corridas_aceitas", "sum"),
+        rejeitadas=("numero_de_corridas_rejeitadas", "sum"),
+        completas=("numero_de_corridas_completadas", "sum"),
+    )
+    if "n_tempo_disponivel_escalado" in dados.columns:
+        aggs["soma_online"] = ("soma_tempo_disponivel_escalado", "sum")
+        aggs["n_online"] = ("n_tempo_disponivel_escalado", "sum")
+    if chaves:
+        m = dados.groupby(chaves, observed=True, dropna=False).agg(**aggs).reset_index()
+    else:
+        m = dados.assign(_todos=0).groupby("_todos").agg(**aggs).reset_index(drop=True)
 
-    for nome in ativos:
-        entregador = df[df["pessoa_entregadora_normalizado"] == nome]
-        if entregador.empty:
-            continue
-        dias = pd.date_range(end=hoje - timedelta(days=1), periods=30).date
-        presencas = set(entregador["data"])
-        sequencia = 0
-        for dia in sorted(dias):
-            sequencia = 0 if dia in presencas else sequencia + 1
-        if sequencia >= 4:
-            nome_original = entregador["pessoa_entregadora"].iloc[0]
-            mensagens.append(
-                f"• {nome_original} – {sequencia} dias consecutivos ausente (última presença: {entregador['data'].max().strftime('%d/%m')})"
-            )
-    return mensagens
-
-def gerar_por_praca_data_turno(df, nome=None, praca=None, data_inicio=None, data_fim=None, turno=None, datas_especificas=None):
-    df = df.copy()
-
-    if nome:
-        nome_norm = normalizar(nome)
-        df = df[df["pessoa_entregadora_normalizado"] == nome_norm]
-
-    if praca:
-        df = df[df["praca"] == praca]
-
-    if datas_especificas:
-        df = df[df["data"].isin(datas_especificas)]
-    elif data_inicio and data_fim:
-        df = df[(df["data"] >= data_inicio) & (df["data"] <= data_fim)]
-
-    if turno and "turno" in df.columns:
-        df = df[df["turno"] == turno]
-
-    if df.empty:
-        return "❌ Nenhum dado encontrado com os filtros aplicados."
+    m["horas"] = (m["segundos"] / 3600).round(2)
+    if "n_online" in m.columns:
+        m["tempo_online_%"] = tempo_online_pct(m["soma_online"], m["n_online"])
+    else:
+        m["tempo_online_%"] = 0.0
+    m["aceitacao_%"] = (m["aceitas"] / m["ofertadas"].where(m["ofertadas"] > 0) * 100).round(1).fillna(0.0)
+    m["rejeicao_%"] = (m["rejeitadas"] / m["ofertadas"].where(m["ofertadas"] > 0) * 100).round(1).fillna(0.0)
+    m["conclusao_%"] = (m["completas"] / m["aceitas"].where(m["aceitas"] > 0) * 100).round(1).fillna(0.0)
+    return m[chaves + COLUNAS_CONSULTA]
 
 # ===== SH mensal e classificação por categoria =====
 
-import pandas as pd
-from utils import tempo_para_segundos
-
-def _sh_mensal(dados: pd.DataFrame) -> float:
+# Regras padrão; podem ser trocadas via st.secrets["CATEGORIAS"] ou categorias.json (ver carregar_regras_categorias).
+# A primeira regra (na ordem) que bater 'min_criterios' dos 3 critérios define a categoria.
+REGRAS_CATEGORIAS = [
+    {"categoria": "Premium",   "min_criterios": 3, "sh": 120, "comp": 95, "acc": 65},
+    {"categoria": "Conectado", "min_criterios": 2, "sh": 60,  "comp": 80, "acc": 45},
+    {"categoria": "Casual",    "min_criterios": 1, "sh": 20,  "comp": 60, "acc": 30},
+]
+CATEGORIA_SEM_CRITERIO = "Flutuante"
+
+COLUNAS_CATEGORIAS = [
+    "pessoa_entregadora","supply_hours","aceitacao_%","conclusao_%",
+    "ofertadas","aceitas","completas","categoria","criterios_atingidos","qtd_criterios"
+]
+
+def carregar_regras_categorias(origem=None) -> list[dict]:
     """
-    Calcula SH (Supply Hours) mensal somando 'tempo_disponivel_absoluto' (HH:MM:SS) e convertendo para horas.
+    Lê as regras de categoria de uma lista de dicts (ex.: st.secrets["CATEGORIAS"]) ou de um arquivo JSON.
+    Sem origem (ou arquivo inexistente), usa REGRAS_CATEGORIAS. Campos: categoria, min_criterios, sh, comp, acc.
     """
-    if "tempo_disponivel_absoluto" not in dados.columns:
-        return 0.0
-    segundos = dados["tempo_disponivel_absoluto"].apply(tempo_para_segundos).sum()
-    return round(segundos / 3600.0, 1)
-
-def _metricas_mensais(dados: pd.DataFrame) -> dict:
-    ofertadas = float(dados.get("numero_de_corridas_ofertadas", 0).sum())
-    aceitas   = float(dados.get("numero_de_corridas_aceitas", 0).sum())
-    completas = float(dados.get("numero_de_corridas_completadas", 0).sum())
-
-    acc_pct  = round((aceitas   / ofertadas) * 100, 1) if ofertadas > 0 else 0.0  # aceitação
-    comp_pct = round((completas / aceitas)   * 100, 1) if aceitas   > 0 else 0.0  # conclusão
-    sh       = _sh_mensal(dados)
+    if origem is None:
+        return REGRAS_CATEGORIAS
+    if isinstance(origem, (str, Path)):
+        caminho = Path(origem)
+        if not caminho.exists():
+            return REGRAS_CATEGORIAS
+        origem = json.loads(caminho.read_text(encoding="utf-8"))
+
+    regras = []
+    for r in origem:
+        regras.append({
+            "categoria": str(r["categoria"]),
+            "min_criterios": int(r["min_criterios"]),
+            "sh": float(r["sh"]),
+            "comp": float(r["comp"]),
+            "acc": float(r["acc"]),
+        })
+    return regras or REGRAS_CATEGORIAS
 
-    return {
-        "SH": sh,
-        "aceitacao_%": acc_pct,
-        "conclusao_%": comp_pct,
-        "ofertadas": int(ofertadas),
-        "aceitas": int(aceitas),
-        "completas": int(completas),
-    }
+def _ordem_categorias(regras) -> pd.CategoricalDtype:
+    return pd.CategoricalDtype(categories=[r["categoria"] for r in regras] + [CATEGORIA_SEM_CRITERIO], ordered=True)
 
-def _categoria(sh: float, comp_pct: float, acc_pct: float) -> tuple[str, int, str]:
+def _agrupar_por_entregador(dados: pd.DataFrame, chaves: list[str], **kwargs):
+    """
+    groupby em que 'pessoa_entregadora' vira a chave do entregador (variantes de grafia juntas).
+    _exibir_nomes põe de volta a grafia de exibição depois do agg.
     """
-    Regras:
-      Premium     = 3/3:  SH>=120, comp>=95, acc>=65
-      Conectado   = >=2/3: SH>=60,  comp>=80, acc>=45
-      Casual      = >=1/3: SH>=20,  comp>=60, acc>=30
-      Flutuante   = 0/3
+    chaves = ["pessoa_entregadora_normalizado" if c == "pessoa_entregadora" else c for c in chaves]
+    return dados.groupby(chaves, observed=True, **kwargs)
+
+def _exibir_nomes(m: pd.DataFrame, dados: pd.DataFrame) -> pd.DataFrame:
+    nomes = m["pessoa_entregadora_normalizado"].astype(object).map(nomes_de_exibicao(dados))
+    return m.assign(pessoa_entregadora=nomes.to_numpy())
+
+def _metricas(dados: pd.DataFrame, chaves: list[str]) -> pd.DataFrame:
+    """Um groupby-agg por chaves: SH (horas), % aceitação, % conclusão e totais de corridas."""
+    m = _agrupar_por_entregador(dados, chaves, dropna=True).agg(
+        ofertadas=("numero_de_corridas_ofertadas", "sum"),
+        aceitas=("numero_de_corridas_aceitas", "sum"),
+        completas=("numero_de_corridas_completadas", "sum"),
+        segundos=("segundos_abs", "sum"),
+    ).reset_index()
+    if "pessoa_entregadora" in chaves:
+        m = _exibir_nomes(m, dados)
+        # linhas sem nome (chave "") ficam de fora, como no dropna
+        m = m[m["pessoa_entregadora"].notna()].reset_index(drop=True)
+
+    m["supply_hours"] = (m["segundos"] / 3600.0).round(1)
+    m["aceitacao_%"] = (m["aceitas"] / m["ofertadas"].where(m["ofertadas"] > 0) * 100).round(1).fillna(0.0)
+    m["conclusao_%"] = (m["completas"] / m["aceitas"].where(m["aceitas"] > 0) * 100).round(1).fillna(0.0)
+    for c in ["ofertadas", "aceitas", "completas"]:
+        m[c] = m[c].astype("int64")
+    return m.drop(columns="segundos")
+
+def _categorizar(m: pd.DataFrame, regras) -> pd.DataFrame:
     """
-    def hits(th):
-        return [
-            sh       >= th["sh"],
-            comp_pct >= th["comp"],
-            acc_pct  >= th["acc"],
-        ]
-
-    # Premium (precisa bater os 3)
-    prem = {"sh": 120, "comp": 95, "acc": 65}
-    hp = hits(prem)
-    if sum(hp) == 3:
-        return "Premium", 3, "SH≥120, comp≥95%, acc≥65%"
-
-    # Conectado (bate 2 ou 3)
-    con = {"sh": 60, "comp": 80, "acc": 45}
-    hc = hits(con); n = sum(hc)
-    if n >= 2:
-        desc = []
-        if hc[0]: desc.append("SH≥60")
-        if hc[1]: desc.append("comp≥80%")
-        if hc[2]: desc.append("acc≥45%")
-        return "Conectado", n, ", ".join(desc)
-
-    # Casual (bate pelo menos 1)
-    cas = {"sh": 20, "comp": 60, "acc": 30}
-    hcas = hits(cas); n = sum(hcas)
-    if n >= 1:
-        desc = []
-        if hcas[0]: desc.append("SH≥20")
-        if hcas[1]: desc.append("comp≥60%")
-        if hcas[2]: desc.append("acc≥30%")
-        return "Casual", n, ", ".join(desc)
-
-    return "Flutuante", 0, "nenhum critério"
-
-def classificar_entregadores(df: pd.DataFrame, mes: int | None = None, ano: int | None = None) -> pd.DataFrame:
+    Aplica as regras em arrays: conta critérios batidos por regra e, da menos para a mais exigente,
+    sobrescreve categoria/qtd/texto onde a regra vale (a primeira da lista tem prioridade).
+    """
+    sh = m["supply_hours"].to_numpy()
+    comp = m["conclusao_%"].to_numpy()
+    acc = m["aceitacao_%"].to_numpy()
+
+    categoria = np.full(len(m), CATEGORIA_SEM_CRITERIO, dtype=object)
+    qtd = np.zeros(len(m), dtype="int64")
+    texto = np.full(len(m), "nenhum critério", dtype=object)
+
+    for r in reversed(regras):
+        h_sh, h_comp, h_acc = sh >= r["sh"], comp >= r["comp"], acc >= r["acc"]
+        n = h_sh.astype("int64") + h_comp + h_acc
+        vale = n >= r["min_criterios"]
+
+        # texto por combinação de critérios (8 possíveis), indexado pelo código em bits
+        partes = [f"SH≥{r['sh']:g}", f"comp≥{r['comp']:g}%", f"acc≥{r['acc']:g}%"]
+        textos = np.array([", ".join(p for i, p in enumerate(partes) if cod >> i & 1) for cod in range(8)], dtype=object)
+        codigo = h_sh.astype("int64") | (h_comp << 1) | (h_acc << 2)
+
+        categoria = np.where(vale, r["categoria"], categoria)
+        qtd = np.where(vale, n, qtd)
+        texto = np.where(vale, textos[codigo], texto)
+
+    m["categoria"] = pd.Categorical(categoria, dtype=_ordem_categorias(regras))
+    m["criterios_atingidos"] = texto
+    m["qtd_criterios"] = qtd
+    return m
+
+@medido()
+def classificar_entregadores(df: pd.DataFrame, mes: int | None = None, ano: int | None = None,
+                             regras: list[dict] | None = None) -> pd.DataFrame:
     """
     Retorna, por entregador, SH (horas), % aceitação, % conclusão, categoria e critérios atingidos.
     Se mes/ano informados, calcula no recorte mensal; senão, usa todo o período carregado.
     """
-    dados = df.copy()
-    if mes is not None and ano is not None:
-        dados = dados[(dados["mes"] == mes) & (dados["ano"] == ano)]
+    regras = regras or REGRAS_CATEGORIAS
+    dados = _recorte(df, mes=mes, ano=ano)
     if dados.empty:
-        return pd.DataFrame(columns=[
-            "pessoa_entregadora","supply_hours","aceitacao_%","conclusao_%",
-            "ofertadas","aceitas","completas","categoria","criterios_atingidos","qtd_criterios"
-        ])
-
-    registros = []
-    for nome, chunk in dados.groupby("pessoa_entregadora", dropna=True):
-        m = _metricas_mensais(chunk)
-        cat, qtd, txt = _categoria(m["SH"], m["conclusao_%"], m["aceitacao_%"])
-        registros.append({
-            "pessoa_entregadora": nome,
-            "supply_hours": m["SH"],
-            "aceitacao_%": m["aceitacao_%"],
-            "conclusao_%": m["conclusao_%"],
-            "ofertadas": m["ofertadas"],
-            "aceitas": m["aceitas"],
-            "completas": m["completas"],
-            "categoria": cat,
-            "criterios_atingidos": txt,
-            "qtd_criterios": qtd
-        })
-
-    out = pd.DataFrame(registros)
-    if out.empty:
-        return out
+        return pd.DataFrame(columns=COLUNAS_CATEGORIAS)
 
-    ordem = pd.CategoricalDtype(categories=["Premium", "Conectado", "Casual", "Flutuante"], ordered=True)
-    out["categoria"] = out["categoria"].astype(ordem)
+    out = _categorizar(_metricas(dados, ["pessoa_entregadora"]), regras)[COLUNAS_CATEGORIAS]
     out = out.sort_values(by=["categoria", "supply_hours"], ascending=[True, False]).reset_index(drop=True)
     return out
 
-# ===== UTR =====
-
-def _horas_from_abs(df_chunk):
+@medido()
+def classificar_por_mes(df: pd.DataFrame, regras: list[dict] | None = None) -> pd.DataFrame:
     """
-    Converte 'tempo_disponivel_absoluto' (HH:MM:SS) para horas somadas.
-    Usa utils.tempo_para_segundos que já está importado no topo do arquivo.
+    Classifica todos os meses numa passada só: uma linha por (entregador, ano, mes) com as mesmas
+    colunas de classificar_entregadores.
     """
-    if "tempo_disponivel_absoluto" not in df_chunk.columns:
-        return 0.0
-    seg = df_chunk["tempo_disponivel_absoluto"].apply(tempo_para_segundos).sum()
-    return seg / 3600.0
-
+    regras = regras or REGRAS_CATEGORIAS
+    dados = como_cubo(df)
+    if dados.empty:
+        return pd.DataFrame(columns=["ano", "mes"] + COLUNAS_CATEGORIAS)
+    out = _categorizar(_metricas(dados, ["pessoa_entregadora", "ano", "mes"]), regras)
+    return out[["ano", "mes"] + COLUNAS_CATEGORIAS].sort_values(["ano", "mes", "categoria", "supply_hours"],
+                                                             ascending=[True, True, True, False]).reset_index(drop=True)
+
+@medido()
+def matriz_categorias(df: pd.DataFrame, regras: list[dict] | None = None) -> pd.DataFrame:
+    """Matriz entregador × mês ('AAAA-MM') com a categoria de cada mês, para acompanhar migrações."""
+    por_mes = classificar_por_mes(df, regras)
+    if por_mes.empty:
+        return pd.DataFrame()
+    por_mes["mes_ano"] = por_mes["ano"].astype(str) + "-" + por_mes["mes"].astype(str).str.zfill(2)
+    return por_mes.pivot(index="pessoa_entregadora", columns="mes_ano", values="categoria").sort_index(axis=1)
 
 # ---------- UTR (corridas ofertadas por hora) ----------
 
-def _horas_from_abs(df_chunk):
-    """Converte 'tempo_disponivel_absoluto' (HH:MM:SS) para horas somadas."""
-    if "tempo_disponivel_absoluto" not in df_chunk.columns:
-        return 0.0
-    seg = df_chunk["tempo_disponivel_absoluto"].apply(tempo_para_segundos).sum()
-    return seg / 3600.0
+COLUNAS_UTR = ["data","pessoa_entregadora","periodo","tempo_hms","supply_hours","corridas_ofertadas","UTR"]
 
-def _horas_para_hms(horas_float):
-    """Converte horas (float) para string HH:MM:SS."""
-    try:
-        return str(timedelta(seconds=int(round(horas_float * 3600))))
-    except Exception:
-        return "00:00:00"
+def _hms_de_segundos(segundos: pd.Series) -> pd.Series:
+    """Segundos -> texto como str(timedelta): 'H:MM:SS' ou '1 day, H:MM:SS'."""
+    seg = segundos.astype("int64")
+    dias, resto = seg // 86400, seg % 86400
+    hms = ((resto // 3600).astype(str) + ":" + (resto % 3600 // 60).astype(str).str.zfill(2)
+           + ":" + (resto % 60).astype(str).str.zfill(2))
+    sufixo = np.where(dias == 1, " day, ", " days, ")
+    return hms.where(dias == 0, dias.astype(str) + sufixo + hms)
 
+@medido()
 def utr_por_entregador_turno(df, mes=None, ano=None):
     """
     UTR DIÁRIO por (pessoa_entregadora, periodo, data).
@@ -296,59 +416,73 @@ def utr_por_entregador_turno(df, mes=None, ano=None):
     Retorna colunas:
       ['data','pessoa_entregadora','periodo','tempo_hms','supply_hours','corridas_ofertadas','UTR']
     """
-    dados = df.copy()
-
     # Recorte opcional por mês/ano
-    if mes is not None and ano is not None:
-        dados = dados[(dados["mes"] == mes) & (dados["ano"] == ano)]
+    dados = _recorte(df, mes=mes, ano=ano)
 
     if dados.empty:
-        return pd.DataFrame(columns=[
-            "data","pessoa_entregadora","periodo","tempo_hms","supply_hours",
-            "corridas_ofertadas","UTR"
-        ])
+        return pd.DataFrame(columns=COLUNAS_UTR)
 
-    # Garante a existência/valores do turno
-    if "periodo" not in dados.columns:
-        dados["periodo"] = "(sem turno)"
-    dados["periodo"] = dados["periodo"].fillna("(sem turno)")
+    # Garante a existência/valores do turno (assign: o cubo é compartilhado, não mutar)
+    # (periodo é categórico: sai para object antes de preencher com um rótulo que não está nas categorias)
+    periodo = dados["periodo"].astype(object).fillna("(sem turno)") if "periodo" in dados.columns else "(sem turno)"
+    dados = dados.assign(periodo=periodo)
 
     # Garantir 'data' como date (não datetime) para agrupar por dia corretamente
     if pd.api.types.is_datetime64_any_dtype(dados.get("data")):
-        dados["data"] = dados["data"].dt.date
-
-    registros = []
-    grp = dados.groupby(["pessoa_entregadora", "periodo", "data"], dropna=False)
-    for (nome, turno, dia), g in grp:
-        sh = _horas_from_abs(g)  # soma horas do dia
-        ofertadas = float(g.get("numero_de_corridas_ofertadas", 0).sum())
-        utr = (ofertadas / sh) if sh > 0 else 0.0
-
-        registros.append({
-            "data": dia,
-            "pessoa_entregadora": nome,
-            "periodo": turno,
-            "tempo_hms": _horas_para_hms(sh),   # HH:MM:SS por dia
-            "supply_hours": round(sh, 2),
-            "corridas_ofertadas": int(ofertadas),
-            "UTR": round(utr, 2),
-        })
+        dados = dados.assign(data=dados["data"].dt.date)
 
-    out = pd.DataFrame(registros)
-    if out.empty:
-        return out
+    out = _agrupar_por_entregador(dados, ["pessoa_entregadora", "periodo", "data"], dropna=False).agg(
+        segundos=("segundos_abs", "sum"),
+        corridas_ofertadas=("numero_de_corridas_ofertadas", "sum"),
+    ).reset_index()
+    out = _exibir_nomes(out, dados)
+
+    sh = out["segundos"] / 3600.0
+    out["tempo_hms"] = _hms_de_segundos(out["segundos"])   # HH:MM:SS por dia
+    out["supply_hours"] = sh.round(2)
+    out["UTR"] = (out["corridas_ofertadas"] / sh.where(sh > 0)).round(2).fillna(0.0)
+    out["corridas_ofertadas"] = out["corridas_ofertadas"].astype("int64")
 
     # Ordena por data crescente (e depois por UTR desc para desempate visual)
-    out = out.sort_values(by=["data", "UTR"], ascending=[True, False]).reset_index(drop=True)
+    out = out[COLUNAS_UTR].sort_values(by=["data", "UTR"], ascending=[True, False]).reset_index(drop=True)
     return out
 
+@medido()
+def utr_medio_mensal(base: pd.DataFrame) -> pd.DataFrame:
+    """
+    UTR_medio por mês a partir da saída de utr_por_entregador_turno:
+    média das UTR de cada dia e, depois, média mensal dessas médias diárias (igual ao modo UTR).
+    """
+    if base.empty:
+        return pd.DataFrame(columns=["mes_ano", "UTR_medio"])
+    por_dia = base.groupby("data", as_index=False)["UTR"].mean()
+    por_dia["mes_ano"] = pd.to_datetime(por_dia["data"]).dt.to_period("M").dt.to_timestamp()
+    return (por_dia.groupby("mes_ano", as_index=False)["UTR"].mean()
+                   .rename(columns={"UTR": "UTR_medio"}))
+
+@medido()
+def utr_consolidado(df, mes=None, ano=None) -> dict:
+    """
+    Calcula a base diária uma vez e deriva as outras visões dela:
+      'diario'    -> utr_por_entregador_turno
+      'mensal'    -> utr_medio_mensal (mes_ano, UTR_medio)
+      'por_turno' -> utr_pivot_por_entregador (entregador × turno)
+    """
+    diario = utr_por_entregador_turno(df, mes, ano)
+    return {
+        "diario": diario,
+        "mensal": utr_medio_mensal(diario),
+        "por_turno": utr_pivot_por_entregador(None, base=diario),
+    }
 
-
-def utr_pivot_por_entregador(df, mes=None, ano=None):
+@medido()
+def utr_pivot_por_entregador(df, mes=None, ano=None, base=None):
     """
     Tabela dinâmica: linhas = entregadores, colunas = turnos, valores = UTR (média).
+    Se 'base' (saída de utr_por_entregador_turno) for passada, reaproveita em vez de recalcular.
     """
-    base = utr_por_entregador_turno(df, mes, ano)
+    if base is None:
+        base = utr_por_entregador_turno(df, mes, ano)
     if base.empty:
         return base
 
@@ -366,3 +500,101 @@ def utr_pivot_por_entregador(df, mes=None, ano=None):
     return piv.round(2)
 
 
+
+# ===== Indicadores Gerais =====
+
+SOMAS_INDICADORES = ["segundos_abs", "numero_de_corridas_ofertadas", "numero_de_corridas_aceitas",
+                     "numero_de_corridas_rejeitadas", "numero_de_corridas_completadas"]
+
+@medido()
+def serie_mensal(df, colunas=None) -> pd.DataFrame:
+    """Somas por mês (mes_ano = 1º dia do mês) de segundos_abs e das contagens: barras de Indicadores Gerais."""
+    dados = como_cubo(df)
+    colunas = [c for c in (colunas or SOMAS_INDICADORES) if c in dados.columns]
+    out = dados.groupby(["ano", "mes"], observed=True)[colunas].sum().reset_index()
+    mes_ano = pd.to_datetime(pd.DataFrame({"year": out["ano"].astype(int), "month": out["mes"].astype(int), "day": 1}))
+    out = out.drop(columns=["ano", "mes"])
+    out.insert(0, "mes_ano", mes_ano)
+    return out.sort_values("mes_ano").reset_index(drop=True)
+
+@medido()
+def serie_diaria(df, mes=None, ano=None, colunas=None) -> pd.DataFrame:
+    """Somas por dia ('data' e 'dia' do mês); sem mês/ano, o histórico inteiro."""
+    dados = _recorte(df, mes=mes, ano=ano)
+    colunas = [c for c in (colunas or SOMAS_INDICADORES) if c in dados.columns]
+    out = dados.groupby("data")[colunas].sum().reset_index().sort_values("data", ignore_index=True)
+    out.insert(1, "dia", out["data"].dt.day)
+    return out
+
+CONTAGENS_SOBRE_OFERTADAS = ["numero_de_corridas_aceitas", "numero_de_corridas_rejeitadas",
+                             "numero_de_corridas_completadas"]
+
+def _formatar(fmt: str, valores) -> pd.Series:
+    """Formatação numérica vetorizada (np.char.mod), mesmo resultado de f'{v:fmt}' linha a linha."""
+    return pd.Series(np.char.mod(fmt, np.asarray(valores, dtype=float)), index=getattr(valores, "index", None))
+
+def _completar_indicadores(tabela: pd.DataFrame, chave: str, utr: pd.Series) -> pd.DataFrame:
+    """horas, UTR_medio, % sobre ofertadas e o texto das barras (rotulo_<coluna>) de cada indicador."""
+    if "segundos_abs" in tabela.columns:
+        tabela["horas"] = tabela["segundos_abs"] / 3600.0
+    tabela["UTR_medio"] = utr.reindex(tabela[chave]).to_numpy()
+
+    ofertadas = tabela.get("numero_de_corridas_ofertadas")
+    for c in SOMAS_INDICADORES[1:]:
+        if c not in tabela.columns:
+            continue
+        inteiro = tabela[c].fillna(0).astype("int64").astype(str)
+        if c == "numero_de_corridas_ofertadas":
+            tabela[f"rotulo_{c}"] = inteiro + "\nUTR " + _formatar("%.2f", tabela["UTR_medio"].fillna(0.0))
+        elif c in CONTAGENS_SOBRE_OFERTADAS and ofertadas is not None:
+            pct = (tabela[c] / ofertadas.where(ofertadas > 0) * 100).fillna(0.0)
+            tabela[f"pct_{c}"] = pct
+            tabela[f"rotulo_{c}"] = inteiro + " (" + _formatar("%.1f", pct) + "%)"
+        else:
+            tabela[f"rotulo_{c}"] = inteiro
+    return tabela
+
+@medido()
+def tabela_indicadores(df, anterior: dict | None = None, corte=None) -> dict:
+    """
+    Tabelas de Indicadores Gerais, montadas uma vez por versão dos dados:
+      'mensal' -> mes_ano, mes_rotulo, somas, horas, UTR_medio, pct_* e rotulo_* por mês
+      'diario' -> data, dia, somas, horas, UTR_medio (média das UTR do dia) por dia
+    A tela só escolhe colunas (e o mês, via indicadores_do_mes) e plota.
+    Com as tabelas da versão anterior e o 'corte' da ingestão incremental, só o mês do corte em diante
+    é recalculado; os meses anteriores vêm de 'anterior' (cada linha depende só do seu dia/mês).
+    """
+    if anterior is not None and corte is not None:
+        inicio = pd.Timestamp(corte).to_period("M").to_timestamp()
+        novas = tabela_indicadores(_recorte(df, desde=inicio))
+        return {
+            "mensal": _emendar(anterior["mensal"], novas["mensal"], "mes_ano", inicio),
+            "diario": _emendar(anterior["diario"], novas["diario"], "data", inicio),
+        }
+
+    base_utr = utr_por_entregador_turno(df)
+    utr_dia = pd.Series(dtype=float)
+    if not base_utr.empty:
+        utr_dia = base_utr.groupby("data")["UTR"].mean()
+        utr_dia.index = pd.to_datetime(utr_dia.index)
+    utr_mes = utr_medio_mensal(base_utr).set_index("mes_ano")["UTR_medio"]
+
+    mensal = serie_mensal(df)
+    mensal.insert(1, "mes_rotulo", mensal["mes_ano"].dt.strftime("%b/%y"))
+    return {
+        "mensal": _completar_indicadores(mensal, "mes_ano", utr_mes),
+        "diario": _completar_indicadores(serie_diaria(df), "data", utr_dia),
+    }
+
+def _emendar(anterior: pd.DataFrame, novas: pd.DataFrame, chave: str, inicio) -> pd.DataFrame:
+    """Linhas de 'anterior' antes de 'inicio' seguidas das recalculadas (as duas já em ordem de 'chave')."""
+    antes = anterior.iloc[:anterior[chave].searchsorted(inicio)]
+    if novas.empty:
+        return antes.reset_index(drop=True)
+    return pd.concat([antes, novas], ignore_index=True) if len(antes) else novas
+
+def indicadores_do_mes(diario: pd.DataFrame, mes: int, ano: int) -> pd.DataFrame:
+    """Fatia de tabela_indicadores(...)['diario'] no mês (busca binária em 'data', já ordenada)."""
+    inicio = pd.Timestamp(year=ano, month=mes, day=1)
+    i, f = diario["data"].searchsorted([inicio, inicio + pd.offsets.MonthBegin(1)])
+    return diario.iloc[i:f]
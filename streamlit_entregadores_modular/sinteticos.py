@@ -0,0 +1,119 @@
+"""
+Dados sintéticos no formato da aba 'bundle' (mesmos nomes de coluna), para medir e testar sem a planilha real.
+
+    python -m sinteticos --linhas 100000 --out Sintetico.xlsx
+    python -m sinteticos --entregadores 500 --dias 120 --turnos 4 --pracas 3 --out sintetico.parquet
+"""
+import argparse
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import SHEET
+
+PRIMEIROS = ["João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Luíza", "Paulo", "Adriana",
+             "Lucas", "Juliana", "Marcos", "Márcia", "Luís", "Fernanda", "Gabriel", "Patrícia", "Rafael", "Aline"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Conceição", "Lima", "Pereira", "Ferreira", "Araújo",
+              "Gonçalves", "Ribeiro", "Alves", "Gomes", "Martins", "Rocha", "Simões", "Barbosa", "Melo", "Estêvão",
+              "Cardoso"]
+TURNOS = ["MADRUGADA", "MANHÃ", "ALMOÇO", "TARDE", "JANTAR", "NOITE"]
+PRACAS = ["SÃO PAULO", "GUARULHOS", "OSASCO", "SANTO ANDRÉ", "CAMPINAS", "SOROCABA"]
+
+def nomes_entregadores(n: int) -> np.ndarray:
+    """n nomes distintos enquanto houver combinações (20 × 20 × 20); depois repetem."""
+    i = np.arange(n)
+    p, s = len(PRIMEIROS), len(SOBRENOMES)
+    return (pd.Series(np.array(PRIMEIROS)[i % p]) + " " + np.array(SOBRENOMES)[(i // p) % s] + " "
+            + np.array(SOBRENOMES)[(i // (p * s)) % s]).to_numpy()
+
+def gerar_bundle(entregadores: int = 200, dias: int = 90, turnos: int = 3, pracas: int = 2,
+                 sub_pracas: int = 3, presenca: float = 0.6, variantes: float = 0.02,
+                 inicio: str = "2025-01-01", linhas: int | None = None, semente: int = 0) -> pd.DataFrame:
+    """
+    Linhas (entregador, dia, turno) como no export: cada entregador tem praça/subpraça fixas e aparece
+    em cada turno com probabilidade 'presenca'. Uma fração 'variantes' das linhas traz o nome em
+    maiúsculas/com espaço duplo (o que a normalização precisa juntar).
+    Com 'linhas', escolhe o número de entregadores para chegar nesse total e corta no valor exato.
+    """
+    rng = np.random.default_rng(semente)
+    turnos = min(turnos, len(TURNOS))
+    pracas = min(pracas, len(PRACAS))
+    if linhas is not None:
+        entregadores = max(1, math.ceil(linhas / (dias * turnos * presenca) * 1.02))
+
+    # perfil fixo por entregador
+    nomes = nomes_entregadores(entregadores)
+    praca_e = rng.integers(0, pracas, entregadores)
+    sub_e = rng.integers(0, sub_pracas, entregadores)
+    ritmo_e = rng.gamma(4.0, 2.0, entregadores)          # ofertas por hora
+    aceite_e = rng.beta(8, 2, entregadores)
+
+    # grade entregador × dia × turno, filtrada pela presença
+    e = np.repeat(np.arange(entregadores), dias * turnos)
+    d = np.tile(np.repeat(np.arange(dias), turnos), entregadores)
+    t = np.tile(np.arange(turnos), entregadores * dias)
+    presente = rng.random(e.size) < presenca
+    e, d, t = e[presente], d[presente], t[presente]
+    if linhas is not None and e.size > linhas:
+        manter = np.sort(rng.choice(e.size, linhas, replace=False))
+        e, d, t = e[manter], d[manter], t[manter]
+    n = e.size
+
+    segundos = rng.integers(600, 4 * 3600, n)
+    ofertadas = rng.poisson(ritmo_e[e] * segundos / 3600)
+    aceitas = rng.binomial(ofertadas, aceite_e[e])
+    completadas = rng.binomial(aceitas, 0.95)
+
+    nome = pd.Series(nomes[e])
+    trocar = rng.random(n) < variantes
+    nome[trocar] = nome[trocar].str.upper().str.replace(" ", "  ", n=1)
+
+    h, resto = np.divmod(segundos, 3600)
+    m, s = np.divmod(resto, 60)
+    df = pd.DataFrame({
+        "data_do_periodo": pd.Timestamp(inicio) + pd.to_timedelta(d, unit="D"),
+        "periodo": np.array(TURNOS)[t],
+        "pessoa_entregadora": nome,
+        "praca": np.array(PRACAS)[praca_e[e]],
+        "sub_praca": pd.Series(np.array(PRACAS)[praca_e[e]]) + " - ZONA " + (sub_e[e] + 1).astype(str),
+        "tempo_disponivel_escalado": rng.uniform(40, 100, n).round(2),
+        "tempo_disponivel_absoluto": (pd.Series(h).astype(str) + ":" + pd.Series(m).astype(str).str.zfill(2)
+                                      + ":" + pd.Series(s).astype(str).str.zfill(2)),
+        "numero_de_corridas_ofertadas": ofertadas,
+        "numero_de_corridas_aceitas": aceitas,
+        "numero_de_corridas_rejeitadas": ofertadas - aceitas,
+        "numero_de_corridas_completadas": completadas,
+    })
+    return df.sort_values(["data_do_periodo", "periodo"], kind="stable").reset_index(drop=True)
+
+def gravar(df: pd.DataFrame, destino) -> Path:
+    """.parquet vira Parquet; o resto, planilha com a aba 'bundle' (lida pelo data_loader)."""
+    destino = Path(destino)
+    if destino.suffix == ".parquet":
+        df.to_parquet(destino, index=False)
+    else:
+        df.to_excel(destino, sheet_name=SHEET, index=False)
+    return destino
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="sinteticos", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, help="total de linhas (calcula o número de entregadores)")
+    parser.add_argument("--entregadores", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=90)
+    parser.add_argument("--turnos", type=int, default=3)
+    parser.add_argument("--pracas", type=int, default=2)
+    parser.add_argument("--inicio", default="2025-01-01")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--out", default="Sintetico.xlsx")
+    args = parser.parse_args(argv)
+
+    df = gerar_bundle(entregadores=args.entregadores, dias=args.dias, turnos=args.turnos, pracas=args.pracas,
+                      inicio=args.inicio, linhas=args.linhas, semente=args.semente)
+    destino = gravar(df, args.out)
+    print(f"{len(df)} linhas, {df['pessoa_entregadora'].nunique()} nomes -> {destino}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
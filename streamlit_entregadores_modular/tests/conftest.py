@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# os módulos do app são importados pelo nome (from utils import ...), como no streamlit run
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def linha(nome, data, periodo="TARDE", praca="SAO PAULO", sub_praca="CENTRO", escalado=80.0,
+          absoluto="01:00:00", ofertadas=10, aceitas=8, rejeitadas=2, completadas=7) -> dict:
+    """Uma linha da aba 'bundle' (nomes de coluna do export)."""
+    return {"data_do_periodo": pd.Timestamp(data), "periodo": periodo, "pessoa_entregadora": nome,
+            "praca": praca, "sub_praca": sub_praca, "tempo_disponivel_escalado": escalado,
+            "tempo_disponivel_absoluto": absoluto, "numero_de_corridas_ofertadas": ofertadas,
+            "numero_de_corridas_aceitas": aceitas, "numero_de_corridas_rejeitadas": rejeitadas,
+            "numero_de_corridas_completadas": completadas}
+
+@pytest.fixture
+def base():
+    """base(linhas) -> a base derivada como no data_loader (linhas: dicts de linha() ou um DataFrame)."""
+    from data_loader import derivar_bundle
+    return lambda linhas: derivar_bundle(pd.DataFrame(linhas))
@@ -0,0 +1,55 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from agregados import construir_cubo
+from conftest import linha
+from indices import IndiceDatas
+from relatorios import detectar_ausencias, formatar_alertas
+
+HOJE = date(2025, 4, 5)  # janela de 30 dias: 06/03 a 04/04
+
+def _dias(inicio, fim):
+    return [d.date() for d in pd.date_range(inicio, fim)]
+
+@pytest.fixture
+def cubo(base):
+    presencas = {
+        # ausente de 30/03 a 02/04 (a sequência atravessa a virada do mês), volta em 03/04, falta 04/04
+        "Ana Souza": _dias("2025-03-06", "2025-03-29") + [date(2025, 4, 3)],
+        # última presença no último dia de março: 4 dias de abril ausente até ontem
+        "Bruno Lima": _dias("2025-03-06", "2025-03-31"),
+        # sumiu antes do período de atividade (15 dias): fica de fora
+        "Carla Dias": _dias("2025-03-01", "2025-03-10"),
+    }
+    return construir_cubo(base([linha(nome, dia) for nome, dias in presencas.items() for dia in dias]))
+
+def test_sequencias_atravessando_o_mes(cubo):
+    out = detectar_ausencias(cubo, hoje=HOJE).set_index("pessoa_entregadora")
+    assert out.index.tolist() == ["Bruno Lima", "Ana Souza"]  # maior sequência atual primeiro
+    assert out.loc["Bruno Lima", ["sequencia_atual", "maior_sequencia", "dias_presentes"]].tolist() == [4, 4, 26]
+    assert out.loc["Bruno Lima", "ultima_presenca"] == date(2025, 3, 31)
+    assert out.loc["Ana Souza", ["sequencia_atual", "maior_sequencia", "dias_presentes"]].tolist() == [1, 4, 25]
+    assert out.loc["Ana Souza", "ultima_presenca"] == date(2025, 4, 3)
+
+def test_referencia_dia_a_dia(cubo):
+    """O bitmap dá o mesmo que contar dia a dia, como o código antigo fazia."""
+    out = detectar_ausencias(cubo, hoje=HOJE).set_index("pessoa_entregadora_normalizado")
+    janela = _dias("2025-03-06", "2025-04-04")
+    for chave, grupo in cubo.groupby("pessoa_entregadora_normalizado", observed=True):
+        if chave not in out.index:
+            continue
+        presentes = set(grupo["data"].dt.date)
+        maior = corrida = 0
+        for dia in janela:
+            corrida = 0 if dia in presentes else corrida + 1
+            maior = max(maior, corrida)
+        assert out.loc[chave, ["sequencia_atual", "maior_sequencia"]].tolist() == [corrida, maior]
+
+def test_alertas_a_partir_do_minimo(cubo):
+    alertas = formatar_alertas(detectar_ausencias(IndiceDatas(cubo), hoje=HOJE), minimo_faltas=4)
+    assert alertas == ["• Bruno Lima – 4 dias consecutivos ausente (última presença: 31/03)"]
+
+def test_sem_ativos(cubo):
+    assert detectar_ausencias(cubo, hoje=date(2025, 6, 1)).empty
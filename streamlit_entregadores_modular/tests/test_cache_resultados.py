@@ -0,0 +1,88 @@
+import threading
+
+import pandas as pd
+
+from cache_resultados import CacheResultados, tamanho_bytes
+
+def _dados(versao):
+    df = pd.DataFrame({"x": range(10)})
+    df.attrs["versao"] = versao
+    return df
+
+def _relatorio():
+    """Função de relatório de mentira (frame de 'n' linhas) e a lista das chamadas feitas a ela."""
+    chamadas = []
+
+    def relatorio(dados, n=1):
+        chamadas.append(n)
+        return pd.DataFrame({"v": range(n)})
+    return relatorio, chamadas
+
+def test_acerto_com_mesma_versao_funcao_e_parametros():
+    cache, (func, chamadas) = CacheResultados(), _relatorio()
+    dados = _dados("v1")
+    primeiro = cache.chamar(func, dados, n=3)
+    segundo = cache.chamar(func, dados, n=3)
+    assert len(chamadas) == 1
+    pd.testing.assert_frame_equal(primeiro, segundo)
+    cache.chamar(func, dados, n=4)  # outros parâmetros: outra chave
+    assert len(chamadas) == 2
+    assert cache.estatisticas()["acertos"] == 1
+
+def test_entrega_copia_que_pode_ser_alterada():
+    cache, (func, chamadas) = CacheResultados(), _relatorio()
+    dados = _dados("v1")
+    resultado = cache.chamar(func, dados, n=3)
+    resultado["extra"] = 1
+    assert "extra" not in cache.chamar(func, dados, n=3).columns
+
+def test_versao_nova_descarta_o_que_era_da_anterior():
+    cache, (func, chamadas) = CacheResultados(), _relatorio()
+    cache.chamar(func, _dados("v1"), n=3)
+    cache.chamar(func, _dados("v2"), n=3)
+    assert len(chamadas) == 2
+    assert cache.estatisticas()["itens"] == 1
+    cache.chamar(func, _dados("v1"), n=3)  # a anterior não volta do cache
+    assert len(chamadas) == 3
+
+def test_sem_versao_nao_guarda():
+    cache, (func, chamadas) = CacheResultados(), _relatorio()
+    dados = pd.DataFrame({"x": [1]})
+    cache.chamar(func, dados)
+    cache.chamar(func, dados)
+    assert len(chamadas) == 2 and cache.estatisticas()["itens"] == 0
+
+def test_estouro_do_teto_despeja_o_menos_usado():
+    func, chamadas = _relatorio()
+    tamanho = tamanho_bytes(func(None, n=100))
+    cache = CacheResultados(max_mb=2.5 * tamanho / 2**20)  # cabem dois resultados
+    dados = _dados("v1")
+    cache.chamar(func, dados, n=100)       # a
+    cache.chamar(func, dados, n=101)       # b
+    cache.chamar(func, dados, n=100)       # usa a: b vira o menos usado
+    cache.chamar(func, dados, n=102)       # c estoura o teto: sai b
+    chamadas.clear()
+    cache.chamar(func, dados, n=100)
+    cache.chamar(func, dados, n=102)
+    assert len(chamadas) == 0
+    cache.chamar(func, dados, n=101)
+    assert len(chamadas) == 1
+    assert cache._bytes <= cache.max_bytes
+
+def test_duas_threads_na_mesma_chave_contam_o_tamanho_uma_vez():
+    cache = CacheResultados()
+    dados = _dados("v1")
+    barreira = threading.Barrier(2)
+
+    def lento(dados):
+        barreira.wait(timeout=5)  # as duas calculam ao mesmo tempo (as duas são falta)
+        return pd.DataFrame({"v": range(1000)})
+
+    threads = [threading.Thread(target=cache.chamar, args=(lento, dados)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    est = cache.estatisticas()
+    assert est["faltas"] == 2 and est["itens"] == 1
+    assert cache._bytes == tamanho_bytes(pd.DataFrame({"v": range(1000)}))
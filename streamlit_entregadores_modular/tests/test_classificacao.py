@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from agregados import construir_cubo
+from conftest import linha
+from relatorios import (CATEGORIA_SEM_CRITERIO, carregar_regras_categorias, classificar_entregadores,
+                        classificar_por_mes)
+
+REGRAS = [
+    {"categoria": "A", "min_criterios": 3, "sh": 2, "comp": 80, "acc": 50},
+    {"categoria": "B", "min_criterios": 1, "sh": 1, "comp": 50, "acc": 20},
+]
+
+@pytest.fixture
+def cubo(base):
+    return construir_cubo(base([
+        # exatamente nos limites de A: SH 2.0, conclusão 80.0%, aceitação 50.0%
+        linha("Exato", "2025-03-03", absoluto="02:00:00", ofertadas=100, aceitas=50, rejeitadas=50, completadas=40),
+        # SH 1.9 (0.1 abaixo): só B
+        linha("Quase", "2025-03-03", absoluto="01:54:00", ofertadas=100, aceitas=50, rejeitadas=50, completadas=40),
+        # conclusão 78.0%: dois critérios de A não bastam
+        linha("Conclusao", "2025-03-03", absoluto="02:00:00", ofertadas=100, aceitas=50, rejeitadas=50, completadas=39),
+        # abaixo de tudo
+        linha("Nada", "2025-03-03", absoluto="00:30:00", ofertadas=100, aceitas=10, rejeitadas=90, completadas=4),
+        # o mesmo entregador em abril, nos limites de B
+        linha("Exato", "2025-04-01", absoluto="01:00:00", ofertadas=100, aceitas=20, rejeitadas=80, completadas=10),
+    ]))
+
+def test_limites_exatos_contam_como_atingidos(cubo):
+    out = classificar_entregadores(cubo, 3, 2025, regras=REGRAS).set_index("pessoa_entregadora")
+    assert out.loc["Exato", ["categoria", "qtd_criterios", "criterios_atingidos"]].tolist() == \
+        ["A", 3, "SH≥2, comp≥80%, acc≥50%"]
+    assert out.loc["Quase", ["categoria", "qtd_criterios", "criterios_atingidos"]].tolist() == \
+        ["B", 3, "SH≥1, comp≥50%, acc≥20%"]
+    assert out.loc["Conclusao", "categoria"] == "B"
+    assert out.loc["Nada", ["categoria", "qtd_criterios", "criterios_atingidos"]].tolist() == \
+        [CATEGORIA_SEM_CRITERIO, 0, "nenhum critério"]
+
+def test_ordem_por_categoria_e_sh(cubo):
+    out = classificar_entregadores(cubo, 3, 2025, regras=REGRAS)
+    assert out["pessoa_entregadora"].tolist() == ["Exato", "Conclusao", "Quase", "Nada"]
+
+def test_por_mes_igual_a_classificar_cada_mes(cubo):
+    por_mes = classificar_por_mes(cubo, regras=REGRAS)
+    for (ano, mes), grupo in por_mes.groupby(["ano", "mes"]):
+        sozinho = classificar_entregadores(cubo, mes, ano, regras=REGRAS)
+        assert grupo.drop(columns=["ano", "mes"]).reset_index(drop=True).astype(object).equals(sozinho.astype(object))
+    abril = por_mes[por_mes["mes"] == 4].set_index("pessoa_entregadora")
+    assert abril.loc["Exato", ["categoria", "qtd_criterios"]].tolist() == ["B", 3]
+
+def test_regras_de_json(tmp_path):
+    caminho = tmp_path / "categorias.json"
+    caminho.write_text(json.dumps([{"categoria": "Top", "min_criterios": "2", "sh": "10", "comp": 90, "acc": 70}]))
+    assert carregar_regras_categorias(caminho) == [{"categoria": "Top", "min_criterios": 2, "sh": 10.0,
+                                                    "comp": 90.0, "acc": 70.0}]
+    assert carregar_regras_categorias(tmp_path / "nao_existe.json")[0]["categoria"] == "Premium"
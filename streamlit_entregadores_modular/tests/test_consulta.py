@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from agregados import construir_cubo
+from conftest import linha
+from indices import IndiceDatas
+from relatorios import COLUNAS_CONSULTA, gerar_por_praca_data_turno
+
+@pytest.fixture
+def bruto(base):
+    linhas = []
+    for k, dia in enumerate(pd.date_range("2025-03-28", "2025-04-03")):
+        for j, (nome, praca, sub) in enumerate([("Ana Souza", "SAO PAULO", "CENTRO"),
+                                                ("ANA  SOUZA", "SAO PAULO", "NORTE"),   # outra grafia da Ana
+                                                ("Bruno Lima", "CAMPINAS", "CENTRO")]):
+            for periodo in ("TARDE", "NOITE"):
+                if (k + j) % 3 == 0 and periodo == "NOITE":
+                    continue
+                linhas.append(linha(nome, dia.date(), periodo=periodo, praca=praca, sub_praca=sub,
+                                    escalado=50.0 + 7 * k + j, absoluto=f"0{1 + (k + j) % 4}:30:00",
+                                    ofertadas=10 + k, aceitas=8 + j, rejeitadas=2 + k - j, completadas=6 + j))
+    # dois turnos iguais no mesmo dia: o cubo soma os dois numa linha
+    linhas.append(linha("Bruno Lima", "2025-04-01", periodo="TARDE", praca="CAMPINAS", escalado=90.0, ofertadas=0,
+                        aceitas=0, rejeitadas=0, completadas=0))
+    return base(linhas)
+
+def _referencia(bruto, agrupar_por, nome=None, entregador=None, praca=None, sub_praca=None, turno=None,
+                data_inicio=None, data_fim=None, datas_especificas=None):
+    """A consulta feita direto na base linha a linha, com máscara e groupby."""
+    m = pd.Series(True, index=bruto.index)
+    if nome is not None:
+        chave = bruto.loc[bruto["pessoa_entregadora"] == "Ana Souza", "pessoa_entregadora_normalizado"].iloc[0]
+        m &= bruto["pessoa_entregadora_normalizado"] == chave   # as duas grafias da Ana
+    if entregador is not None:
+        m &= bruto["pessoa_entregadora"] == entregador
+    for coluna, valor in (("praca", praca), ("sub_praca", sub_praca), ("periodo", turno)):
+        if valor is not None:
+            m &= bruto[coluna].isin(valor if isinstance(valor, list) else [valor])
+    if datas_especificas is not None:
+        m &= bruto["data"].isin(pd.to_datetime(datas_especificas))
+    else:
+        if data_inicio is not None:
+            m &= bruto["data"] >= pd.Timestamp(data_inicio)
+        if data_fim is not None:
+            m &= bruto["data"] <= pd.Timestamp(data_fim)
+    g = bruto[m].groupby(list(agrupar_por), observed=True).agg(
+        turnos=("data", "size"), presencas=("data", "nunique"), segundos=("segundos_abs", "sum"),
+        online=("tempo_disponivel_escalado", "mean"), ofertadas=("numero_de_corridas_ofertadas", "sum"),
+        aceitas=("numero_de_corridas_aceitas", "sum"), rejeitadas=("numero_de_corridas_rejeitadas", "sum"),
+        completas=("numero_de_corridas_completadas", "sum")).reset_index()
+    g["horas"] = (g["segundos"] / 3600).round(2)
+    g["tempo_online_%"] = (g["online"] / 100).round(1)
+    g["aceitacao_%"] = (g["aceitas"] / g["ofertadas"].where(g["ofertadas"] > 0) * 100).round(1).fillna(0.0)
+    g["rejeicao_%"] = (g["rejeitadas"] / g["ofertadas"].where(g["ofertadas"] > 0) * 100).round(1).fillna(0.0)
+    g["conclusao_%"] = (g["completas"] / g["aceitas"].where(g["aceitas"] > 0) * 100).round(1).fillna(0.0)
+    return g[list(agrupar_por) + COLUNAS_CONSULTA]
+
+def _igual(obtido, esperado, chaves):
+    def normal(df):
+        df = df.astype({c: object for c in chaves}).astype({c: float for c in COLUNAS_CONSULTA})
+        return df.sort_values(list(chaves)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(normal(obtido), normal(esperado))
+
+@pytest.mark.parametrize("filtros", [
+    {},
+    {"praca": ["SAO PAULO", "CAMPINAS"], "turno": "TARDE"},
+    {"nome": "ana souza", "data_inicio": "2025-03-30", "data_fim": "2025-04-02"},
+    {"entregador": "ANA  SOUZA", "turno": ["NOITE"]},
+    {"sub_praca": "CENTRO", "datas_especificas": ["2025-04-01", "2025-03-28", "2025-05-01"]},
+    {"praca": "CAMPINAS", "data_inicio": "2025-04-01"},
+])
+@pytest.mark.parametrize("agrupar_por", [("praca", "data", "periodo"), ("pessoa_entregadora",), ("sub_praca", "periodo")])
+def test_igual_a_consulta_linha_a_linha(bruto, filtros, agrupar_por):
+    cubo = construir_cubo(bruto)
+    obtido = gerar_por_praca_data_turno(cubo, agrupar_por=agrupar_por, **filtros)
+    assert obtido.columns.tolist() == list(agrupar_por) + COLUNAS_CONSULTA
+    _igual(obtido, _referencia(bruto, agrupar_por, **filtros), agrupar_por)
+
+def test_sem_agrupamento_e_indice_do_app(bruto):
+    cubo = construir_cubo(bruto)
+    total = gerar_por_praca_data_turno(None, agrupar_por=(), indice=IndiceDatas(cubo))
+    assert len(total) == 1
+    assert total.loc[0, "turnos"] == len(bruto)
+    assert total.loc[0, "ofertadas"] == bruto["numero_de_corridas_ofertadas"].sum()
+    assert total.loc[0, "presencas"] == bruto["data"].nunique()
+
+def test_sem_linhas(bruto):
+    vazio = gerar_por_praca_data_turno(construir_cubo(bruto), praca="RECIFE")
+    assert vazio.empty and vazio.columns.tolist() == ["praca", "data", "periodo"] + COLUNAS_CONSULTA
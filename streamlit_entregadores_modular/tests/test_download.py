@@ -0,0 +1,134 @@
+import hashlib
+import io
+import threading
+import zipfile
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from download import BAIXADO, SEM_MUDANCA, ErroDownload, baixar, caminhos, validar_xlsx
+
+def _xlsx(extra: bytes = b"") -> bytes:
+    """Zip com [Content_Types].xml (o que validar_xlsx confere) e um miolo incompressível de ~200 KB."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("[Content_Types].xml", "<Types/>")
+        z.writestr("xl/miolo.bin", hashlib.sha256(extra).digest() * 6400 + extra)
+    return buffer.getvalue()
+
+class _Servidor:
+    """Arquivo servido por HTTP com ETag/Last-Modified, 304 condicional e Range + If-Range."""
+
+    def __init__(self):
+        self.conteudo = _xlsx()
+        self.tipo = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        self.etag = True
+        self.cortar = 0   # próximas N respostas mandam metade do corpo e derrubam a conexão
+        self.pedidos = []
+
+    def validadores(self) -> tuple[str, str]:
+        return f'"{hashlib.md5(self.conteudo).hexdigest()}"', formatdate(1_700_000_000 + len(self.conteudo), usegmt=True)
+
+@pytest.fixture
+def servidor():
+    estado = _Servidor()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            estado.pedidos.append(dict(self.headers))
+            etag, modificado = estado.validadores()
+            if not estado.etag:
+                etag = None
+            if (etag and self.headers.get("If-None-Match") == etag) or \
+                    (not etag and self.headers.get("If-Modified-Since") == modificado):
+                self.send_response(304)
+                self.end_headers()
+                return
+            inicio, status = 0, 200
+            if self.headers.get("Range") and self.headers.get("If-Range") in (etag, modificado):
+                inicio, status = int(self.headers["Range"].split("=")[1].rstrip("-")), 206
+            corpo = estado.conteudo[inicio:]
+            self.send_response(status)
+            self.send_header("Content-Type", estado.tipo)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Last-Modified", modificado)
+            self.send_header("Content-Length", str(len(corpo)))
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {inicio}-{len(estado.conteudo) - 1}/{len(estado.conteudo)}")
+            self.end_headers()
+            if estado.cortar:
+                estado.cortar -= 1
+                self.wfile.write(corpo[:len(corpo) // 2])
+                self.wfile.flush()
+                self.connection.shutdown(2)
+                return
+            self.wfile.write(corpo)
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    estado.url = f"http://127.0.0.1:{http.server_port}/Tricolor.xlsx"
+    yield estado
+    http.shutdown()
+    http.server_close()
+
+def test_etag_304_reaproveita_o_local(servidor, tmp_path):
+    destino = tmp_path / "Tricolor.xlsx"
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == BAIXADO
+    assert destino.read_bytes() == servidor.conteudo
+    mtime = destino.stat().st_mtime_ns
+
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == SEM_MUDANCA
+    assert servidor.pedidos[-1]["If-None-Match"] == servidor.validadores()[0]
+    assert destino.stat().st_mtime_ns == mtime
+
+def test_last_modified_304_reaproveita_o_local(servidor, tmp_path):
+    servidor.etag = False
+    destino = tmp_path / "Tricolor.xlsx"
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == BAIXADO
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == SEM_MUDANCA
+    assert servidor.pedidos[-1]["If-Modified-Since"] == servidor.validadores()[1]
+    assert "If-None-Match" not in servidor.pedidos[-1]
+
+def test_corpo_truncado_retoma_com_range(servidor, tmp_path):
+    destino = tmp_path / "Tricolor.xlsx"
+    servidor.cortar = 1
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == BAIXADO
+
+    primeiro, segundo = servidor.pedidos
+    assert "Range" not in primeiro
+    inicio = int(segundo["Range"].split("=")[1].rstrip("-"))
+    assert 0 < inicio < len(servidor.conteudo)
+    assert segundo["If-Range"] == servidor.validadores()[0]
+    assert destino.read_bytes() == servidor.conteudo
+    assert not caminhos(destino)[0].exists()
+
+@pytest.mark.parametrize("conteudo, tipo", [
+    (b"<html><body>Google Drive - Virus scan warning</body></html>", "text/html"),
+    (b"PK\x03\x04" + bytes(4096), "application/octet-stream"),  # zip corrompido
+    (None, "application/zip"),  # zip sem [Content_Types].xml
+])
+def test_arquivo_invalido_nao_substitui_o_bom(servidor, tmp_path, conteudo, tipo):
+    destino = tmp_path / "Tricolor.xlsx"
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == BAIXADO
+    bom = destino.read_bytes()
+
+    if conteudo is None:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as z:
+            z.writestr("outro.txt", "sem cara de planilha")
+        conteudo = buffer.getvalue()
+    servidor.conteudo, servidor.tipo = conteudo, tipo
+    with pytest.raises(ErroDownload):
+        baixar(servidor.url, destino, validar=validar_xlsx)
+    assert destino.read_bytes() == bom
+    assert not caminhos(destino)[0].exists()
+
+    # o próximo download bom passa normalmente
+    servidor.conteudo = _xlsx(b"nova")
+    assert baixar(servidor.url, destino, validar=validar_xlsx) == BAIXADO
+    assert destino.read_bytes() == servidor.conteudo
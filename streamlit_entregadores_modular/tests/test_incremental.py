@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+import data_loader
+from agregados import atualizar_cubo, construir_cubo
+from conftest import linha
+from data_loader import _ingerir_incremental, _ler, _resumo_historico, derivar_bundle, ler_planilha
+from indices import IndiceDatas
+from relatorios import tabela_indicadores
+
+def _export(dias, extra=()):
+    """Export com um turno por entregador e dia (Ana nos dias pares também à noite), mais as linhas 'extra'."""
+    linhas = []
+    for k, dia in enumerate(pd.date_range(*dias)):
+        linhas.append(linha("Ana Souza", dia, absoluto=f"0{1 + k % 5}:00:00", ofertadas=10 + k, aceitas=8))
+        linhas.append(linha("Bruno Lima", dia, praca="CAMPINAS", escalado=60.0 + k, ofertadas=5, completadas=k % 5))
+        if k % 2 == 0:
+            linhas.append(linha("Ana Souza", dia, periodo="NOITE", absoluto="00:45:00", ofertadas=3))
+    return pd.DataFrame(linhas + list(extra))
+
+def _ingerir(bruto, base=None, historico=None):
+    """Como data_loader._ler: checksum do histórico antes de derivar (que altera o frame)."""
+    bruto = bruto.copy()
+    resumo = _resumo_historico(bruto, bruto["data_do_periodo"].max().normalize())
+    df = _ingerir_incremental(bruto, base, historico)
+    df.attrs["versao"] = f"v{len(df)}"
+    return df, resumo
+
+@pytest.fixture
+def anterior():
+    # o último dia (31/03) chegou pela metade: só a Ana
+    bruto = _export(("2025-02-20", "2025-03-30"), [linha("Ana Souza", "2025-03-31", ofertadas=4)])
+    return (bruto, *_ingerir(bruto))
+
+def test_dias_acrescentados_igual_a_recarga_completa(anterior):
+    bruto, base, historico = anterior
+    novo = pd.concat([bruto, _export(("2025-03-31", "2025-04-03"))], ignore_index=True)
+
+    df, _ = _ingerir(novo, base, historico)
+    assert df.attrs["incremental"] == {"corte": "2025-03-31T00:00:00", "base": base.attrs["versao"]}
+    completo = derivar_bundle(novo.copy())
+    pd.testing.assert_frame_equal(df, completo)
+
+    # cubo e tabelas de indicadores: só o trecho a partir do corte é refeito
+    cubo = atualizar_cubo(construir_cubo(base), df, "2025-03-31")
+    pd.testing.assert_frame_equal(cubo, construir_cubo(completo))
+    tabelas = tabela_indicadores(IndiceDatas(cubo), tabela_indicadores(IndiceDatas(construir_cubo(base))), "2025-03-31")
+    for visao, tabela in tabela_indicadores(IndiceDatas(construir_cubo(completo))).items():
+        pd.testing.assert_frame_equal(tabelas[visao], tabela)
+
+def test_linha_corrigida_no_historico_refaz_tudo(anterior):
+    bruto, base, historico = anterior
+    novo = pd.concat([bruto, _export(("2025-04-01", "2025-04-02"))], ignore_index=True)
+    novo.loc[3, "numero_de_corridas_aceitas"] += 1  # correção em fevereiro
+
+    assert _resumo_historico(novo, pd.Timestamp("2025-03-31")) != historico
+    df, _ = _ingerir(novo, base, historico)
+    assert "incremental" not in df.attrs
+    pd.testing.assert_frame_equal(df, derivar_bundle(novo.copy()))
+
+def test_coluna_nova_refaz_tudo(anterior):
+    bruto, base, historico = anterior
+    novo = pd.concat([bruto, _export(("2025-04-01", "2025-04-02"))], ignore_index=True)
+    novo["tag"] = "x"
+
+    df, _ = _ingerir(novo, base, historico)
+    assert "incremental" not in df.attrs and "tag" in df.columns
+    pd.testing.assert_frame_equal(df, derivar_bundle(novo.copy()))
+
+def test_grafia_nova_que_muda_chave_antiga_nao_reaproveita_o_cubo(anterior):
+    bruto, base, historico = anterior
+    # 'Bruno Lima' passa a ser a forma truncada de 'Bruno Lima Costa': a chave dele no histórico muda
+    novo = pd.concat([bruto, pd.DataFrame([linha("Bruno Lima Costa", "2025-04-01")])], ignore_index=True)
+
+    df, _ = _ingerir(novo, base, historico)
+    assert "incremental" not in df.attrs
+    assert set(df["pessoa_entregadora_normalizado"]) == {"ana souza", "bruno lima costa"}
+    pd.testing.assert_frame_equal(df, derivar_bundle(novo.copy()))
+
+@pytest.mark.parametrize("leitor", ["streaming", "pandas"])
+def test_cache_em_disco_marca_a_base_estendida(tmp_path, monkeypatch, leitor):
+    monkeypatch.setattr(data_loader, "LEITOR_XLSX", leitor)
+    planilha = tmp_path / "Tricolor.xlsx"
+    # nomes fora de ordem alfabética: o leitor em streaming cria as categorias na ordem em que aparecem
+    bruto = _export(("2025-03-01", "2025-03-10"), [linha("Carla Dias", "2025-03-01")])
+    bruto.to_excel(planilha, sheet_name="bundle", index=False)
+    primeira = _ler(planilha)
+    assert "incremental" not in primeira.attrs
+
+    pd.concat([bruto, _export(("2025-03-11", "2025-03-12"))]).to_excel(planilha, sheet_name="bundle", index=False)
+    segunda = _ler(planilha)
+    assert segunda.attrs["incremental"] == {"corte": "2025-03-10T00:00:00", "base": primeira.attrs["versao"]}
+    assert segunda.attrs["versao"] != primeira.attrs["versao"]
+    pd.testing.assert_frame_equal(segunda, derivar_bundle(ler_planilha(planilha)))
+
+    # do cache, sem ingestão: nada a reaproveitar
+    assert "incremental" not in _ler(planilha).attrs
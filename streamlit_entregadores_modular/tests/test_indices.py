@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from agregados import construir_cubo
+from conftest import linha
+from indices import IndiceDatas, IndiceNomes
+
+@pytest.fixture
+def cubo(base):
+    # todo dia de 20/02 a 10/04 para dois entregadores, em duas praças; a linha ímpar na noite
+    dias = pd.date_range("2025-02-20", "2025-04-10")
+    linhas = [linha(nome, dia.date(), periodo="NOITE" if k % 2 else "TARDE", praca=praca)
+              for k, dia in enumerate(dias)
+              for nome, praca in (("Ana Souza", "SAO PAULO"), ("Bruno Lima", "CAMPINAS"))]
+    return construir_cubo(base(linhas))
+
+def _referencia(cubo, inicio=None, fim=None, dias=None, mes=None, ano=None, **filtros):
+    """O mesmo filtro feito com máscara booleana sobre o cubo inteiro."""
+    m = pd.Series(True, index=cubo.index)
+    if dias is not None:
+        m &= cubo["data"].isin(pd.to_datetime(dias))
+    else:
+        if inicio is not None:
+            m &= cubo["data"] >= pd.Timestamp(inicio)
+        if fim is not None:
+            m &= cubo["data"] <= pd.Timestamp(fim)
+    if mes is not None:
+        m &= (cubo["data"].dt.month == mes) & (cubo["data"].dt.year == ano)
+    for coluna, valor in filtros.items():
+        m &= cubo[coluna].isin(valor if isinstance(valor, list) else [valor])
+    return cubo[m].sort_values(["data", "pessoa_entregadora", "periodo"]).reset_index(drop=True)
+
+def _igual(obtido, esperado):
+    obtido = obtido.sort_values(["data", "pessoa_entregadora", "periodo"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtido, esperado, check_categorical=False)
+
+@pytest.mark.parametrize("inicio, fim", [
+    ("2025-03-15", "2025-04-05"),   # começa e termina no meio do mês
+    ("2025-02-28", "2025-03-01"),   # só a virada de fevereiro para março
+    ("2025-01-10", "2025-02-22"),   # começa antes dos dados
+    ("2025-04-08", "2025-05-20"),   # termina depois dos dados
+    (None, "2025-03-03"),
+    ("2025-04-09", None),
+])
+def test_intervalo_no_meio_do_mes(cubo, inicio, fim):
+    _igual(IndiceDatas(cubo).selecionar(data_inicio=inicio, data_fim=fim), _referencia(cubo, inicio, fim))
+
+def test_intervalo_fora_dos_dados_ou_invertido(cubo):
+    indice = IndiceDatas(cubo)
+    assert indice.selecionar(data_inicio="2024-01-01", data_fim="2024-12-31").empty
+    assert indice.selecionar(data_inicio="2025-05-01").empty
+    assert indice.selecionar(data_inicio="2025-03-20", data_fim="2025-03-10").empty
+
+def test_mes_cruzado_com_intervalo(cubo):
+    indice = IndiceDatas(cubo)
+    assert indice.meses() == [(2025, 2), (2025, 3), (2025, 4)]
+    _igual(indice.selecionar(data_inicio="2025-03-25", data_fim="2025-04-05", mes=3, ano=2025),
+           _referencia(cubo, "2025-03-25", "2025-04-05", mes=3, ano=2025))
+    assert len(indice.mes(2, 2025)) == 9 * 2
+    assert indice.selecionar(data_inicio="2025-04-01", mes=2, ano=2025).empty
+
+def test_dias_avulsos_em_meses_diferentes(cubo):
+    dias = ["2025-04-10", "2025-02-28", "2025-03-01", "2025-03-01", "2025-06-01"]
+    _igual(IndiceDatas(cubo).selecionar(dias=dias), _referencia(cubo, dias=dias))
+    _igual(IndiceDatas(cubo).selecionar(dias=dias, praca="CAMPINAS", periodo=["NOITE"]),
+           _referencia(cubo, dias=dias, praca="CAMPINAS", periodo=["NOITE"]))
+
+def test_filtros_e_nome(cubo):
+    indice = IndiceDatas(cubo)
+    _igual(indice.selecionar(nome="ana  souza", data_inicio="2025-03-15", data_fim="2025-04-05", periodo="TARDE"),
+           _referencia(cubo, "2025-03-15", "2025-04-05", pessoa_entregadora="Ana Souza", periodo="TARDE"))
+    assert indice.selecionar(praca="RECIFE").empty
+    assert indice.selecionar(entregador="ana souza").empty  # grafia exata
+
+def test_cubo_fora_de_ordem(cubo):
+    embaralhado = cubo.sample(frac=1, random_state=0)
+    _igual(IndiceDatas(embaralhado).selecionar(data_inicio="2025-03-15", data_fim="2025-04-05"),
+           _referencia(cubo, "2025-03-15", "2025-04-05"))
+
+def test_indice_nomes_em_ordem_de_data(cubo):
+    indice = IndiceNomes(cubo.sample(frac=1, random_state=1))
+    ana = indice.linhas("ANA SOUZA")
+    assert len(ana) == 50 and ana["data"].is_monotonic_increasing
+    assert set(ana["pessoa_entregadora"]) == {"Ana Souza"}
+    assert "Carla Dias" not in indice and indice.linhas("Carla Dias").empty
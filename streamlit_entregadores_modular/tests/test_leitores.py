@@ -0,0 +1,36 @@
+from datetime import datetime, time
+
+import pandas as pd
+from openpyxl import Workbook
+
+from data_loader import SHEET, derivar_bundle, ler_planilha
+from leitor_xlsx import COLUNAS
+
+def _planilha(path):
+    """Aba 'bundle' com linha em branco no meio e células de tipos variados (como vêm do export)."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(list(COLUNAS) + ["coluna_ignorada"])
+    ws.append([datetime(2025, 3, 3), "TARDE", "Ana Souza", "SAO PAULO", "CENTRO", 80.5, time(1, 30), 10, 8, 2, 7, "x"])
+    ws.append([None] * 12)
+    ws.append([datetime(2025, 3, 4), "NOITE", "ANA  SOUZA", "SAO PAULO", "CENTRO", None, "02:00:00", 5, 5, 0, 5, None])
+    ws.append([datetime(2025, 3, 5, 14), "TARDE", "Bruno Lima", "SAO PAULO", "NORTE", 90, 3600, 3, 2, 1, 2, "y"])
+    ws.append(["2025-03-06", "TARDE", "Bruno Lima", "SAO PAULO", "NORTE", 70.0, None, 4, 4, 0, 3, None])
+    ws.append([datetime(2025, 3, 7), "MANHA", "Carla Dias", "SAO PAULO", "NORTE", 60.0, "ilegível", 1, 1, 0, 1, None])
+    ws.append([None] * 12)
+    wb.save(path)
+    return path
+
+def test_leitores_dao_a_mesma_base(tmp_path):
+    path = _planilha(tmp_path / "bundle.xlsx")
+    streaming = derivar_bundle(ler_planilha(path, "streaming"))
+    pandas = derivar_bundle(ler_planilha(path, "pandas"))
+
+    assert len(streaming) == len(pandas) == 5
+    assert streaming.columns.tolist() == pandas.columns.tolist()
+    assert streaming["mes"].dtype == pandas["mes"].dtype == "int8"
+    assert streaming["ano"].dtype == pandas["ano"].dtype == "int16"
+    assert streaming.attrs["duracoes_invalidas"] == pandas.attrs["duracoes_invalidas"] == 1
+    assert streaming["segundos_abs"].tolist() == [5400, 7200, 3600, 0, 0]
+    pd.testing.assert_frame_equal(streaming.astype(object), pandas.astype(object))
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from nomes import chaves_entregadores, unificar_variantes
+
+def test_sobrenome_abreviado_e_truncado():
+    canonicos = unificar_variantes(["maria s", "maria souza", "maria souza lima", "ana p.", "ana paula"])
+    assert canonicos == {"maria s": "maria souza lima", "maria souza": "maria souza lima", "ana p.": "ana paula"}
+
+def test_palavra_inteira_nao_e_prefixo_de_outra():
+    assert unificar_variantes(["joao silva", "joao silvano"]) == {}
+
+def test_extensao_ambigua_fica_como_esta():
+    assert unificar_variantes(["carla s", "carla silva", "carla souza"]) == {}
+
+def test_chaves_por_linha():
+    chaves = chaves_entregadores(pd.Series(["João Silva", "JOAO  SILVANO", "Maria S", "Maria Souza", None]))
+    assert chaves.astype(object).tolist() == ["joao silva", "joao silvano", "maria souza", "maria souza", ""]
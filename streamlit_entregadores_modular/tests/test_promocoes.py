@@ -0,0 +1,27 @@
+import re
+from datetime import date
+
+from agregados import construir_cubo
+from conftest import linha
+from promocoes import avaliar_promocoes
+from promocoes_loader import CriteriosHora, Promocao
+from relatorios import gerar_dados
+
+def _por_hora(min_pct_online):
+    return Promocao(id=1, tipo="por_hora", data_inicio=date(2025, 3, 1), data_fim=date(2025, 3, 31),
+                    atributos={"valor_premio": 2.0}, criterios=CriteriosHora(min_pct_online, 0.0, 0.0))
+
+def test_pct_online_e_o_tempo_online_do_relatorio(base):
+    cubo = construir_cubo(base([linha("Ana Souza", "2025-03-03", escalado=9000.0),
+                                linha("Ana Souza", "2025-03-04", escalado=7150.0),
+                                linha("Ana Souza", "2025-03-04", periodo="NOITE", escalado=6000.0)]))
+    texto = gerar_dados("Ana Souza", 3, 2025, cubo)
+    tempo_online = float(re.search(r"Tempo online: ([\d.]+)%", texto).group(1))
+
+    [pct_online] = avaliar_promocoes(cubo, [_por_hora(0.0)])["pct_online"]
+    assert pct_online == tempo_online == 73.8
+
+def test_criterio_de_online_na_mesma_escala_do_relatorio(base):
+    cubo = construir_cubo(base([linha("Ana Souza", "2025-03-03", escalado=5000.0)]))  # 50.0% no relatório
+    assert avaliar_promocoes(cubo, [_por_hora(50.0)])["elegivel"].tolist() == [True]
+    assert avaliar_promocoes(cubo, [_por_hora(50.1)])["elegivel"].tolist() == [False]
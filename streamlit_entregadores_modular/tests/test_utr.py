@@ -0,0 +1,55 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from agregados import construir_cubo
+from conftest import linha
+from indices import IndiceDatas
+from relatorios import utr_consolidado, utr_por_entregador_turno
+
+@pytest.fixture
+def cubo(base):
+    return construir_cubo(base([
+        linha("Ana Souza", "2025-03-30", periodo="TARDE", absoluto="01:00:00", ofertadas=1),    # UTR 1.0
+        linha("Ana Souza", "2025-03-31", periodo="TARDE", absoluto="02:00:00", ofertadas=10),   # UTR 5.0
+        linha("Ana Souza", "2025-03-31", periodo="NOITE", absoluto="01:00:00", ofertadas=4),    # 4.0
+        linha("Bruno Lima", "2025-03-31", periodo="TARDE", absoluto="01:00:00", ofertadas=3),   # 3.0
+        linha("Ana Souza", "2025-04-01", periodo="TARDE", absoluto="03:00:00", ofertadas=6),    # 2 turnos no mesmo
+        linha("Ana Souza", "2025-04-01", periodo="TARDE", absoluto="01:00:00", ofertadas=2),    # dia: 8 / 4h = 2.0
+        linha("Bruno Lima", "2025-04-01", periodo="NOITE", absoluto="00:00:00", ofertadas=5),   # sem horas: 0.0
+    ]))
+
+def test_diario_uma_linha_por_entregador_turno_e_dia(cubo):
+    diario = utr_por_entregador_turno(cubo).set_index(["data", "pessoa_entregadora", "periodo"])
+    assert len(diario) == 6
+    ana = diario.loc[(date(2025, 4, 1), "Ana Souza", "TARDE")]
+    assert (ana["tempo_hms"], ana["supply_hours"], ana["corridas_ofertadas"], ana["UTR"]) == ("4:00:00", 4.0, 8, 2.0)
+    assert diario.loc[(date(2025, 4, 1), "Bruno Lima", "NOITE"), "UTR"] == 0.0
+
+def test_mensal_e_a_media_das_medias_diarias(cubo):
+    utr = utr_consolidado(cubo)
+    assert utr["mensal"]["mes_ano"].tolist() == [pd.Timestamp("2025-03-01"), pd.Timestamp("2025-04-01")]
+    # março: dias 30 (1.0) e 31 ((5 + 4 + 3) / 3 = 4.0) -> 2.5; a média simples das linhas daria 3.25
+    # abril: (2 + 0) / 2
+    assert utr["mensal"]["UTR_medio"].tolist() == [2.5, 1.0]
+    marco = utr["diario"][utr["diario"]["data"] < date(2025, 4, 1)]
+    assert marco["UTR"].mean() == 3.25
+
+def test_recorte_do_mes(cubo):
+    utr = utr_consolidado(cubo, 3, 2025)
+    assert set(utr["diario"]["data"]) == {date(2025, 3, 30), date(2025, 3, 31)}
+    assert utr["mensal"]["UTR_medio"].tolist() == [2.5]
+
+def test_por_turno_media_por_entregador(cubo):
+    por_turno = utr_consolidado(cubo)["por_turno"]
+    assert por_turno.index.tolist() == ["Ana Souza", "Bruno Lima"]   # maior média primeiro
+    assert por_turno.loc["Ana Souza", "TARDE"] == 2.67               # (1.0 + 5.0 + 2.0) / 3
+    assert por_turno.loc["Ana Souza", "NOITE"] == 4.0
+    assert por_turno.loc["Bruno Lima", "NOITE"] == 0.0
+
+def test_indice_e_cubo_dao_o_mesmo(cubo):
+    com_indice = utr_consolidado(IndiceDatas(cubo), 4, 2025)
+    com_cubo = utr_consolidado(cubo, 4, 2025)
+    for visao in ("diario", "mensal", "por_turno"):
+        pd.testing.assert_frame_equal(com_indice[visao], com_cubo[visao])
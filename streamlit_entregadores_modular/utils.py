@@ -1,26 +1,60 @@
+import numpy as np
 import pandas as pd
 import unicodedata
+from pandas.api.types import union_categoricals
 
 def normalizar(texto):
     if pd.isna(texto): return ""
-    return unicodedata.normalize('NFKD', str(texto)).encode('ASCII', 'ignore').decode().lower().strip()
+    # sem acento, minúsculo e com espaços simples ('Maria  Sousa ' -> 'maria sousa')
+    return " ".join(unicodedata.normalize('NFKD', str(texto)).encode('ASCII', 'ignore').decode().lower().split())
 
-def tempo_para_segundos(t):
-    if pd.isna(t): return 0
-    try:
-        h, m, s = map(int, str(t).split(':'))
-        return h*3600 + m*60 + s
-    except Exception:
-        return int(t) if isinstance(t, (int, float)) else 0
+def concatenar(antigos: pd.DataFrame, novos: pd.DataFrame) -> pd.DataFrame:
+    """concat que mantém as colunas categóricas (une as categorias em vez de cair para object)."""
+    df = pd.concat([antigos, novos], ignore_index=True)
+    for c in antigos.columns:
+        if isinstance(antigos[c].dtype, pd.CategoricalDtype) and isinstance(novos[c].dtype, pd.CategoricalDtype):
+            df[c] = union_categoricals([antigos[c], novos[c]], sort_categories=True, ignore_order=True)
+    return df
+
+def duracoes_para_segundos(serie: pd.Series) -> tuple[pd.Series, int]:
+    """
+    Durações da coluna inteira em segundos.
+    Aceita 'HH:MM:SS' em texto, datetime.time/timedelta vindos do openpyxl e números (já em segundos).
+    Célula vazia (ausente ou só espaços) vale 0 e não conta como ilegível, como em leitor_xlsx._segundos.
+    Retorna (segundos em int64, quantidade de células preenchidas que não deu para ler).
+    """
+    vazias = 0
+    if pd.api.types.is_timedelta64_dtype(serie):
+        seg = serie.dt.total_seconds()
+    else:
+        seg = pd.to_numeric(serie, errors="coerce")
+        resto = seg.isna() & serie.notna()
+        if resto.any():
+            texto = serie[resto].astype(str).str.strip()
+            vazias = int(texto.eq("").sum())
+            seg[resto] = pd.to_timedelta(texto, errors="coerce").dt.total_seconds()
+
+    invalidos = int((seg.isna() & serie.notna()).sum()) - vazias
+    return seg.fillna(0).round().astype("int64"), invalidos
+
+def tempo_online_pct(soma, n):
+    """
+    'Tempo online %' dos relatórios a partir da soma e da contagem de tempo_disponivel_escalado:
+    média / 100, uma casa; sem contagem, 0.0. Aceita escalares ou arrays/Series (elemento a elemento).
+    """
+    if np.ndim(n) == 0:
+        return round(soma / n / 100, 1) if n else 0.0
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 0, np.asarray(soma, dtype=float) / n / 100, 0.0).round(1)
 
 def calcular_tempo_online(df_filtrado):
+    # cubo de agregados: média = soma / contagem das linhas com valor
+    if "soma_tempo_disponivel_escalado" in df_filtrado.columns:
+        return tempo_online_pct(df_filtrado["soma_tempo_disponivel_escalado"].sum(),
+                                df_filtrado["n_tempo_disponivel_escalado"].sum())
     if "tempo_disponivel_escalado" not in df_filtrado.columns:
         return 0.0
-    df_valid = df_filtrado[df_filtrado["tempo_disponivel_escalado"].notnull()]
-    print(f"Total registros: {len(df_valid)}")
-    print(df_valid["tempo_disponivel_escalado"].describe())
-    if df_valid.empty:
-        return 0.0
-    media_pct = df_valid["tempo_disponivel_escalado"].mean()
-    return round(media_pct / 100, 1)
+    validos = df_filtrado["tempo_disponivel_escalado"].dropna()
+    return tempo_online_pct(validos.sum(), len(validos))
 